@@ -0,0 +1,50 @@
+"""add durable analysis job queue
+
+Revision ID: 3d9b7e2a4c61
+Revises: 7c4e2f1a9b8d
+Create Date: 2023-12-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '3d9b7e2a4c61'
+down_revision = '7c4e2f1a9b8d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Reuses the analysisstatus type created for contract_versions.analysis_status.
+    analysis_status = postgresql.ENUM('pending', 'in_progress', 'completed', 'failed', name='analysisstatus', create_type=False)
+    op.create_table('analysis_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('contract_version_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('file_contents', sa.LargeBinary(), nullable=True),
+        sa.Column('status', analysis_status, nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='5'),
+        sa.Column('run_after', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('locked_by', sa.String(), nullable=True),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.ForeignKeyConstraint(['contract_version_id'], ['contract_versions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_analysis_jobs_organization_id', 'analysis_jobs', ['organization_id'], unique=False)
+    op.create_index('ix_analysis_jobs_contract_version_id', 'analysis_jobs', ['contract_version_id'], unique=False)
+    op.create_index('ix_analysis_jobs_status_run_after', 'analysis_jobs', ['status', 'run_after'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_analysis_jobs_status_run_after', table_name='analysis_jobs')
+    op.drop_index('ix_analysis_jobs_contract_version_id', table_name='analysis_jobs')
+    op.drop_index('ix_analysis_jobs_organization_id', table_name='analysis_jobs')
+    op.drop_table('analysis_jobs')
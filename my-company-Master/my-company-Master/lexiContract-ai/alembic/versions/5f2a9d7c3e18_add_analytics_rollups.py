@@ -0,0 +1,114 @@
+"""add analytics dashboard rollup tables
+
+Revision ID: 5f2a9d7c3e18
+Revises: 8e4f6a2c1d97
+Create Date: 2023-12-22 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '5f2a9d7c3e18'
+down_revision = '8e4f6a2c1d97'
+branch_labels = None
+depends_on = None
+
+# Each rollup is kept in sync by statement-level triggers that aggregate the statement's
+# transition tables, so a bulk insert of N suggestions is one upsert per affected key, not N.
+CONTRACT_CHANGES = """
+    SELECT organization_id, (created_at AT TIME ZONE 'UTC')::date AS day,
+           negotiation_status::text AS negotiation_status, {delta} AS delta
+    FROM {rows}
+"""
+SUGGESTION_CHANGES = """
+    SELECT c.organization_id, s.risk_category, {delta} AS delta
+    FROM {rows} s
+    JOIN contract_versions v ON v.id = s.contract_version_id
+    JOIN contracts c ON c.id = v.contract_id
+"""
+CONTRACT_UPSERT = """
+    INSERT INTO analytics_contract_daily AS r (organization_id, day, negotiation_status, contract_count)
+    SELECT organization_id, day, negotiation_status, sum(delta)
+    FROM ({changes}) changes
+    GROUP BY 1, 2, 3
+    HAVING sum(delta) <> 0
+    ORDER BY 1, 2, 3
+    ON CONFLICT (organization_id, day, negotiation_status)
+    DO UPDATE SET contract_count = r.contract_count + EXCLUDED.contract_count;
+"""
+SUGGESTION_UPSERT = """
+    INSERT INTO analytics_risk_category_counts AS r (organization_id, risk_category, suggestion_count)
+    SELECT organization_id, risk_category, sum(delta)
+    FROM ({changes}) changes
+    GROUP BY 1, 2
+    HAVING sum(delta) <> 0
+    ORDER BY 1, 2
+    ON CONFLICT (organization_id, risk_category)
+    DO UPDATE SET suggestion_count = r.suggestion_count + EXCLUDED.suggestion_count;
+"""
+
+
+def trigger_function(name: str, changes: str, upsert: str) -> str:
+    inserted = changes.format(rows="new_rows", delta=1)
+    deleted = changes.format(rows="old_rows", delta=-1)
+    return f"""
+        CREATE FUNCTION {name}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {upsert.format(changes=inserted)}
+            ELSIF TG_OP = 'DELETE' THEN
+                {upsert.format(changes=deleted)}
+            ELSE
+                {upsert.format(changes=inserted + " UNION ALL " + deleted)}
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """
+
+
+def create_triggers(table: str, function: str):
+    # Transition tables need one trigger per event.
+    op.execute(f"CREATE TRIGGER {table}_rollup_insert AFTER INSERT ON {table} REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {function}();")
+    op.execute(f"CREATE TRIGGER {table}_rollup_update AFTER UPDATE ON {table} REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {function}();")
+    op.execute(f"CREATE TRIGGER {table}_rollup_delete AFTER DELETE ON {table} REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION {function}();")
+
+
+def upgrade() -> None:
+    op.create_table('analytics_contract_daily',
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('negotiation_status', sa.String(), nullable=False),
+        sa.Column('contract_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.PrimaryKeyConstraint('organization_id', 'day', 'negotiation_status')
+    )
+    op.create_table('analytics_risk_category_counts',
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('risk_category', sa.String(), nullable=False),
+        sa.Column('suggestion_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.PrimaryKeyConstraint('organization_id', 'risk_category')
+    )
+
+    op.execute(trigger_function('analytics_contract_daily_apply', CONTRACT_CHANGES, CONTRACT_UPSERT))
+    op.execute(trigger_function('analytics_risk_category_counts_apply', SUGGESTION_CHANGES, SUGGESTION_UPSERT))
+    # CREATE TRIGGER locks out writers until this migration commits, so the backfill
+    # below sees every committed row and no write is counted twice or missed.
+    create_triggers('contracts', 'analytics_contract_daily_apply')
+    create_triggers('analysis_suggestions', 'analytics_risk_category_counts_apply')
+
+    op.execute(CONTRACT_UPSERT.format(changes=CONTRACT_CHANGES.format(rows="contracts", delta=1)))
+    op.execute(SUGGESTION_UPSERT.format(changes=SUGGESTION_CHANGES.format(rows="analysis_suggestions", delta=1)))
+
+
+def downgrade() -> None:
+    for table in ('contracts', 'analysis_suggestions'):
+        for event in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER {table}_rollup_{event} ON {table};")
+    op.execute("DROP FUNCTION analytics_risk_category_counts_apply();")
+    op.execute("DROP FUNCTION analytics_contract_daily_apply();")
+    op.drop_table('analytics_risk_category_counts')
+    op.drop_table('analytics_contract_daily')
@@ -0,0 +1,48 @@
+"""add contract version full-text search vector
+
+Revision ID: 7c4e2f1a9b8d
+Revises: 6b3d1a9c8e7f
+Create Date: 2023-12-11 09:00:00.123456
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '7c4e2f1a9b8d'
+down_revision = '6b3d1a9c8e7f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The column is added as nullable with no default so this is a metadata-only change.
+    # Existing rows are filled in batches by jobs/backfill_search_vectors.py.
+    op.add_column('contract_versions', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # Keep search_vector in sync with full_text on every insert or text update.
+    op.execute("""
+        CREATE FUNCTION contract_versions_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('english', coalesce(NEW.full_text, ''));
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER contract_versions_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF full_text ON contract_versions
+        FOR EACH ROW EXECUTE FUNCTION contract_versions_search_vector_update();
+    """)
+
+    op.create_index('ix_contract_versions_search_vector', 'contract_versions', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_contract_versions_contract_id_version_number', 'contract_versions', ['contract_id', 'version_number'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contract_versions_contract_id_version_number', table_name='contract_versions')
+    op.drop_index('ix_contract_versions_search_vector', table_name='contract_versions')
+    op.execute("DROP TRIGGER contract_versions_search_vector_trigger ON contract_versions;")
+    op.execute("DROP FUNCTION contract_versions_search_vector_update();")
+    op.drop_column('contract_versions', 'search_vector')
@@ -0,0 +1,50 @@
+"""add precomputed clause acceptance rates
+
+Revision ID: 8e4f6a2c1d97
+Revises: 3d9b7e2a4c61
+Create Date: 2023-12-20 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '8e4f6a2c1d97'
+down_revision = '3d9b7e2a4c61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('clause_acceptance_rates',
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('clause_category', sa.String(), nullable=False),
+        sa.Column('contract_type', sa.String(), nullable=False, server_default=''),
+        sa.Column('counterparty_industry', sa.String(), nullable=False, server_default=''),
+        sa.Column('accepted_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rejected_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.PrimaryKeyConstraint('organization_id', 'clause_category', 'contract_type', 'counterparty_industry')
+    )
+    # Speeds up the per-organization refresh in jobs/outcome_processor.py.
+    op.create_index('ix_negotiation_outcomes_organization_id_clause_category', 'negotiation_outcomes', ['organization_id', 'clause_category'], unique=False)
+
+    # Backfill from the existing outcomes.
+    op.execute("""
+        INSERT INTO clause_acceptance_rates
+            (organization_id, clause_category, contract_type, counterparty_industry, accepted_count, rejected_count, updated_at)
+        SELECT organization_id, clause_category, coalesce(contract_type, ''), coalesce(counterparty_industry, ''),
+               coalesce(sum(count) FILTER (WHERE outcome = 'accepted'), 0),
+               coalesce(sum(count) FILTER (WHERE outcome = 'rejected'), 0),
+               now()
+        FROM negotiation_outcomes
+        WHERE clause_category IS NOT NULL
+        GROUP BY 1, 2, 3, 4;
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_negotiation_outcomes_organization_id_clause_category', table_name='negotiation_outcomes')
+    op.drop_table('clause_acceptance_rates')
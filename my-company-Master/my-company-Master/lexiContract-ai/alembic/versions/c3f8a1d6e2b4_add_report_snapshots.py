@@ -0,0 +1,44 @@
+"""add report snapshot schedules and snapshots
+
+Revision ID: c3f8a1d6e2b4
+Revises: 9b1e4c7a2f53
+Create Date: 2023-12-28 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8a1d6e2b4'
+down_revision = '9b1e4c7a2f53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('custom_reports', sa.Column('snapshot_schedule', sa.String(), nullable=True))
+
+    op.create_table('report_snapshots',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('report_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('definition_hash', sa.String(), nullable=False),
+        sa.Column('columns', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('duration_seconds', sa.Float(), nullable=False),
+        sa.Column('truncated', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['report_id'], ['custom_reports.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_report_snapshots_report_id_created_at', 'report_snapshots', ['report_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_report_snapshots_report_id_created_at', table_name='report_snapshots')
+    op.drop_table('report_snapshots')
+    op.drop_column('custom_reports', 'snapshot_schedule')
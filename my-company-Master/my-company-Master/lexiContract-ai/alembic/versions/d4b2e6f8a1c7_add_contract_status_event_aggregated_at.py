@@ -0,0 +1,41 @@
+"""mark aggregated contract status events
+
+Revision ID: d4b2e6f8a1c7
+Revises: c3f8a1d6e2b4
+Create Date: 2024-01-03 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd4b2e6f8a1c7'
+down_revision = 'c3f8a1d6e2b4'
+branch_labels = None
+depends_on = None
+
+CYCLE_END = "((field = 'negotiation_status' AND to_status = 'SIGNED') OR (field = 'signature_status' AND to_status = 'completed'))"
+
+
+def upgrade() -> None:
+    op.add_column('contract_status_events', sa.Column('aggregated_at', sa.DateTime(timezone=True), nullable=True))
+    # Events up to the old id watermark were already folded into the sketches.
+    op.execute(
+        "UPDATE contract_status_events SET aggregated_at = now() "
+        "WHERE id <= (SELECT coalesce(max(last_event_id), 0) FROM contract_cycle_time_stats) AND " + CYCLE_END
+    )
+    op.drop_index('ix_contract_status_events_cycle_end', table_name='contract_status_events')
+    # The aggregator only reads cycle-ending events it has not stamped yet.
+    op.create_index(
+        'ix_contract_status_events_unaggregated', 'contract_status_events', ['id'], unique=False,
+        postgresql_where=sa.text("aggregated_at IS NULL AND " + CYCLE_END),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contract_status_events_unaggregated', table_name='contract_status_events')
+    op.create_index(
+        'ix_contract_status_events_cycle_end', 'contract_status_events', ['id'], unique=False,
+        postgresql_where=sa.text(CYCLE_END),
+    )
+    op.drop_column('contract_status_events', 'aggregated_at')
@@ -0,0 +1,33 @@
+"""add vector deletion queue
+
+Revision ID: e5c3a7b9d2f4
+Revises: d4b2e6f8a1c7
+Create Date: 2024-01-04 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'e5c3a7b9d2f4'
+down_revision = 'd4b2e6f8a1c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('vector_deletions',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('contract_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('version_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('vector_deletions')
@@ -0,0 +1,23 @@
+"""store large analysis uploads on disk
+
+Revision ID: f6d4b8c1e3a5
+Revises: e5c3a7b9d2f4
+Create Date: 2024-01-05 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f6d4b8c1e3a5'
+down_revision = 'e5c3a7b9d2f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('analysis_jobs', sa.Column('file_path', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('analysis_jobs', 'file_path')
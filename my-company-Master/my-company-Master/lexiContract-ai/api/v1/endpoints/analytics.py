@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from core import crud, models, schemas
+from core.model_registry import timeline_registry
 from api.v1 import dependencies
 
 router = APIRouter()
@@ -30,4 +31,15 @@ def get_full_analytics_dashboard(
         kpis=kpis,
         risk_distribution=risk_distribution,
         volume_over_time=volume_over_time,
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/analytics/prediction-models")
+def get_prediction_model_stats(
+    current_user: models.User = Depends(dependencies.get_current_admin_user),
+):
+    """
+    Returns the timeline model versions serving this worker, their latency histograms,
+    and how far a shadow version's predictions are from the served ones. Stats are per process.
+    """
+    return timeline_registry.stats()
@@ -1,9 +1,11 @@
+import os
 import uuid
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from core import crud, models, schemas
+from core import analysis_queue, crud, models, schemas, utils
 from api.v1 import dependencies
 
 router = APIRouter()
@@ -21,7 +23,12 @@ async def upload_contract(
     if not file.filename:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No file name provided.")
 
-    full_text = (await file.read()).decode("utf-8")
+    # Extraction is CPU-bound; keep it off the event loop. Files other than PDFs are
+    # read as UTF-8 text, whatever their extension.
+    try:
+        full_text = await run_in_threadpool(utils.extract_text_from_upload, file.file, file.filename, True)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     contract = crud.create_contract_with_initial_version(
         db=db,
@@ -35,6 +42,58 @@ async def upload_contract(
 
     return contract
 
+@router.post("/{contract_id}/versions", response_model=schemas.ContractVersion, status_code=status.HTTP_201_CREATED)
+async def upload_contract_version(
+    contract_id: uuid.UUID,
+    file: UploadFile = File(...),
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_current_active_user),
+):
+    """
+    Uploads a new version of an existing contract and queues it for analysis. Once the
+    previous version is analyzed, only the regions that changed are analyzed again
+    (see core/incremental_analysis.py).
+    """
+    db_contract = crud.get_contract_by_id(db, contract_id=contract_id, organization_id=current_user.organization_id)
+    if not db_contract:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contract not found")
+    if not file.filename:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No file name provided.")
+
+    # The upload is saved once and handed to the worker by path, which falls back to a
+    # full analysis of the raw file when there is no analyzed base. Extraction is
+    # CPU-bound; keep it off the event loop.
+    file_path = await run_in_threadpool(utils.save_upload, file.file, file.filename)
+    try:
+        full_text = await run_in_threadpool(utils.extract_text_from_path, file_path, file.filename, True)
+    except ValueError as e:
+        os.unlink(file_path)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    try:
+        new_version = crud.create_new_contract_version(db, contract_id=db_contract.id, full_text=full_text, uploader_id=current_user.id)
+        analysis_queue.enqueue_analysis(
+            db,
+            organization_id=current_user.organization_id,
+            version_id=new_version.id,
+            file_path=file_path,
+            filename=file.filename,
+        )
+    except Exception:
+        os.unlink(file_path)
+        raise
+    return new_version
+
+@router.get("/analysis-queue")
+def get_analysis_queue_stats(
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_current_admin_user),
+):
+    """
+    Returns the organization's analysis job counts by status and how long the oldest
+    pending job has been waiting.
+    """
+    return analysis_queue.queue_stats(db, organization_id=current_user.organization_id)
+
 @router.get("/{contract_id}", response_model=schemas.ContractDetail)
 def read_contract(
     contract_id: uuid.UUID,
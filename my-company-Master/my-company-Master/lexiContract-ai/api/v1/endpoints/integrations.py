@@ -6,7 +6,7 @@ import httpx
 
 from api.v1 import dependencies
 from core import crud, schemas, models
-from core import crud, schemas, models, security, analyzer
+from core import crud, schemas, models, security, analyzer, analysis_queue
 from core.config import settings
 from core.salesforce_client import SalesforceClient
 from core.hubspot_client import HubSpotClient
@@ -170,7 +170,6 @@ class GoogleDriveImportPayload(schemas.BaseModel):
 )
 async def import_google_drive_file(
     payload: GoogleDriveImportPayload,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(dependencies.get_db),
     current_user: models.User = Depends(dependencies.get_current_active_user),
 ):
@@ -180,7 +179,7 @@ async def import_google_drive_file(
 
         contract = crud.create_contract_for_import(db=db, filename=payload.file_name, user_id=current_user.id, organization_id=current_user.organization_id, org_integration_id=gdrive_client.org_integration.id, external_id=payload.file_id)
 
-        background_tasks.add_task(analyzer.analyze_contract, version_id=contract.versions[0].id, file_contents=file_bytes, filename=payload.file_name)
+        analysis_queue.enqueue_analysis(db, organization_id=current_user.organization_id, version_id=contract.versions[0].id, file_contents=file_bytes, filename=payload.file_name)
         
         return contract
     except Exception as e:
@@ -320,10 +319,8 @@ def update_contract_status(
     if not contract or contract.organization_id != current_user.organization_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contract not found")
 
-    # Update the status in our database
-    contract.negotiation_status = status_in.status
-    db.commit()
-    db.refresh(contract)
+    # Update the status in our database, logging the transition for cycle-time analytics
+    contract = crud.update_contract_negotiation_status(db, contract=contract, status=status_in.status, user_id=current_user.id)
 
     # If linked to an external system, trigger a background sync
     if contract.external_id and contract.organization_integration_id:
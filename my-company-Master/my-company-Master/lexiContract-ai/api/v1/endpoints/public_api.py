@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
+import os
 import uuid
 
-from .... import core, models, schemas, analyzer, utils
+from .... import core, models, schemas, utils
 from .. import dependencies
+from core import analysis_queue
 
 router = APIRouter()
 
@@ -64,7 +67,6 @@ def get_public_contract(
 @router.post("/contracts", response_model=schemas.PublicContract, status_code=status.HTTP_202_ACCEPTED, summary="Upload Contract for Analysis")
 async def upload_public_contract(
     file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     db: Session = Depends(dependencies.get_db),
     api_key: models.ApiKey = Depends(dependencies.get_valid_api_key),
 ):
@@ -72,26 +74,33 @@ async def upload_public_contract(
     Upload a new contract document for analysis. The analysis is performed
     asynchronously. The initial response will show a 'pending' status.
     """
-    file_contents = await file.read()
+    # The upload is saved once and handed to the analysis worker by path, so a large PDF
+    # is never held in memory. Extraction is CPU-bound; keep it off the event loop.
+    file_path = await run_in_threadpool(utils.save_upload, file.file, file.filename)
     try:
-        full_text = utils.extract_text_from_file(file_contents, file.filename)
+        full_text = await run_in_threadpool(utils.extract_text_from_path, file_path, file.filename)
     except ValueError as e:
+        os.unlink(file_path)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    try:
+        db_contract = core.crud.create_contract_with_initial_version(
+            db=db,
+            filename=file.filename,
+            full_text=full_text,
+            user_id=api_key.user_id, # Attribute the upload to the user who created the key
+            organization_id=api_key.organization_id
+        )
 
-    db_contract = core.crud.create_contract_with_initial_version(
-        db=db,
-        filename=file.filename,
-        full_text=full_text,
-        user_id=api_key.user_id, # Attribute the upload to the user who created the key
-        organization_id=api_key.organization_id
-    )
-
-    initial_version = db_contract.versions[0]
-    background_tasks.add_task(
-        analyzer.analyze_contract,
-        version_id=initial_version.id,
-        file_contents=file_contents,
-        filename=file.filename
-    )
+        initial_version = db_contract.versions[0]
+        analysis_queue.enqueue_analysis(
+            db,
+            organization_id=api_key.organization_id,
+            version_id=initial_version.id,
+            file_path=file_path,
+            filename=file.filename
+        )
+    except Exception:
+        os.unlink(file_path)
+        raise
 
     return schemas.PublicContract.from_orm(db_contract)
\ No newline at end of file
@@ -1,21 +1,43 @@
-from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 import uuid
 
-from core import crud, models, reporting
+from core import crud, models, schemas, reporting, report_executor, report_snapshots
+from core.report_cache import report_cache, cache_key, query_tables
+from core.config import settings
+from core.database import SessionLocal
 from api.v1 import dependencies
 
 router = APIRouter()
 
+@router.get("/cache-stats")
+def get_report_cache_stats(
+    current_user: models.User = Depends(dependencies.get_current_admin_user),
+):
+    """
+    Returns this worker's report cache hit rate and the query time it saved.
+    """
+    return report_cache.stats()
+
 @router.post(
     "/{report_id}/execute",
     response_model=List[Dict[str, Any]],
     summary="Execute a Custom Report",
-    description="Executes the query defined in a custom report and returns the data.",
+    description=(
+        "Executes the query defined in a custom report. `format=json` returns one page of rows, "
+        "with the cursor for the next page in the X-Next-Cursor header; `ndjson` and `csv` stream "
+        "every row, up to the configured row and time limits. Reports over the cost budget are "
+        "limited to a recent date range (see the X-Report-Date-Range-Start header) or rejected."
+    ),
 )
 def execute_custom_report(
     report_id: uuid.UUID,
+    response: Response,
+    format: str = Query("json", pattern="^(json|ndjson|csv)$"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page."),
+    page_size: Optional[int] = Query(None, ge=1),
     db: Session = Depends(dependencies.get_db),
     current_user: models.User = Depends(dependencies.get_active_subscriber),
 ):
@@ -27,4 +49,156 @@ def execute_custom_report(
     if not report:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found.")
 
-    return reporting.execute_report_query(db=db, report=report, organization_id=current_user.organization_id)
\ No newline at end of file
+    # Validates the definition and its cost before any streaming starts, so errors still get a 400.
+    plan = reporting.plan_report(db, report.configuration, current_user.organization_id)
+
+    if format != "json":
+        # The stream runs on its own session: the request's is closed before the body is sent.
+        stream = report_executor.stream_report(SessionLocal, lambda: plan.query)
+        lines = report_executor.ndjson_lines(stream) if format == "ndjson" else report_executor.csv_lines(stream)
+        headers = {"Content-Disposition": f'attachment; filename="report-{report_id}.{format}"'} if format == "csv" else None
+        return StreamingResponse(lines, media_type=report_executor.MEDIA_TYPES[format], headers=headers)
+
+    try:
+        after = report_executor.decode_report_cursor(cursor, plan.key_column) if cursor and not plan.aggregated else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    rows, next_key = report_cache.get_or_execute(
+        db,
+        cache_key(current_user.organization_id, report.configuration, cursor=cursor, page_size=page_size, since=plan.forced_since),
+        query_tables(plan.query),
+        lambda session: reporting.execute_plan(session, plan, after=after, page_size=page_size),
+    )
+    if plan.forced_since is not None:
+        response.headers["X-Report-Date-Range-Start"] = plan.forced_since.isoformat()
+    if next_key is not None:
+        response.headers["X-Next-Cursor"] = report_executor.encode_report_cursor(next_key)
+    return rows
+
+@router.get("/{report_id}/explain", summary="Explain a Custom Report")
+def explain_custom_report(
+    report_id: uuid.UUID,
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_active_subscriber),
+):
+    """
+    Shows the query a custom report compiles to and the database's plan and cost estimate
+    for it, including whether the cost budget limits it to a recent date range or rejects it.
+    """
+    report = crud.get_custom_report(db, report_id=report_id, organization_id=current_user.organization_id)
+    if not report:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found.")
+
+    plan = reporting.plan_report(db, report.configuration, current_user.organization_id, enforce_budget=False)
+    return {
+        "report_id": report.id,
+        "data_source": plan.data_source,
+        "aggregated": plan.aggregated,
+        "sql": str(plan.query.compile(dialect=db.get_bind().dialect)),
+        "estimated_cost": plan.cost,
+        "estimated_rows": plan.estimated_rows,
+        "cost_budget": settings.REPORT_MAX_PLAN_COST,
+        "within_budget": plan.cost <= settings.REPORT_MAX_PLAN_COST,
+        "forced_date_range": {"field": plan.date_field, "since": plan.forced_since} if plan.forced_since else None,
+        "plan": plan.explain,
+    }
+
+@router.put("/{report_id}/schedule", response_model=schemas.ReportSchedule, summary="Schedule a Custom Report")
+def schedule_custom_report(
+    report_id: uuid.UUID,
+    schedule_in: schemas.ReportScheduleUpdate,
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_active_subscriber),
+):
+    """
+    Runs a report daily, weekly or monthly in the off-peak window and keeps its results as
+    snapshots, read through GET /{report_id}/snapshot. A null schedule stops the runs.
+    The scheduler picks up changes within 5 minutes.
+    """
+    report = crud.get_custom_report(db, report_id=report_id, organization_id=current_user.organization_id)
+    if not report:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found.")
+    if schedule_in.schedule is not None:
+        if schedule_in.schedule not in report_snapshots.SNAPSHOT_SCHEDULES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Schedule must be one of: {', '.join(report_snapshots.SNAPSHOT_SCHEDULES)}.",
+            )
+        if not report_snapshots.PYARROW_ENABLED:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Report snapshots are not available on this server.")
+        # Rejects a definition that could never run before it is scheduled.
+        reporting.compile_report(report.configuration, current_user.organization_id)
+
+    report = crud.update_custom_report_schedule(db, report, schedule_in.schedule)
+    return schemas.ReportSchedule(
+        report_id=report.id,
+        schedule=report.snapshot_schedule,
+        next_run_at=report_snapshots.next_snapshot_run(report.id, report.snapshot_schedule) if report.snapshot_schedule else None,
+    )
+
+@router.get("/{report_id}/snapshots", response_model=List[schemas.ReportSnapshot], summary="List a Custom Report's Snapshots")
+def list_custom_report_snapshots(
+    report_id: uuid.UUID,
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_active_subscriber),
+):
+    report = crud.get_custom_report(db, report_id=report_id, organization_id=current_user.organization_id)
+    if not report:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found.")
+    return crud.get_report_snapshots(db, report_id=report.id)
+
+@router.get(
+    "/{report_id}/snapshot",
+    summary="Read a Custom Report Snapshot",
+    description=(
+        "Reads rows of a scheduled report's newest snapshot (or `snapshot_id`) from its Parquet "
+        "file, without querying the database tables. `columns` (comma-separated) and "
+        "`offset`/`limit` select what is read. `format=arrow` returns an Arrow IPC stream."
+    ),
+)
+def read_custom_report_snapshot(
+    report_id: uuid.UUID,
+    snapshot_id: Optional[uuid.UUID] = None,
+    columns: Optional[str] = Query(None, description="Comma-separated column names; all columns if omitted."),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    format: str = Query("json", pattern="^(json|arrow)$"),
+    db: Session = Depends(dependencies.get_db),
+    current_user: models.User = Depends(dependencies.get_active_subscriber),
+):
+    report = crud.get_custom_report(db, report_id=report_id, organization_id=current_user.organization_id)
+    if not report:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found.")
+    snapshot = crud.get_report_snapshot(db, report_id=report.id, snapshot_id=snapshot_id)
+    if not snapshot:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Snapshot not found.")
+    if not report_snapshots.PYARROW_ENABLED:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Report snapshots are not available on this server.")
+
+    limit = min(limit or settings.REPORT_PAGE_SIZE, settings.REPORT_MAX_PAGE_SIZE) if format == "json" else limit
+    selected = [name.strip() for name in columns.split(",") if name.strip()] if columns else None
+    try:
+        table = report_snapshots.read_snapshot(snapshot, columns=selected, offset=offset, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except FileNotFoundError:
+        # Pruned between the lookup and the read.
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Snapshot not found.")
+
+    headers = {
+        "X-Snapshot-Id": str(snapshot.id),
+        "X-Snapshot-Created-At": snapshot.created_at.isoformat(),
+        "X-Total-Rows": str(snapshot.row_count),
+    }
+    if format == "arrow":
+        return Response(content=report_snapshots.arrow_ipc_bytes(table), media_type=report_snapshots.ARROW_MEDIA_TYPE, headers=headers)
+    return {
+        "snapshot_id": snapshot.id,
+        "created_at": snapshot.created_at,
+        # The report was edited after this snapshot was taken.
+        "stale": snapshot.definition_hash != report_snapshots.definition_hash(report.configuration),
+        "truncated": snapshot.truncated,
+        "total_rows": snapshot.row_count,
+        "offset": offset,
+        "rows": table.to_pylist(),
+    }
@@ -1,37 +1,90 @@
+import base64
 import uuid
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List, Dict, Set
-import uuid
+from typing import List, Optional
 
 from core import crud, models, schemas
+from core.hybrid_search import hybrid_search
+from core.search import search_service
 from api.v1 import dependencies
 from core.database import get_db
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.Contract])
+def encode_search_cursor(rank: float, version_id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(f"{rank!r}|{version_id}".encode()).decode()
+
+def decode_search_cursor(cursor: str) -> tuple[float, uuid.UUID]:
+    try:
+        rank, version_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return float(rank), uuid.UUID(version_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid search cursor.")
+
+@router.get("/", response_model=List[schemas.ContractSearchResult])
 def search_contracts(
+    response: Response,
     query: str = Query(..., min_length=3),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page."),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(dependencies.get_active_subscriber),
 ):
     """
-    Performs a full-text search across the user's organization's contracts.
-    Returns contracts with a highlighted snippet of the matching text.
+    Performs a ranked full-text search across the latest version of the user's
+    organization's contracts, returning a highlighted snippet for each match.
+    When more results are available, the `X-Next-Cursor` response header holds
+    the cursor for the next page.
     """
-    # This is a mock implementation. In a real application, this would integrate
-    # with a dedicated search service (e.g., Elasticsearch, PostgreSQL FTS).
+    after = decode_search_cursor(cursor) if cursor else None
+    rows = crud.search_contracts_full_text(
+        db, organization_id=current_user.organization_id, query=query, limit=limit, after=after
+    )
+
+    if len(rows) == limit:
+        _, last_version_id, last_rank, _, _, _ = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_search_cursor(last_rank, last_version_id)
 
-    # Fetch all contracts for the organization that have full text
-    all_contracts_with_text = [
-        c for c in crud.get_contracts_by_organization(db, organization_id=current_user.organization_id)
-        if c.full_text
+    return [
+        schemas.ContractSearchResult(
+            **schemas.Contract.model_validate(contract).model_dump(),
+            version_id=version_id,
+            rank=rank,
+            highlighted_snippet=snippet,
+            snippet_start=snippet_start,
+            snippet_end=snippet_end,
+        )
+        for contract, version_id, rank, snippet, snippet_start, snippet_end in rows
     ]
 
-    found_contracts = []
-    for contract in all_contracts_with_text:
-        highlighted_snippet = crud.highlight_text_in_snippet(contract.full_text, query)
-        if highlighted_snippet: # If a match was found and a snippet generated
-            found_contracts.append(schemas.Contract.model_validate(contract, update={'highlighted_snippet': highlighted_snippet}))
-    return found_contracts
\ No newline at end of file
+@router.get("/hybrid", response_model=schemas.HybridSearchResponse)
+async def hybrid_search_contracts(
+    response: Response,
+    query: str = Query(..., min_length=3),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(dependencies.get_active_subscriber),
+):
+    """
+    Runs full-text and semantic retrieval concurrently and fuses the rankings with
+    reciprocal-rank fusion, returning one result per contract version with a snippet
+    and its character offsets. Per-stage latencies are returned in the body and in a
+    `Server-Timing` header.
+    """
+    outcome = await hybrid_search(db, organization_id=current_user.organization_id, query=query, limit=limit)
+    timings = outcome["timings"]
+    response.headers["Server-Timing"] = (
+        f"lexical;dur={timings['lexical_ms']}, vector;dur={timings['vector_ms']}, "
+        f"fusion;dur={timings['fusion_ms']}, total;dur={timings['total_ms']}"
+    )
+    return outcome
+
+@router.get("/cache-stats")
+def get_search_cache_stats(
+    current_user: models.User = Depends(dependencies.get_current_admin_user),
+):
+    """
+    Returns hit/miss counters for this worker's semantic-search query-embedding and result caches.
+    """
+    return search_service.cache.stats()
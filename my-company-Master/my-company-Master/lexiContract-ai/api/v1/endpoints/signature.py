@@ -59,6 +59,10 @@ def initiate_signature_process(
         envelope_id = envelope_summary.get('envelope_id')
 
         # 6. Update our contract and signer records with DocuSign info
+        core.crud.record_contract_status_event(
+            db, contract=contract, field="signature_status", from_status=contract.signature_status,
+            to_status=models.SignatureStatus.sent, user_id=current_user.id,
+        )
         core.crud.update_contract_signature_status(db, contract=contract, status=models.SignatureStatus.sent, envelope_id=envelope_id)
         core.crud.link_signers_to_docusign_recipients(db, contract_id=contract.id, signers=db_signers)
 
@@ -111,6 +115,10 @@ async def docusign_webhook(
 
         # Update overall contract status if it's completed
         if envelope_status.lower() == 'completed':
+            core.crud.record_contract_status_event(
+                db, contract=contract, field="signature_status", from_status=contract.signature_status,
+                to_status=models.SignatureStatus.completed,
+            )
             core.crud.update_contract_signature_status(db, contract=contract, status=models.SignatureStatus.completed)
 
         # Broadcast the update to any connected clients
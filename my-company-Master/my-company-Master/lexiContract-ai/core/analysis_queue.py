@@ -0,0 +1,223 @@
+import os
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import settings
+
+# Pending jobs examined per claim. Jobs of organizations already at their concurrency
+# cap are skipped, so this bounds how far past them a claim looks.
+CLAIM_SCAN_LIMIT = 50
+# First key of the advisory locks that serialize per-organization cap checks.
+ORG_CAP_LOCK_NAMESPACE = 4127
+
+
+def enqueue_analysis(db: Session, *, organization_id: uuid.UUID, version_id: uuid.UUID, filename: str,
+                     file_contents: Optional[bytes] = None, file_path: Optional[str] = None) -> models.AnalysisJob:
+    """
+    Queues a contract version for analysis by jobs/analysis_worker.py. The upload is
+    passed either as bytes or as the path of a file saved by utils.save_upload, which
+    the job deletes once it is done with it.
+    """
+    db_job = models.AnalysisJob(
+        organization_id=organization_id,
+        contract_version_id=version_id,
+        filename=filename,
+        file_contents=file_contents,
+        file_path=file_path,
+        status=models.AnalysisStatus.pending,
+        max_attempts=settings.ANALYSIS_MAX_ATTEMPTS,
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+
+def job_file_contents(job: models.AnalysisJob) -> bytes:
+    """The job's uploaded file, read from disk if the API saved it there."""
+    if job.file_path:
+        with open(job.file_path, "rb") as f:
+            return f.read()
+    return job.file_contents
+
+
+def _discard_upload(job: models.AnalysisJob):
+    if job.file_path:
+        try:
+            os.unlink(job.file_path)
+        except FileNotFoundError:
+            pass
+    job.file_contents = None
+    job.file_path = None
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff with +/-20% jitter, so failed jobs of one burst don't retry in lockstep."""
+    seconds = min(settings.ANALYSIS_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), settings.ANALYSIS_RETRY_MAX_SECONDS)
+    return timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+
+def _set_version_status(db: Session, version_id: uuid.UUID, status: models.AnalysisStatus):
+    db.execute(
+        update(models.ContractVersion)
+        .where(models.ContractVersion.id == version_id)
+        .values(analysis_status=status)
+    )
+
+
+def release_expired_leases(db: Session) -> int:
+    """
+    Returns jobs whose worker died mid-analysis to the queue, or fails them if they have
+    used up their attempts. Returns the number of jobs released.
+    """
+    now = datetime.now(timezone.utc)
+    expired = (
+        db.query(models.AnalysisJob)
+        .filter(models.AnalysisJob.status == models.AnalysisStatus.in_progress, models.AnalysisJob.locked_until < now)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for job in expired:
+        _finish_attempt(db, job, f"Lease held by {job.locked_by} expired.")
+    db.commit()
+    return len(expired)
+
+
+def claim_next_job(db: Session, worker_id: str) -> Optional[models.AnalysisJob]:
+    """
+    Claims the oldest runnable job whose organization is below
+    ANALYSIS_MAX_CONCURRENT_PER_ORG running jobs and marks it in_progress.
+
+    Candidate rows are locked with FOR UPDATE SKIP LOCKED, so any number of workers on
+    any number of hosts can claim concurrently without blocking each other. The cap check
+    for an organization runs under a transaction-scoped advisory lock; a worker that can't
+    take it immediately moves on to another organization's job.
+    """
+    now = datetime.now(timezone.utc)
+    candidates = (
+        db.query(models.AnalysisJob)
+        .filter(models.AnalysisJob.status == models.AnalysisStatus.pending, models.AnalysisJob.run_after <= now)
+        .order_by(models.AnalysisJob.run_after)
+        .limit(CLAIM_SCAN_LIMIT)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    checked_orgs = set()
+    for job in candidates:
+        if job.organization_id in checked_orgs:
+            continue
+        checked_orgs.add(job.organization_id)
+
+        locked = db.query(func.pg_try_advisory_xact_lock(ORG_CAP_LOCK_NAMESPACE, func.hashtext(str(job.organization_id)))).scalar()
+        if not locked:
+            continue
+        running = (
+            db.query(func.count(models.AnalysisJob.id))
+            .filter(
+                models.AnalysisJob.organization_id == job.organization_id,
+                models.AnalysisJob.status == models.AnalysisStatus.in_progress,
+            )
+            .scalar()
+        )
+        if running >= settings.ANALYSIS_MAX_CONCURRENT_PER_ORG:
+            continue
+
+        job.status = models.AnalysisStatus.in_progress
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.locked_until = now + timedelta(seconds=settings.ANALYSIS_JOB_LEASE_SECONDS)
+        _set_version_status(db, job.contract_version_id, models.AnalysisStatus.in_progress)
+        db.commit()
+        return job
+
+    # Releases the row and advisory locks.
+    db.commit()
+    return None
+
+
+def extend_lease(db: Session, job_id: uuid.UUID, worker_id: str) -> bool:
+    """
+    Pushes the lease of a job this worker is running another ANALYSIS_JOB_LEASE_SECONDS
+    into the future. Returns False if the job is no longer held by `worker_id`.
+    """
+    result = db.execute(
+        update(models.AnalysisJob)
+        .where(
+            models.AnalysisJob.id == job_id,
+            models.AnalysisJob.locked_by == worker_id,
+            models.AnalysisJob.status == models.AnalysisStatus.in_progress,
+        )
+        .values(locked_until=datetime.now(timezone.utc) + timedelta(seconds=settings.ANALYSIS_JOB_LEASE_SECONDS))
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def _still_owned(db: Session, job: models.AnalysisJob, worker_id: str) -> bool:
+    """Re-reads the job under a row lock; False if its lease expired and another worker took it over."""
+    db.refresh(job, with_for_update=True)
+    if job.status == models.AnalysisStatus.in_progress and job.locked_by == worker_id:
+        return True
+    print(f"Analysis job {job.id} is no longer held by {worker_id}; discarding its result.")
+    db.commit()
+    return False
+
+
+def complete_job(db: Session, job: models.AnalysisJob, worker_id: str):
+    if not _still_owned(db, job, worker_id):
+        return
+    job.status = models.AnalysisStatus.completed
+    job.finished_at = datetime.now(timezone.utc)
+    job.locked_by = job.locked_until = None
+    job.last_error = None
+    _discard_upload(job)
+    _set_version_status(db, job.contract_version_id, models.AnalysisStatus.completed)
+    db.commit()
+
+
+def fail_job(db: Session, job: models.AnalysisJob, worker_id: str, error: str):
+    """Schedules a retry with backoff, or marks the job and its version failed after the last attempt."""
+    if not _still_owned(db, job, worker_id):
+        return
+    _finish_attempt(db, job, error)
+    db.commit()
+
+
+def _finish_attempt(db: Session, job: models.AnalysisJob, error: str):
+    job.last_error = error
+    job.locked_by = job.locked_until = None
+    if job.attempts >= job.max_attempts:
+        job.status = models.AnalysisStatus.failed
+        job.finished_at = datetime.now(timezone.utc)
+        _discard_upload(job)
+        _set_version_status(db, job.contract_version_id, models.AnalysisStatus.failed)
+    else:
+        job.status = models.AnalysisStatus.pending
+        job.run_after = datetime.now(timezone.utc) + retry_delay(job.attempts)
+        _set_version_status(db, job.contract_version_id, models.AnalysisStatus.pending)
+
+
+def queue_stats(db: Session, organization_id: Optional[uuid.UUID] = None) -> Dict:
+    """Job counts by status and the age of the oldest runnable job, optionally for one organization."""
+    query = db.query(models.AnalysisJob.status, func.count(models.AnalysisJob.id), func.min(models.AnalysisJob.run_after))
+    if organization_id is not None:
+        query = query.filter(models.AnalysisJob.organization_id == organization_id)
+    rows = query.group_by(models.AnalysisJob.status).all()
+
+    counts = {status.value: 0 for status in models.AnalysisStatus}
+    oldest_pending = None
+    for status, count, oldest in rows:
+        counts[status.value] = count
+        if status == models.AnalysisStatus.pending:
+            oldest_pending = oldest
+    now = datetime.now(timezone.utc)
+    return {
+        "jobs": counts,
+        "oldest_pending_seconds": max((now - oldest_pending).total_seconds(), 0) if oldest_pending else 0,
+    }
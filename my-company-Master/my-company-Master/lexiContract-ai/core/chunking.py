@@ -0,0 +1,124 @@
+import re
+from typing import Callable, List, NamedTuple, Optional
+
+# Sentence ends (., !, ?, ;) followed by whitespace, blank lines, and the start of a
+# numbered clause or lettered sub-clause on a new line (e.g. "12.3", "(b)").
+BOUNDARY_PATTERN = re.compile(
+    r"(?<=[.!?;])\s+"
+    r"|\n\s*\n"
+    r"|\n(?=\s*(?:\d+(?:\.\d+)*[.)]?\s|\([a-z0-9]{1,3}\)\s|[A-Z][A-Z ]{3,}\n))"
+)
+WORD_PATTERN = re.compile(r"\S+")
+
+
+class Chunk(NamedTuple):
+    """A chunk of contract text and its character offsets in the source document."""
+    text: str
+    start_index: int
+    end_index: int
+    token_count: int
+
+
+def approximate_token_count(text: str) -> int:
+    """Fallback token estimate (~4 characters per word piece) when no tokenizer is available."""
+    return max(1, (len(text.strip()) + 3) // 4)
+
+
+def tokenizer_token_counter(tokenizer) -> Callable[[str], int]:
+    """Builds a token counter backed by a Hugging Face tokenizer."""
+    return lambda text: len(tokenizer.tokenize(text))
+
+
+def _segment_spans(text: str) -> List[tuple]:
+    """Splits text into (start, end) spans at sentence and clause boundaries, trimmed of whitespace."""
+    spans = []
+    position = 0
+    for match in BOUNDARY_PATTERN.finditer(text):
+        spans.append((position, match.start()))
+        position = match.end()
+    spans.append((position, len(text)))
+
+    trimmed = []
+    for start, end in spans:
+        segment = text[start:end]
+        stripped = segment.strip()
+        if not stripped:
+            continue
+        lead = len(segment) - len(segment.lstrip())
+        trimmed.append((start + lead, start + lead + len(stripped)))
+    return trimmed
+
+
+def _split_long_span(text: str, start: int, end: int, max_tokens: int, count_tokens: Callable[[str], int]) -> List[tuple]:
+    """
+    Splits a single oversized sentence at word boundaries into (start, end, tokens)
+    pieces so no piece exceeds max_tokens.
+    Word token counts are summed rather than re-tokenizing the growing piece, which keeps
+    this linear for pages of text with no sentence punctuation.
+    """
+    pieces = []
+    piece_start = piece_end = None
+    piece_tokens = 0
+    for word in WORD_PATTERN.finditer(text, start, end):
+        word_tokens = count_tokens(word.group())
+        if piece_start is not None and piece_tokens + word_tokens > max_tokens:
+            pieces.append((piece_start, piece_end, piece_tokens))
+            piece_start = None
+        if piece_start is None:
+            piece_start, piece_tokens = word.start(), 0
+        piece_end = word.end()
+        piece_tokens += word_tokens
+    if piece_start is not None:
+        pieces.append((piece_start, piece_end, piece_tokens))
+    return pieces
+
+
+def chunk_text(
+    text: str,
+    chunk_size: int = 200,
+    overlap: int = 40,
+    count_tokens: Optional[Callable[[str], int]] = None,
+) -> List[Chunk]:
+    """
+    Splits text into chunks of at most `chunk_size` model tokens, breaking only at
+    sentence or clause boundaries where possible. Consecutive chunks share roughly
+    `overlap` tokens of trailing sentences so clauses that straddle a boundary are
+    still retrievable. Short headings are packed together with the text that follows.
+    """
+    if not text or not text.strip():
+        return []
+    count_tokens = count_tokens or approximate_token_count
+    overlap = min(overlap, chunk_size // 2)
+
+    segments = []
+    for start, end in _segment_spans(text):
+        tokens = count_tokens(text[start:end])
+        if tokens > chunk_size:
+            segments.extend(_split_long_span(text, start, end, chunk_size, count_tokens))
+        else:
+            segments.append((start, end, tokens))
+
+    chunks = []
+    first = 0
+    while first < len(segments):
+        last = first
+        total = segments[first][2]
+        while last + 1 < len(segments) and total + segments[last + 1][2] <= chunk_size:
+            last += 1
+            total += segments[last][2]
+
+        start, end = segments[first][0], segments[last][1]
+        chunks.append(Chunk(text=text[start:end], start_index=start, end_index=end, token_count=total))
+        if last + 1 >= len(segments):
+            break
+
+        # Step back over trailing segments to carry `overlap` tokens into the next chunk,
+        # always advancing at least one segment so the window makes progress.
+        next_first = last + 1
+        carried = 0
+        while next_first - 1 > first and carried + segments[next_first - 1][2] <= overlap:
+            next_first -= 1
+            carried += segments[next_first][2]
+        first = next_first
+
+    return chunks
@@ -35,9 +35,98 @@ class Settings:
         ).split(',')
     ]
 
+    # Redis, shared by the API rate limiter and the search caches. "memory://" keeps both in-process.
+    REDIS_URL: str = os.getenv("REDIS_URL", "memory://")
+
+    # Processes used to extract text from large PDFs. 0 means one per CPU.
+    PDF_EXTRACTION_WORKERS: int = int(os.getenv("PDF_EXTRACTION_WORKERS", 0))
+
+    # Contract analysis queue (jobs/analysis_worker.py). 0 workers means one per CPU.
+    ANALYSIS_WORKERS: int = int(os.getenv("ANALYSIS_WORKERS", 0))
+    ANALYSIS_MAX_CONCURRENT_PER_ORG: int = int(os.getenv("ANALYSIS_MAX_CONCURRENT_PER_ORG", 2))
+    ANALYSIS_MAX_ATTEMPTS: int = int(os.getenv("ANALYSIS_MAX_ATTEMPTS", 5))
+    # Retries wait ANALYSIS_RETRY_BASE_SECONDS * 2^(attempt - 1), capped at ANALYSIS_RETRY_MAX_SECONDS.
+    ANALYSIS_RETRY_BASE_SECONDS: int = int(os.getenv("ANALYSIS_RETRY_BASE_SECONDS", 30))
+    ANALYSIS_RETRY_MAX_SECONDS: int = int(os.getenv("ANALYSIS_RETRY_MAX_SECONDS", 3600))
+    # A claimed job whose worker dies is picked up again once its lease expires.
+    ANALYSIS_JOB_LEASE_SECONDS: int = int(os.getenv("ANALYSIS_JOB_LEASE_SECONDS", 1800))
+    # Uploaded files waiting for analysis. Must be shared by the API and the analysis workers.
+    ANALYSIS_UPLOAD_DIR: str = os.getenv("ANALYSIS_UPLOAD_DIR", "./data/analysis_uploads")
+
+    # Autonomous redlining applies only suggestions scoring at least this confidence.
+    REDLINE_MIN_CONFIDENCE: float = float(os.getenv("REDLINE_MIN_CONFIDENCE", 0.85))
+    # Parallel workers used by jobs/batch_redline.py.
+    REDLINE_BATCH_WORKERS: int = int(os.getenv("REDLINE_BATCH_WORKERS", 4))
+
+    # Negotiation timeline predictions, cached per (contract, latest version).
+    PREDICTION_CACHE_SIZE: int = int(os.getenv("PREDICTION_CACHE_SIZE", 10000))
+    PREDICTION_CACHE_TTL: int = int(os.getenv("PREDICTION_CACHE_TTL", 3600))
+    # Versioned timeline models (see core/model_registry.py and jobs/manage_models.py). Workers
+    # re-check the registry's routing.json this often, or immediately after SIGUSR1.
+    MODEL_REGISTRY_PATH: str = os.getenv("MODEL_REGISTRY_PATH", "./data/models")
+    MODEL_REGISTRY_POLL_SECONDS: int = int(os.getenv("MODEL_REGISTRY_POLL_SECONDS", 30))
+    # Clause success rates are only predicted from at least this many accepted/rejected outcomes.
+    CLAUSE_PREDICTION_MIN_SAMPLES: int = int(os.getenv("CLAUSE_PREDICTION_MIN_SAMPLES", 6))
+
+    # Custom reports. Streamed (NDJSON/CSV) reports stop after REPORT_MAX_ROWS rows or
+    # REPORT_MAX_SECONDS; JSON reports are returned in keyset-paginated pages.
+    REPORT_MAX_ROWS: int = int(os.getenv("REPORT_MAX_ROWS", 1000000))
+    REPORT_MAX_SECONDS: int = int(os.getenv("REPORT_MAX_SECONDS", 120))
+    REPORT_PAGE_SIZE: int = int(os.getenv("REPORT_PAGE_SIZE", 1000))
+    REPORT_MAX_PAGE_SIZE: int = int(os.getenv("REPORT_MAX_PAGE_SIZE", 10000))
+    REPORT_STREAM_BATCH_SIZE: int = int(os.getenv("REPORT_STREAM_BATCH_SIZE", 2000))
+    # JSON report pages are cached per (organization, definition) until a table they read
+    # is written or REPORT_CACHE_TTL passes, then served stale for up to
+    # REPORT_CACHE_STALE_SECONDS more while they are refreshed in the background.
+    REPORT_CACHE_SIZE: int = int(os.getenv("REPORT_CACHE_SIZE", 1000))
+    REPORT_CACHE_TTL: int = int(os.getenv("REPORT_CACHE_TTL", 300))
+    REPORT_CACHE_STALE_SECONDS: int = int(os.getenv("REPORT_CACHE_STALE_SECONDS", 600))
+    REPORT_CACHE_REFRESH_WORKERS: int = int(os.getenv("REPORT_CACHE_REFRESH_WORKERS", 2))
+    # Reports whose EXPLAIN cost estimate is over REPORT_MAX_PLAN_COST are limited to the last
+    # REPORT_DEFAULT_DATE_RANGE_DAYS days, or rejected if they have no date field or are still over.
+    REPORT_MAX_PLAN_COST: float = float(os.getenv("REPORT_MAX_PLAN_COST", 500000))
+    REPORT_DEFAULT_DATE_RANGE_DAYS: int = int(os.getenv("REPORT_DEFAULT_DATE_RANGE_DAYS", 90))
+    # Scheduled report snapshots (Parquet files, see core/report_snapshots.py) run in a pool of
+    # REPORT_SNAPSHOT_WORKERS threads, spread over the REPORT_SNAPSHOT_WINDOW_HOURS hours from
+    # REPORT_SNAPSHOT_WINDOW_START_HOUR (UTC). The newest REPORT_SNAPSHOT_RETENTION are kept.
+    REPORT_SNAPSHOT_PATH: str = os.getenv("REPORT_SNAPSHOT_PATH", "./data/report_snapshots")
+    REPORT_SNAPSHOT_WORKERS: int = int(os.getenv("REPORT_SNAPSHOT_WORKERS", 2))
+    REPORT_SNAPSHOT_WINDOW_START_HOUR: int = int(os.getenv("REPORT_SNAPSHOT_WINDOW_START_HOUR", 1))
+    REPORT_SNAPSHOT_WINDOW_HOURS: int = int(os.getenv("REPORT_SNAPSHOT_WINDOW_HOURS", 4))
+    REPORT_SNAPSHOT_MAX_SECONDS: int = int(os.getenv("REPORT_SNAPSHOT_MAX_SECONDS", 1800))
+    REPORT_SNAPSHOT_RETENTION: int = int(os.getenv("REPORT_SNAPSHOT_RETENTION", 3))
+
     # AI Service
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "your_openai_api_key_here")
 
+    # Semantic Search
+    CHROMA_HOST: str = os.getenv("CHROMA_HOST", "chroma")
+    CHROMA_PORT: int = int(os.getenv("CHROMA_PORT", 8000))
+    EMBEDDING_MODEL_NAME: str = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+    # Optional shared embedding server, e.g. "/tmp/lexi-embeddings.sock" or "127.0.0.1:6000".
+    # When unset, each process loads the embedding model itself on first use.
+    EMBEDDING_SERVER_ADDRESS: str = os.getenv("EMBEDDING_SERVER_ADDRESS", "")
+    # SECRET. The server unpickles what authenticated clients send, so anyone holding this key
+    # can run code on it. It refuses to start without one; generate it with
+    # `python -c "import secrets; print(secrets.token_urlsafe(32))"`.
+    EMBEDDING_SERVER_AUTHKEY: str = os.getenv("EMBEDDING_SERVER_AUTHKEY", "")
+    # "organization" gives every organization its own Chroma collection; "shared" keeps the
+    # single filtered `contracts` collection. Re-home existing vectors with jobs/migrate_vector_partitions.py.
+    CHROMA_PARTITIONING: str = os.getenv("CHROMA_PARTITIONING", "organization")
+    # Query-embedding cache (keyed by normalized query text) and per-organization result cache.
+    SEARCH_EMBEDDING_CACHE_SIZE: int = int(os.getenv("SEARCH_EMBEDDING_CACHE_SIZE", 2048))
+    SEARCH_EMBEDDING_CACHE_TTL: int = int(os.getenv("SEARCH_EMBEDDING_CACHE_TTL", 3600))
+    SEARCH_RESULT_CACHE_SIZE: int = int(os.getenv("SEARCH_RESULT_CACHE_SIZE", 2048))
+    SEARCH_RESULT_CACHE_TTL: int = int(os.getenv("SEARCH_RESULT_CACHE_TTL", 60))
+    # "latest" keeps only each contract's newest indexed version in the vector index; "all" keeps every version.
+    VECTOR_INDEX_MODE: str = os.getenv("VECTOR_INDEX_MODE", "latest")
+    # "chroma", "local" (embedded on-disk index, no network service), or "auto" (Chroma, falling back to
+    # local while it is unreachable; writes made meanwhile are replayed into Chroma on reconnect).
+    VECTOR_STORE_BACKEND: str = os.getenv("VECTOR_STORE_BACKEND", "auto")
+    VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "./data/vector_store")
+    # Local partitions with at least this many vectors switch from brute force to HNSW (requires hnswlib).
+    VECTOR_STORE_HNSW_THRESHOLD: int = int(os.getenv("VECTOR_STORE_HNSW_THRESHOLD", 50000))
+
     # Fernet Encryption Key for credentials
     ENCRYPTION_KEY: str = os.getenv("ENCRYPTION_KEY", "a_very_secret_32_byte_key_placeholder") # Must be 32 url-safe base64-encoded bytes
 
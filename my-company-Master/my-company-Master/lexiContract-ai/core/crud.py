@@ -3,11 +3,13 @@ import uuid
 import difflib
 import secrets
 import hashlib
-from sqlalchemy.orm import Session, joinedload, Query
+from sqlalchemy.orm import Session, joinedload, Query, aliased
 from typing import List, Optional, Dict, Any, Type
 import json
-from sqlalchemy import func, extract
+from sqlalchemy import func, extract, exists, tuple_, select, Float, insert, cast, Date, String, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 import re
+import enum
 from . import models, schemas, security
 from .security import get_password_hash, hash_api_key
 
@@ -97,60 +99,260 @@ def get_contracts_by_organization(
         .all()
     )
 
-# --- Aggregation functions for Advanced Analytics Dashboard ---
+# --- Full-Text Search ---
+
+SEARCH_HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=35, MinWords=15"
 
-def get_analytics_kpis(db: Session, *, organization_id: UUID) -> schemas.AnalyticsKPIs:
+def search_contracts_full_text(
+    db: Session,
+    *,
+    organization_id: uuid.UUID,
+    query: str,
+    limit: int = 20,
+    after: Optional[tuple[float, uuid.UUID]] = None,
+) -> list:
     """
-    Aggregates Key Performance Indicators (KPIs) for the analytics dashboard.
+    Ranks the latest version of each of the organization's contracts against a
+    web-style search query using the GIN-indexed search_vector column.
+    Pages are keyset-paginated on (rank, version_id); pass the last row's pair as `after`.
+    Returns rows of (Contract, version_id, rank, snippet, snippet_start, snippet_end).
     """
-    total_contracts = db.query(func.count(models.Contract.id)).filter(models.Contract.organization_id == organization_id).scalar() or 0
-    
-    # Note: 'negotiation_status' comes from the Contract Negotiation Workflow feature.
-    contracts_in_progress = (
-        db.query(func.count(models.Contract.id))
+    ts_query = func.websearch_to_tsquery('english', query)
+    rank = func.ts_rank_cd(models.ContractVersion.search_vector, ts_query).cast(Float)
+    newer_version = aliased(models.ContractVersion)
+    has_newer_version = (
+        exists()
+        .where(
+            newer_version.contract_id == models.ContractVersion.contract_id,
+            newer_version.version_number > models.ContractVersion.version_number,
+        )
+    )
+
+    page_query = (
+        db.query(
+            models.ContractVersion.id.label("version_id"),
+            models.ContractVersion.contract_id.label("contract_id"),
+            rank.label("rank"),
+        )
+        .join(models.Contract, models.Contract.id == models.ContractVersion.contract_id)
         .filter(
             models.Contract.organization_id == organization_id,
-            models.Contract.negotiation_status.in_(['Drafting', 'Internal Review', 'External Review'])
+            models.ContractVersion.search_vector.op('@@')(ts_query),
+            ~has_newer_version,
+        )
+    )
+    if after is not None:
+        page_query = page_query.filter(tuple_(rank, models.ContractVersion.id) < tuple_(after[0], after[1]))
+    page = page_query.order_by(rank.desc(), models.ContractVersion.id.desc()).limit(limit).subquery()
+
+    # Snippets are generated only for the rows on this page, not for every match. The CTE is
+    # materialized so ts_headline runs once per row even though the snippet is used twice.
+    headlines = (
+        select(
+            page.c.version_id,
+            page.c.contract_id,
+            page.c.rank,
+            func.ts_headline('english', models.ContractVersion.full_text, ts_query, SEARCH_HEADLINE_OPTIONS).label("snippet"),
+        )
+        .join_from(page, models.ContractVersion, models.ContractVersion.id == page.c.version_id)
+        .cte("search_headlines")
+        .prefix_with("MATERIALIZED")
+    )
+    first_fragment = func.regexp_replace(func.split_part(headlines.c.snippet, ' ... ', 1), '</?mark>', '', 'g')
+
+    rows = (
+        db.query(
+            models.Contract,
+            headlines.c.version_id,
+            headlines.c.rank,
+            headlines.c.snippet,
+            first_fragment.label("fragment"),
+            func.strpos(models.ContractVersion.full_text, first_fragment).label("position"),
+        )
+        .join(headlines, headlines.c.contract_id == models.Contract.id)
+        .join(models.ContractVersion, models.ContractVersion.id == headlines.c.version_id)
+        .order_by(headlines.c.rank.desc(), headlines.c.version_id.desc())
+        .all()
+    )
+    # Map the first snippet fragment back to character offsets in the version's full_text.
+    results = []
+    for contract, version_id, rank, snippet, fragment, position in rows:
+        start = position - 1 if position else None
+        end = start + len(fragment) if start is not None else None
+        results.append((contract, version_id, rank, snippet, start, end))
+    return results
+
+# --- Aggregation functions for Advanced Analytics Dashboard ---
+
+# Contracts counted as "in progress" on the dashboard.
+IN_PROGRESS_NEGOTIATION_STATUSES = (
+    models.NegotiationStatus.DRAFTING,
+    models.NegotiationStatus.INTERNAL_REVIEW,
+    models.NegotiationStatus.EXTERNAL_REVIEW,
+)
+
+def get_analytics_kpis(db: Session, *, organization_id: uuid.UUID) -> schemas.AnalyticsKPIs:
+    """
+    Aggregates Key Performance Indicators (KPIs) for the analytics dashboard from the
+    analytics_contract_daily rollup.
+    """
+    daily = models.AnalyticsContractDaily
+    total_contracts, contracts_in_progress = (
+        db.query(
+            func.coalesce(func.sum(daily.contract_count), 0),
+            # Note: 'negotiation_status' comes from the Contract Negotiation Workflow feature.
+            func.coalesce(func.sum(daily.contract_count).filter(daily.negotiation_status.in_([s.name for s in IN_PROGRESS_NEGOTIATION_STATUSES])), 0),
         )
-        .scalar() or 0
+        .filter(daily.organization_id == organization_id)
+        .one()
     )
 
-    # Placeholder for cycle time. A real implementation would calculate the
-    # average time between contract creation and 'Signed' status.
-    average_cycle_time_days = 8.5
+    # Cycle-time percentiles are precomputed by jobs/cycle_time_aggregator.py.
+    cycle_time = db.get(models.ContractCycleTimeStats, organization_id)
 
     return schemas.AnalyticsKPIs(
         total_contracts=total_contracts,
         contracts_in_progress=contracts_in_progress,
-        average_cycle_time_days=average_cycle_time_days,
+        average_cycle_time_days=_round_days(cycle_time.mean_days) if cycle_time else None,
+        cycle_time_p50_days=_round_days(cycle_time.p50_days) if cycle_time else None,
+        cycle_time_p90_days=_round_days(cycle_time.p90_days) if cycle_time else None,
     )
 
-def get_risk_category_distribution(db: Session, *, organization_id: UUID) -> list[schemas.RiskDistribution]:
+def _round_days(days: Optional[float]) -> Optional[float]:
+    return round(days, 1) if days is not None else None
+
+def get_risk_category_distribution(db: Session, *, organization_id: uuid.UUID) -> list[schemas.RiskDistribution]:
     """
-    Gets the count of analysis suggestions grouped by risk category.
+    Gets the count of analysis suggestions grouped by risk category, from the
+    analytics_risk_category_counts rollup.
     """
-    # This assumes AnalysisSuggestion has a 'risk_category' field.
+    counts = models.AnalyticsRiskCategoryCount
     results = (
-        db.query(models.AnalysisSuggestion.risk_category, func.count(models.AnalysisSuggestion.id).label("count"))
-        .join(models.ContractVersion, models.ContractVersion.id == models.AnalysisSuggestion.contract_version_id)
-        .join(models.Contract, models.Contract.id == models.ContractVersion.contract_id)
-        .filter(models.Contract.organization_id == organization_id, models.AnalysisSuggestion.risk_category.isnot(None))
-        .group_by(models.AnalysisSuggestion.risk_category)
-        .order_by(func.count(models.AnalysisSuggestion.id).desc())
+        db.query(counts.risk_category, counts.suggestion_count)
+        .filter(counts.organization_id == organization_id, counts.suggestion_count > 0)
+        .order_by(counts.suggestion_count.desc())
         .all()
     )
-    return [schemas.RiskDistribution(category=row.risk_category, count=row.count) for row in results]
+    return [schemas.RiskDistribution(category=row.risk_category, count=row.suggestion_count) for row in results]
 
-def get_contract_volume_over_time(db: Session, *, organization_id: UUID) -> list[schemas.VolumeOverTime]:
+def get_contract_volume_over_time(db: Session, *, organization_id: uuid.UUID) -> list[schemas.VolumeOverTime]:
     """
-    Gets the number of contracts created per month.
+    Gets the number of contracts created per month, from the analytics_contract_daily rollup.
     """
+    daily = models.AnalyticsContractDaily
     results = db.query(
-        func.to_char(models.Contract.created_at, 'YYYY-MM').label('month'),
-        func.count(models.Contract.id).label('count')
-    ).filter(models.Contract.organization_id == organization_id).group_by('month').order_by('month').all()
+        func.to_char(daily.day, 'YYYY-MM').label('month'),
+        func.sum(daily.contract_count).label('count')
+    ).filter(daily.organization_id == organization_id).group_by('month').having(func.sum(daily.contract_count) > 0).order_by('month').all()
     return [schemas.VolumeOverTime(month=row.month, count=row.count) for row in results]
 
+def _contract_daily_source():
+    """Contract counts per (organization, UTC day, status), computed from the contracts table."""
+    contract = models.Contract
+    day = cast(func.timezone('UTC', contract.created_at), Date)
+    status = cast(contract.negotiation_status, String)
+    return (
+        select(contract.organization_id, day, status, func.count())
+        .group_by(contract.organization_id, day, status)
+    )
+
+def _risk_category_source():
+    """Suggestion counts per (organization, risk category), computed from analysis_suggestions."""
+    return (
+        select(models.Contract.organization_id, models.AnalysisSuggestion.risk_category, func.count())
+        .select_from(models.AnalysisSuggestion)
+        .join(models.ContractVersion, models.ContractVersion.id == models.AnalysisSuggestion.contract_version_id)
+        .join(models.Contract, models.Contract.id == models.ContractVersion.contract_id)
+        .group_by(models.Contract.organization_id, models.AnalysisSuggestion.risk_category)
+    )
+
+def get_analytics_rollup_drift(db: Session, organization_ids: Optional[List[uuid.UUID]] = None) -> Dict[uuid.UUID, list]:
+    """
+    Compares the dashboard rollups with counts recomputed from contracts and
+    analysis_suggestions. Returns {organization_id: [(rollup, key, expected, actual), ...]}
+    for every organization whose rollups disagree with the source tables.
+    """
+    daily = models.AnalyticsContractDaily
+    risk = models.AnalyticsRiskCategoryCount
+    checks = [
+        ("analytics_contract_daily", _contract_daily_source(), select(daily.organization_id, daily.day, daily.negotiation_status, daily.contract_count), daily.organization_id),
+        ("analytics_risk_category_counts", _risk_category_source(), select(risk.organization_id, risk.risk_category, risk.suggestion_count), risk.organization_id),
+    ]
+    drift: Dict[uuid.UUID, list] = {}
+    for rollup, source_query, rollup_query, rollup_org in checks:
+        if organization_ids is not None:
+            source_query = source_query.where(models.Contract.organization_id.in_(organization_ids))
+            rollup_query = rollup_query.where(rollup_org.in_(organization_ids))
+        expected = {tuple(row[:-1]): row[-1] for row in db.execute(source_query)}
+        actual = {tuple(row[:-1]): row[-1] for row in db.execute(rollup_query) if row[-1] != 0}
+        for key in expected.keys() | actual.keys():
+            if expected.get(key, 0) != actual.get(key, 0):
+                drift.setdefault(key[0], []).append((rollup, key[1:], expected.get(key, 0), actual.get(key, 0)))
+    return drift
+
+def refresh_analytics_rollups(db: Session, organization_ids: Optional[List[uuid.UUID]] = None):
+    """
+    Rebuilds the dashboard rollups of the given organizations (all if None) from the source
+    tables. The rollups are locked for the rebuild, so concurrent writes wait for it and
+    their trigger updates apply on top of the rebuilt counts.
+    """
+    daily = models.AnalyticsContractDaily
+    risk = models.AnalyticsRiskCategoryCount
+    db.execute(text("LOCK TABLE analytics_contract_daily, analytics_risk_category_counts IN EXCLUSIVE MODE"))
+    rebuilds = [
+        (daily, _contract_daily_source(), ["organization_id", "day", "negotiation_status", "contract_count"]),
+        (risk, _risk_category_source(), ["organization_id", "risk_category", "suggestion_count"]),
+    ]
+    for model, source_query, columns in rebuilds:
+        delete_query = db.query(model)
+        if organization_ids is not None:
+            delete_query = delete_query.filter(model.organization_id.in_(organization_ids))
+            source_query = source_query.where(models.Contract.organization_id.in_(organization_ids))
+        delete_query.delete(synchronize_session=False)
+        db.execute(insert(model).from_select(columns, source_query))
+    db.commit()
+
+def _status_value(status) -> Optional[str]:
+    return status.value if isinstance(status, enum.Enum) else status
+
+def record_contract_status_event(
+    db: Session,
+    *,
+    contract: models.Contract,
+    field: str,
+    from_status,
+    to_status,
+    user_id: Optional[uuid.UUID] = None,
+) -> Optional[models.ContractStatusEvent]:
+    """
+    Appends a negotiation_status or signature_status change to contract_status_events.
+    Repeated notifications of the same status (e.g. webhook retries) are not logged.
+    Does not commit, so the event is written in the same transaction as the change.
+    """
+    from_status, to_status = _status_value(from_status), _status_value(to_status)
+    if from_status == to_status:
+        return None
+    event = models.ContractStatusEvent(
+        contract_id=contract.id,
+        organization_id=contract.organization_id,
+        field=field,
+        from_status=from_status,
+        to_status=to_status,
+        changed_by_id=user_id,
+    )
+    db.add(event)
+    return event
+
+def update_contract_negotiation_status(db: Session, *, contract: models.Contract, status, user_id: Optional[uuid.UUID] = None) -> models.Contract:
+    """Sets a contract's negotiation status and logs the change in one transaction."""
+    record_contract_status_event(
+        db, contract=contract, field="negotiation_status", from_status=contract.negotiation_status, to_status=status, user_id=user_id
+    )
+    contract.negotiation_status = status
+    db.commit()
+    db.refresh(contract)
+    return contract
+
 def get_contract_by_id(db: Session, contract_id: uuid.UUID, organization_id: uuid.UUID):
     # Eagerly load all versions and their nested suggestions and comments for the detail view
     return (
@@ -229,6 +431,28 @@ def delete_custom_report(db: Session, db_report: models.CustomReport):
     db.commit()
     return db_report
 
+def update_custom_report_schedule(db: Session, db_report: models.CustomReport, schedule: Optional[str]) -> models.CustomReport:
+    db_report.snapshot_schedule = schedule
+    db.add(db_report)
+    db.commit()
+    db.refresh(db_report)
+    return db_report
+
+def get_scheduled_custom_reports(db: Session) -> List[models.CustomReport]:
+    return db.query(models.CustomReport).filter(models.CustomReport.snapshot_schedule.isnot(None)).all()
+
+def get_report_snapshots(db: Session, report_id: uuid.UUID) -> List[models.ReportSnapshot]:
+    return db.query(models.ReportSnapshot).filter(
+        models.ReportSnapshot.report_id == report_id
+    ).order_by(models.ReportSnapshot.created_at.desc()).all()
+
+def get_report_snapshot(db: Session, report_id: uuid.UUID, snapshot_id: Optional[uuid.UUID] = None) -> Optional[models.ReportSnapshot]:
+    """The given snapshot of a report, or its newest one."""
+    query = db.query(models.ReportSnapshot).filter(models.ReportSnapshot.report_id == report_id)
+    if snapshot_id is not None:
+        query = query.filter(models.ReportSnapshot.id == snapshot_id)
+    return query.order_by(models.ReportSnapshot.created_at.desc()).first()
+
 # --- Team Management CRUD ---
 
 def create_team(db: Session, team: schemas.TeamCreate, organization_id: UUID) -> models.Team:
@@ -364,6 +588,65 @@ def update_contract_version_status(db: Session, version_id: uuid.UUID, status: m
         db.refresh(db_version)
     return db_version
 
+def bulk_insert_suggestions(db: Session, version_id: uuid.UUID, rows: List[Dict[str, Any]]) -> List[uuid.UUID]:
+    """
+    Inserts suggestion rows (dicts of AnalysisSuggestion columns) for a version as a single
+    executemany of a Core INSERT, which the Postgres dialect sends as batched multi-row
+    VALUES statements, bypassing per-object unit-of-work bookkeeping. IDs are generated
+    here, so no RETURNING round trip is needed. Returns the new IDs in input order.
+    Does not commit.
+    """
+    if not rows:
+        return []
+    defaults = {"suggested_text": None, "status": models.SuggestionStatus.suggested, "confidence_score": None, "is_autonomous": False}
+    params = [{**defaults, **row, "id": uuid.uuid4(), "contract_version_id": version_id} for row in rows]
+    db.execute(insert(models.AnalysisSuggestion.__table__), params)
+    return [row["id"] for row in params]
+
+def replace_version_suggestions(db: Session, version_id: uuid.UUID, rows: List[Dict[str, Any]]) -> List[uuid.UUID]:
+    """
+    Replaces all suggestions of a version with `rows` in bulk, so re-running an analysis
+    is idempotent. Returns the new IDs. Does not commit.
+    """
+    db.query(models.AnalysisSuggestion).filter(models.AnalysisSuggestion.contract_version_id == version_id).delete(synchronize_session=False)
+    return bulk_insert_suggestions(db, version_id=version_id, rows=rows)
+
+def get_base_contract_version(db: Session, version: models.ContractVersion) -> Optional[models.ContractVersion]:
+    """Returns the version `version` was derived from: its parent if set, otherwise the previous version number."""
+    if version.parent_version_id:
+        return get_contract_version_by_id(db, version_id=version.parent_version_id)
+    return db.query(models.ContractVersion).filter(
+        models.ContractVersion.contract_id == version.contract_id,
+        models.ContractVersion.version_number < version.version_number
+    ).order_by(models.ContractVersion.version_number.desc()).first()
+
+def apply_incremental_analysis(db: Session, version_id: uuid.UUID, carried: list[tuple[models.AnalysisSuggestion, int, int]], suggestions: List[schemas.AnalysisSuggestionCreate]):
+    """
+    Stores the result of an incremental analysis: `carried` holds suggestions of the base
+    version with their (start, end) in this version, `suggestions` the new findings from
+    the changed regions. Any earlier suggestions of this version are replaced.
+    """
+    rows = [
+        {
+            "start_index": start_index,
+            "end_index": end_index,
+            "original_text": original.original_text,
+            "suggested_text": original.suggested_text,
+            "comment": original.comment,
+            "risk_category": original.risk_category,
+            "status": original.status,
+            "confidence_score": original.confidence_score,
+            "is_autonomous": original.is_autonomous,
+        }
+        for original, start_index, end_index in carried
+    ]
+    rows.extend(suggestion_in.model_dump() for suggestion_in in suggestions)
+    replace_version_suggestions(db, version_id=version_id, rows=rows)
+    db.query(models.ContractVersion).filter(models.ContractVersion.id == version_id).update(
+        {models.ContractVersion.analysis_status: models.AnalysisStatus.completed}, synchronize_session=False
+    )
+    db.commit()
+
 def update_contract_version_analysis(db: Session, version_id: uuid.UUID, full_text: str, suggestions: List[schemas.AnalysisSuggestionCreate]) -> models.ContractVersion:
     """
     Updates a contract version with the full text and a new set of analysis suggestions.
@@ -373,6 +656,16 @@ def update_contract_version_analysis(db: Session, version_id: uuid.UUID, full_te
     if not db_version:
         return None
 
+    # Update contract text and status
+    db_version.full_text = full_text
+    db_version.analysis_status = models.AnalysisStatus.completed
+
+    replace_version_suggestions(db, version_id=version_id, rows=[suggestion_in.model_dump() for suggestion_in in suggestions])
+
+    db.commit()
+    db.refresh(db_version)
+    return db_version
+
 # --- Developer Portal & Marketplace CRUD ---
 
 def generate_client_credentials():
@@ -468,29 +761,12 @@ def update_sandbox_environment(db: Session, sandbox_id: UUID, status: models.San
     db.refresh(db_sandbox)
     return db_sandbox
 
-    # Update contract text and status
-    db_version.full_text = full_text
-    db_version.analysis_status = models.AnalysisStatus.completed
-
-    # Delete existing suggestions for this version
-    db.query(models.AnalysisSuggestion).filter(models.AnalysisSuggestion.contract_version_id == version_id).delete(synchronize_session=False)
-
-    # Create new suggestions
-    for suggestion_in in suggestions:
-        db_suggestion = models.AnalysisSuggestion(
-            **suggestion_in.model_dump(),
-            contract_version_id=version_id
-        )
-        db.add(db_suggestion)
-
-    db.commit()
-    db.refresh(db_version)
-    return db_version
-
-def create_new_contract_version_with_parent(db: Session, original_version: models.ContractVersion, new_text: str) -> models.ContractVersion:
+def create_new_contract_version_with_parent(db: Session, original_version: models.ContractVersion, new_text: str, commit: bool = True) -> models.ContractVersion:
     """
     Creates a new, AI-generated contract version that is a child of an existing version.
     It determines the next version number based on the highest existing for the contract.
+    With commit=False the version is only flushed, so the caller can commit it together
+    with its suggestions.
     """
     highest_version = db.query(func.max(models.ContractVersion.version_number)).filter(
         models.ContractVersion.contract_id == original_version.contract_id
@@ -506,29 +782,48 @@ def create_new_contract_version_with_parent(db: Session, original_version: model
         version_status=models.VersionStatus.pending_approval
     )
     db.add(new_version)
+    if not commit:
+        db.flush()
+        return new_version
     db.commit()
     db.refresh(new_version)
     return new_version
 
-def copy_suggestions_to_new_version(db: Session, suggestions_with_scores: list[tuple[models.AnalysisSuggestion, float]], new_version_id: uuid.UUID):
+def copy_suggestions_to_new_version(db: Session, suggestions_with_scores: list[tuple[models.AnalysisSuggestion, float]], new_version_id: uuid.UUID, offset_map=None, commit: bool = True):
     """
     Copies a list of suggestions to a new contract version and marks them as autonomous.
+    `offset_map` (the redline_patch.OffsetMap of applying these suggestions, listed in the
+    order they were applied) re-anchors each one to its replacement text in the new version.
+    Suggestions that made the same edit share its replacement.
     """
-    for original_suggestion, score in suggestions_with_scores:
-        new_suggestion = models.AnalysisSuggestion(
-            contract_version_id=new_version_id,
-            contract_id=original_suggestion.contract_id,
-            start_index=original_suggestion.start_index,
-            end_index=original_suggestion.end_index,
-            original_text=original_suggestion.original_text,
-            suggested_text=original_suggestion.suggested_text,
-            comment=original_suggestion.comment,
-            risk_category=original_suggestion.risk_category,
-            is_autonomous=True, # Mark as an autonomous change
-            confidence_score=score # Store the calculated confidence
-        )
-        db.add(new_suggestion)
-    db.commit()
+    spans = []
+    replacements: dict = {}
+    for original_suggestion, _ in suggestions_with_scores:
+        span = (original_suggestion.start_index, original_suggestion.end_index)
+        if offset_map:
+            # Insertions at one offset share a span; they are told apart by the order they were applied in.
+            texts = replacements.setdefault(span, [])
+            if original_suggestion.suggested_text not in texts:
+                texts.append(original_suggestion.suggested_text)
+            spans.append(offset_map.map_edit(*span, nth=texts.index(original_suggestion.suggested_text)))
+        else:
+            spans.append(span)
+    rows = [
+        {
+            "start_index": start_index,
+            "end_index": end_index,
+            "original_text": original_suggestion.original_text,
+            "suggested_text": original_suggestion.suggested_text,
+            "comment": original_suggestion.comment,
+            "risk_category": original_suggestion.risk_category,
+            "is_autonomous": True, # Mark as an autonomous change
+            "confidence_score": score # Store the calculated confidence
+        }
+        for (original_suggestion, score), (start_index, end_index) in zip(suggestions_with_scores, spans)
+    ]
+    bulk_insert_suggestions(db, version_id=new_version_id, rows=rows)
+    if commit:
+        db.commit()
 
 def get_suggestion_by_id(db: Session, suggestion_id: uuid.UUID) -> Optional[models.AnalysisSuggestion]:
     """
@@ -791,6 +1086,104 @@ def get_clause_acceptance_stats(db: Session, clause_category: str, organization_
     # The outcome is now a raw string, e.g., 'ACCEPTED'
     return {row.outcome: row.total_count for row in results}
 
+def refresh_clause_acceptance_rates(db: Session, organization_ids: Optional[List[uuid.UUID]] = None) -> int:
+    """
+    Recomputes the precomputed clause_acceptance_rates rows of the given organizations
+    (all organizations if None) from negotiation_outcomes, in one transaction.
+    Returns the number of rows written.
+    """
+    outcome = models.NegotiationOutcome
+    delete_query = db.query(models.ClauseAcceptanceRate)
+    totals = (
+        select(
+            outcome.organization_id,
+            outcome.clause_category,
+            func.coalesce(outcome.contract_type, ""),
+            func.coalesce(outcome.counterparty_industry, ""),
+            func.coalesce(func.sum(outcome.count).filter(outcome.outcome == models.NegotiationOutcomeEnum.accepted), 0),
+            func.coalesce(func.sum(outcome.count).filter(outcome.outcome == models.NegotiationOutcomeEnum.rejected), 0),
+            func.now(),
+        )
+        .where(outcome.clause_category != None)
+        .group_by(outcome.organization_id, outcome.clause_category, func.coalesce(outcome.contract_type, ""), func.coalesce(outcome.counterparty_industry, ""))
+    )
+    if organization_ids is not None:
+        delete_query = delete_query.filter(models.ClauseAcceptanceRate.organization_id.in_(organization_ids))
+        totals = totals.where(outcome.organization_id.in_(organization_ids))
+
+    delete_query.delete(synchronize_session=False)
+    result = db.execute(
+        insert(models.ClauseAcceptanceRate).from_select(
+            ["organization_id", "clause_category", "contract_type", "counterparty_industry", "accepted_count", "rejected_count", "updated_at"],
+            totals,
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+def get_clause_acceptance_rates(
+    db: Session,
+    organization_id: uuid.UUID,
+    clause_categories: List[str],
+    contract_type: Optional[str] = None,
+    counterparty_industry: Optional[str] = None,
+) -> Dict[str, tuple]:
+    """
+    Returns {clause_category: (accepted, rejected)} for several categories in one lookup
+    on clause_acceptance_rates, optionally narrowed to a contract type and industry.
+    """
+    rate = models.ClauseAcceptanceRate
+    query = db.query(
+        rate.clause_category,
+        func.sum(rate.accepted_count),
+        func.sum(rate.rejected_count),
+    ).filter(
+        rate.organization_id == organization_id,
+        rate.clause_category.in_(clause_categories)
+    )
+    if contract_type is not None:
+        query = query.filter(rate.contract_type == contract_type)
+    if counterparty_industry is not None:
+        query = query.filter(rate.counterparty_industry == counterparty_industry)
+    return {category: (int(accepted), int(rejected)) for category, accepted, rejected in query.group_by(rate.clause_category).all()}
+
+def get_timeline_features(db: Session, contract_ids: List[uuid.UUID]) -> list:
+    """
+    Returns one row per contract of (contract_id, filename, latest_version_id,
+    suggestion_count) in a single query, counting the suggestions of each contract's
+    latest version. Contracts without versions have a NULL latest_version_id.
+    """
+    newer_version = aliased(models.ContractVersion)
+    latest_version = (
+        select(models.ContractVersion.id, models.ContractVersion.contract_id)
+        .where(
+            models.ContractVersion.contract_id.in_(contract_ids),
+            ~exists().where(
+                newer_version.contract_id == models.ContractVersion.contract_id,
+                newer_version.version_number > models.ContractVersion.version_number,
+            ),
+        )
+        .subquery()
+    )
+    suggestion_counts = (
+        select(models.AnalysisSuggestion.contract_version_id, func.count(models.AnalysisSuggestion.id).label("suggestion_count"))
+        .join(latest_version, latest_version.c.id == models.AnalysisSuggestion.contract_version_id)
+        .group_by(models.AnalysisSuggestion.contract_version_id)
+        .subquery()
+    )
+    return (
+        db.query(
+            models.Contract.id.label("contract_id"),
+            models.Contract.filename,
+            latest_version.c.id.label("latest_version_id"),
+            func.coalesce(suggestion_counts.c.suggestion_count, 0).label("suggestion_count"),
+        )
+        .outerjoin(latest_version, latest_version.c.contract_id == models.Contract.id)
+        .outerjoin(suggestion_counts, suggestion_counts.c.contract_version_id == latest_version.c.id)
+        .filter(models.Contract.id.in_(contract_ids))
+        .all()
+    )
+
 # --- Audit Log CRUD ---
 
 def create_audit_log(db: Session, *, user_id: uuid.UUID, organization_id: uuid.UUID, action: str, details: Optional[dict] = None):
@@ -904,6 +1297,31 @@ def get_playbooks_for_organization(db: Session, organization_id: uuid.UUID) -> L
 
     return list(final_playbooks.values())
 
+def get_playbook_set_version(db: Session, organization_id: uuid.UUID) -> str:
+    """
+    Returns a fingerprint of the rules `get_playbooks_for_organization` would return,
+    computed in a single aggregate query without loading any rows. It changes whenever
+    a rule is added, removed or edited, or a playbook is toggled for the organization.
+    """
+    enabled = select(models.organization_playbook_association.c.playbook_id).where(
+        models.organization_playbook_association.c.organization_id == organization_id
+    )
+    # Every column the scanner's output depends on: name and description go into its comments.
+    rule_key = func.concat(
+        models.PlaybookRule.id, ":", models.PlaybookRule.pattern, ":", models.PlaybookRule.risk_category, ":",
+        models.PlaybookRule.name, ":", func.coalesce(models.PlaybookRule.description, ""),
+    )
+    version = (
+        db.query(func.md5(func.coalesce(func.string_agg(rule_key, aggregate_order_by(",", models.PlaybookRule.id)), "")))
+        .join(models.CompliancePlaybook, models.CompliancePlaybook.id == models.PlaybookRule.playbook_id)
+        .filter(
+            models.CompliancePlaybook.is_active == True,
+            (models.CompliancePlaybook.industry == None) | models.CompliancePlaybook.id.in_(enabled),
+        )
+        .scalar()
+    )
+    return version
+
 def get_available_industry_playbooks(db: Session) -> List[models.CompliancePlaybook]:
     """Retrieves all active, industry-specific playbooks that organizations can opt into."""
     return db.query(models.CompliancePlaybook).filter(models.CompliancePlaybook.is_active == True, models.CompliancePlaybook.industry != None).all()
@@ -0,0 +1,151 @@
+import uuid
+from typing import Dict, List, Optional
+
+from sqlalchemy import exists, func, or_, and_
+from sqlalchemy.orm import Session, aliased
+
+from . import models
+from .quantile_sketch import QuantileSketch
+
+# (field, to_status) transitions that end a contract's cycle. Only a contract's first one counts.
+CYCLE_END_TRANSITIONS = (
+    ("negotiation_status", models.NegotiationStatus.SIGNED.value),
+    ("signature_status", "completed"),
+)
+# Sketch accuracy: percentiles are within 1% of the exact cycle time.
+SKETCH_RELATIVE_ACCURACY = 0.01
+# Advisory lock key that keeps concurrent aggregator runs from double counting.
+AGGREGATOR_LOCK_KEY = 4128
+
+
+def _is_cycle_end(event_model):
+    return or_(*[and_(event_model.field == field, event_model.to_status == status) for field, status in CYCLE_END_TRANSITIONS])
+
+
+def cycle_completions_query(db: Session):
+    """
+    (event id, organization id, cycle time in days) for every event that ends a contract's
+    cycle for the first time. Cycle time runs from the contract's creation.
+    """
+    event = models.ContractStatusEvent
+    earlier = aliased(models.ContractStatusEvent)
+    days = func.extract("epoch", event.created_at - models.Contract.created_at) / 86400.0
+    return (
+        db.query(event.id, event.organization_id, days)
+        .join(models.Contract, models.Contract.id == event.contract_id)
+        .filter(
+            _is_cycle_end(event),
+            ~exists().where(earlier.contract_id == event.contract_id, earlier.id < event.id, _is_cycle_end(earlier)),
+        )
+    )
+
+
+def _pending_cycle_ends_query(db: Session):
+    """
+    (event id, organization id, cycle time in days, counts) for cycle-ending events not yet
+    aggregated. `counts` is false when another cycle end of the contract has a lower id or
+    was already aggregated, so a contract is counted once even if its first cycle end
+    commits after a later one was folded in.
+    """
+    event = models.ContractStatusEvent
+    other = aliased(models.ContractStatusEvent)
+    days = func.extract("epoch", event.created_at - models.Contract.created_at) / 86400.0
+    counts = ~exists().where(
+        other.contract_id == event.contract_id,
+        other.id != event.id,
+        _is_cycle_end(other),
+        or_(other.id < event.id, other.aggregated_at.isnot(None)),
+    )
+    return (
+        db.query(event.id, event.organization_id, days, counts)
+        .join(models.Contract, models.Contract.id == event.contract_id)
+        .filter(_is_cycle_end(event), event.aggregated_at.is_(None))
+    )
+
+
+def _store(stats: models.ContractCycleTimeStats, sketch: QuantileSketch, last_event_id: int):
+    stats.sketch = sketch.to_dict()
+    stats.last_event_id = last_event_id
+    stats.contract_count = sketch.count
+    stats.mean_days = sketch.mean
+    stats.p50_days = sketch.quantile(0.50)
+    stats.p90_days = sketch.quantile(0.90)
+
+
+def aggregate_cycle_times(db: Session, batch_size: int = 5000) -> Dict[str, int]:
+    """
+    Folds cycle completions logged since the last run into each organization's sketch.
+    Each cycle-ending event is stamped `aggregated_at` in the transaction that folds it,
+    so an event whose transaction commits late is picked up by the next run instead of
+    being skipped by an id watermark. Commits after each batch. Returns counts of what
+    was aggregated.
+    """
+    totals = {"events": 0, "organizations": 0}
+    if not db.query(func.pg_try_advisory_xact_lock(AGGREGATOR_LOCK_KEY)).scalar():
+        print("Another cycle-time aggregation is running; skipping.")
+        return totals
+    touched = set()
+    while True:
+        pending = _pending_cycle_ends_query(db).order_by(models.ContractStatusEvent.id).limit(batch_size).all()
+        if not pending:
+            break
+        by_organization: Dict[uuid.UUID, list] = {}
+        for event_id, organization_id, days, counts in pending:
+            if counts:
+                by_organization.setdefault(organization_id, []).append((event_id, float(days)))
+
+        existing = {
+            stats.organization_id: stats
+            for stats in db.query(models.ContractCycleTimeStats)
+            .filter(models.ContractCycleTimeStats.organization_id.in_(list(by_organization)))
+            .with_for_update()
+        }
+        for organization_id, events in by_organization.items():
+            stats = existing.get(organization_id)
+            if stats is None:
+                stats = models.ContractCycleTimeStats(organization_id=organization_id, last_event_id=0)
+                db.add(stats)
+            sketch = QuantileSketch.from_dict(stats.sketch, SKETCH_RELATIVE_ACCURACY)
+            for _, days in events:
+                sketch.add(days)
+            _store(stats, sketch, max([stats.last_event_id or 0] + [event_id for event_id, _ in events]))
+        db.query(models.ContractStatusEvent).filter(
+            models.ContractStatusEvent.id.in_([event_id for event_id, _, _, _ in pending])
+        ).update({models.ContractStatusEvent.aggregated_at: func.now()}, synchronize_session=False)
+        db.commit()
+        # The commit released the advisory lock; wait for it again before the next batch.
+        db.query(func.pg_advisory_xact_lock(AGGREGATOR_LOCK_KEY)).scalar()
+        totals["events"] += sum(len(events) for events in by_organization.values())
+        touched.update(by_organization)
+    db.commit()
+    totals["organizations"] = len(touched)
+    return totals
+
+
+def rebuild_cycle_times(db: Session, organization_ids: Optional[List[uuid.UUID]] = None) -> int:
+    """
+    Recomputes organizations' sketches from the aggregated part of the event log (events
+    not yet aggregated are left to aggregate_cycle_times). Returns the number rebuilt.
+    """
+    db.query(func.pg_advisory_xact_lock(AGGREGATOR_LOCK_KEY)).scalar()
+    query = cycle_completions_query(db).filter(models.ContractStatusEvent.aggregated_at.isnot(None))
+    if organization_ids is not None:
+        query = query.filter(models.ContractStatusEvent.organization_id.in_(organization_ids))
+    sketches: Dict[uuid.UUID, QuantileSketch] = {}
+    last_event_ids: Dict[uuid.UUID, int] = {}
+    for event_id, organization_id, days in query.yield_per(10000):
+        sketches.setdefault(organization_id, QuantileSketch(SKETCH_RELATIVE_ACCURACY)).add(float(days))
+        last_event_ids[organization_id] = max(last_event_ids.get(organization_id, 0), event_id)
+
+    stats_query = db.query(models.ContractCycleTimeStats)
+    if organization_ids is not None:
+        stats_query = stats_query.filter(models.ContractCycleTimeStats.organization_id.in_(organization_ids))
+    existing = {stats.organization_id: stats for stats in stats_query.with_for_update()}
+    for organization_id in existing.keys() | sketches.keys():
+        stats = existing.get(organization_id)
+        if stats is None:
+            stats = models.ContractCycleTimeStats(organization_id=organization_id)
+            db.add(stats)
+        _store(stats, sketches.get(organization_id, QuantileSketch(SKETCH_RELATIVE_ACCURACY)), last_event_ids.get(organization_id, 0))
+    db.commit()
+    return len(existing.keys() | sketches.keys())
@@ -0,0 +1,170 @@
+import threading
+from multiprocessing.connection import Client, Listener
+from typing import List, Optional
+
+import numpy as np
+
+from .config import settings
+
+
+DEFAULT_SERVER_ADDRESS = "127.0.0.1:6000"
+# Placeholder keys from older configs and examples. The server refuses to start with them.
+INSECURE_AUTHKEYS = {"", "change_me", "change_me_embedding_server_key"}
+
+
+def check_authkey(authkey: str):
+    """Raises ValueError unless the embedding server key is set to a real secret."""
+    if authkey.strip() in INSECURE_AUTHKEYS:
+        raise ValueError(
+            "EMBEDDING_SERVER_AUTHKEY must be set to a secret: the embedding server unpickles "
+            "what clients send, so anyone with the key can run code on it."
+        )
+
+
+def _parse_address(address: str):
+    """Parses "host:port" into a TCP address; anything else is treated as a Unix socket path."""
+    if ":" in address and not address.startswith("/"):
+        host, port = address.rsplit(":", 1)
+        return (host, int(port))
+    return address
+
+
+class LocalEmbedder:
+    """
+    Loads the SentenceTransformer model on first use rather than at import time,
+    so processes that never embed text never pay for the model weights.
+    """
+
+    def __init__(self, model_name: str = settings.EMBEDDING_MODEL_NAME):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    # Imported lazily: importing sentence_transformers pulls in torch.
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name)
+                    print(f"Loaded embedding model '{self.model_name}'.")
+        return self._model
+
+    @property
+    def tokenizer(self):
+        return self.model.tokenizer
+
+    @property
+    def max_seq_length(self) -> int:
+        return self.model.max_seq_length
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        return self.model.encode(texts, **kwargs)
+
+
+class RemoteEmbedder:
+    """
+    Client for the shared embedding server (`jobs/embedding_server.py`), so that N API
+    workers share a single copy of the model weights. Only the tokenizer is loaded
+    locally, which keeps chunk boundaries identical to in-process embedding.
+    """
+
+    def __init__(self, address: str, authkey: str, model_name: str = settings.EMBEDDING_MODEL_NAME):
+        self.address = _parse_address(address)
+        self.authkey = authkey.encode()
+        self.model_name = model_name
+        self._tokenizer = None
+        self._fallback: Optional[LocalEmbedder] = None
+        self._local = threading.local()
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(f"sentence-transformers/{self.model_name}")
+        return self._tokenizer
+
+    @property
+    def max_seq_length(self) -> int:
+        return self._request("max_seq_length")
+
+    def _connection(self):
+        # One connection per thread; requests on a connection are strictly request/response.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or conn.closed:
+            conn = Client(self.address, authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, op: str, *args, **kwargs):
+        conn = self._connection()
+        try:
+            conn.send((op, args, kwargs))
+            ok, payload = conn.recv()
+        except (EOFError, OSError):
+            conn.close()
+            raise
+        if not ok:
+            raise RuntimeError(f"Embedding server error: {payload}")
+        return payload
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        try:
+            return np.asarray(self._request("encode", list(texts), **kwargs), dtype=np.float32)
+        except (EOFError, OSError, ConnectionRefusedError) as e:
+            print(f"WARNING: Embedding server at {self.address} unavailable ({e}); encoding in-process.")
+            if self._fallback is None:
+                self._fallback = LocalEmbedder(self.model_name)
+            return self._fallback.encode(texts, **kwargs)
+
+
+def serve(address: str, authkey: str, model_name: str = settings.EMBEDDING_MODEL_NAME):
+    """
+    Runs the shared embedding server. The model is loaded once and each client
+    connection is handled on its own thread. Connections carry pickled requests, so the
+    server refuses to start without a real `authkey` (see check_authkey).
+    """
+    check_authkey(authkey)
+    embedder = LocalEmbedder(model_name)
+    embedder.model  # Load eagerly so the first client request is not slow.
+
+    def handle(conn):
+        with conn:
+            while True:
+                try:
+                    op, args, kwargs = conn.recv()
+                except EOFError:
+                    return
+                try:
+                    if op == "encode":
+                        result = embedder.encode(*args, **kwargs).tolist()
+                    elif op == "max_seq_length":
+                        result = embedder.max_seq_length
+                    else:
+                        raise ValueError(f"Unknown operation '{op}'")
+                    conn.send((True, result))
+                except Exception as e:
+                    conn.send((False, str(e)))
+
+    with Listener(_parse_address(address), authkey=authkey.encode()) as listener:
+        print(f"Embedding server listening on {address} with model '{model_name}'.")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                print(f"Rejected embedding client connection: {e}")
+                continue
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+def get_embedder():
+    """Returns the shared embedding client if one is configured, otherwise an in-process embedder."""
+    if settings.EMBEDDING_SERVER_ADDRESS:
+        try:
+            check_authkey(settings.EMBEDDING_SERVER_AUTHKEY)
+        except ValueError as e:
+            print(f"WARNING: Not using the embedding server: {e}")
+            return LocalEmbedder()
+        return RemoteEmbedder(settings.EMBEDDING_SERVER_ADDRESS, settings.EMBEDDING_SERVER_AUTHKEY)
+    return LocalEmbedder()
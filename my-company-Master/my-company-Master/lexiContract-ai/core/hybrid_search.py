@@ -0,0 +1,144 @@
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from . import crud
+from .database import SessionLocal
+from .search import search_service
+
+# Standard reciprocal-rank-fusion damping constant (Cormack et al.).
+RRF_K = 60
+# Each retriever returns this many candidates per requested result before fusion.
+CANDIDATE_MULTIPLIER = 5
+# Per-retriever latency budget. A retriever that misses it is dropped from the fusion
+# rather than holding the whole request past the endpoint's p95 budget.
+RETRIEVER_TIMEOUT_SECONDS = 0.8
+
+
+def _lexical_candidates(organization_id: uuid.UUID, query: str, limit: int) -> List[dict]:
+    # Runs on a worker thread, so it uses its own session rather than the request's.
+    db = SessionLocal()
+    try:
+        rows = crud.search_contracts_full_text(db, organization_id=organization_id, query=query, limit=limit)
+        return [
+            {
+                "contract_id": str(contract.id),
+                "version_id": str(version_id),
+                "filename": contract.filename,
+                "snippet": snippet,
+                "start_index": start,
+                "end_index": end,
+            }
+            for contract, version_id, _rank, snippet, start, end in rows
+        ]
+    finally:
+        db.close()
+
+
+async def _vector_candidates(organization_id: uuid.UUID, query: str, limit: int) -> List[dict]:
+    hits = await search_service.semantic_search_async(query, organization_id=str(organization_id), limit=limit)
+    return [
+        {
+            "contract_id": hit["metadata"].get("contract_id"),
+            "version_id": hit["metadata"].get("version_id"),
+            "snippet": hit["snippet"],
+            "start_index": hit.get("start_index"),
+            "end_index": hit.get("end_index"),
+        }
+        for hit in hits
+    ]
+
+
+async def _timed(func, *args) -> tuple[Optional[List[dict]], float]:
+    """
+    Runs a retriever under the latency budget, returning (results or None on timeout/error, elapsed ms).
+    Blocking retrievers run on a worker thread; coroutine retrievers are awaited directly.
+    """
+    started = time.perf_counter()
+    call = func(*args) if asyncio.iscoroutinefunction(func) else asyncio.to_thread(func, *args)
+    try:
+        results = await asyncio.wait_for(call, timeout=RETRIEVER_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        print(f"Hybrid search: {func.__name__} exceeded {RETRIEVER_TIMEOUT_SECONDS}s budget.")
+        results = None
+    except Exception as e:
+        print(f"Hybrid search: {func.__name__} failed: {e}")
+        results = None
+    return results, (time.perf_counter() - started) * 1000
+
+
+def reciprocal_rank_fusion(ranked_lists: Dict[str, List[dict]], k: int = RRF_K) -> List[dict]:
+    """
+    Fuses ranked candidate lists with RRF: score = sum(1 / (k + rank)).
+    Candidates are deduplicated by (contract_id, version_id); within a list only the
+    best-ranked occurrence of a version counts, and its snippet and offsets are kept.
+    Lexical snippets (highlighted) take precedence over vector chunk snippets.
+    """
+    fused: Dict[tuple, dict] = {}
+    for source, candidates in ranked_lists.items():
+        rank = 0
+        seen = set()
+        for candidate in candidates:
+            key = (candidate["contract_id"], candidate["version_id"])
+            if key in seen:
+                continue
+            seen.add(key)
+            rank += 1
+            entry = fused.setdefault(key, {
+                "contract_id": key[0],
+                "version_id": key[1],
+                "filename": None,
+                "score": 0.0,
+                "lexical_rank": None,
+                "vector_rank": None,
+                "snippet": None,
+                "start_index": None,
+                "end_index": None,
+            })
+            entry["score"] += 1.0 / (k + rank)
+            entry[f"{source}_rank"] = rank
+            entry["filename"] = entry["filename"] or candidate.get("filename")
+            if entry["snippet"] is None or source == "lexical":
+                entry["snippet"] = candidate["snippet"]
+                entry["start_index"] = candidate.get("start_index")
+                entry["end_index"] = candidate.get("end_index")
+    return sorted(fused.values(), key=lambda e: e["score"], reverse=True)
+
+
+async def hybrid_search(db, *, organization_id: uuid.UUID, query: str, limit: int = 10) -> dict:
+    """
+    Runs the full-text and vector retrievers concurrently and fuses their rankings.
+    Returns the fused results together with per-stage latencies in milliseconds.
+    """
+    started = time.perf_counter()
+    depth = limit * CANDIDATE_MULTIPLIER
+    (lexical, lexical_ms), (vector, vector_ms) = await asyncio.gather(
+        _timed(_lexical_candidates, organization_id, query, depth),
+        _timed(_vector_candidates, organization_id, query, depth),
+    )
+
+    fusion_started = time.perf_counter()
+    degraded = [name for name, results in (("lexical", lexical), ("vector", vector)) if results is None]
+    results = reciprocal_rank_fusion({"lexical": lexical or [], "vector": vector or []})[:limit]
+
+    # Vector hits only carry IDs; resolve filenames for the final page in one query, on a
+    # worker thread like the retrievers so the blocking call never stalls the event loop.
+    missing = [uuid.UUID(r["contract_id"]) for r in results if r["filename"] is None]
+    if missing:
+        contracts = await asyncio.to_thread(crud.get_contracts_by_ids, db, contract_ids=missing, organization_id=organization_id)
+        filenames = {str(c.id): c.filename for c in contracts}
+        for r in results:
+            r["filename"] = r["filename"] or filenames.get(r["contract_id"])
+    fusion_ms = (time.perf_counter() - fusion_started) * 1000
+
+    return {
+        "results": results,
+        "timings": {
+            "lexical_ms": round(lexical_ms, 2),
+            "vector_ms": round(vector_ms, 2),
+            "fusion_ms": round(fusion_ms, 2),
+            "total_ms": round((time.perf_counter() - started) * 1000, 2),
+            "degraded": degraded,
+        },
+    }
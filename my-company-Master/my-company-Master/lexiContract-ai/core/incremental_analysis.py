@@ -0,0 +1,200 @@
+import bisect
+import re
+import time
+from difflib import SequenceMatcher
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import crud, models, schemas
+from .playbook_scanner import playbook_scanner
+
+# Versions are compared block by block: paragraphs, or lines of extracted PDF text.
+BLOCK_BREAK = re.compile(r"\n+")
+
+# (db, organization_id, region text, region offset) -> suggestions with offsets in the full text.
+RegionAnalyzer = Callable[[Session, object, str, int], List[schemas.AnalysisSuggestionCreate]]
+
+
+class UnchangedRun(NamedTuple):
+    """A stretch of the previous version that appears verbatim in the new one, `shift` characters later."""
+    old_start: int
+    old_end: int
+    shift: int
+
+
+class VersionDiff(NamedTuple):
+    # Spans of the new text that must be analyzed again, in order and non-overlapping.
+    regions: List[Tuple[int, int]]
+    # Unchanged stretches outside `regions`, ordered by old_start.
+    unchanged: List[UnchangedRun]
+    new_length: int
+
+    @property
+    def reprocessed_chars(self) -> int:
+        return sum(end - start for start, end in self.regions)
+
+    @property
+    def reprocessed_fraction(self) -> float:
+        return self.reprocessed_chars / self.new_length if self.new_length else 0.0
+
+
+def split_blocks(text: str) -> List[Tuple[int, int]]:
+    """Returns the (start, end) span of every non-empty block between line breaks."""
+    spans = []
+    position = 0
+    for match in BLOCK_BREAK.finditer(text):
+        if match.start() > position:
+            spans.append((position, match.start()))
+        position = match.end()
+    if position < len(text):
+        spans.append((position, len(text)))
+    return spans
+
+
+def diff_versions(old_text: str, new_text: str) -> VersionDiff:
+    """
+    Finds the blocks of `new_text` that differ from `old_text`. Each changed block is
+    reprocessed together with its neighbours, so matches that straddle a block boundary
+    are still found; everything else is an unchanged run whose suggestions only need
+    their offsets shifted.
+    """
+    old_blocks = split_blocks(old_text)
+    new_blocks = split_blocks(new_text)
+    matcher = SequenceMatcher(
+        None,
+        [old_text[start:end] for start, end in old_blocks],
+        [new_text[start:end] for start, end in new_blocks],
+        autojunk=False,
+    )
+
+    old_index_of = [None] * len(new_blocks)
+    changed = [False] * len(new_blocks)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for k in range(j2 - j1):
+                old_index_of[j1 + k] = i1 + k
+        elif j1 < j2:
+            changed[j1:j2] = [True] * (j2 - j1)
+        else:
+            # A deletion: the blocks on either side are now adjacent.
+            for j in (j1 - 1, j1):
+                if 0 <= j < len(new_blocks):
+                    changed[j] = True
+
+    dirty = [
+        changed[j] or (j > 0 and changed[j - 1]) or (j + 1 < len(new_blocks) and changed[j + 1])
+        for j in range(len(new_blocks))
+    ]
+
+    regions: List[Tuple[int, int]] = []
+    unchanged: List[UnchangedRun] = []
+    previous_clean = None
+    for j, (start, end) in enumerate(new_blocks):
+        if dirty[j]:
+            if regions and previous_clean is None:
+                regions[-1] = (regions[-1][0], end)
+            else:
+                regions.append((start, end))
+            previous_clean = None
+            continue
+        old_start, old_end = old_blocks[old_index_of[j]]
+        shift = start - old_start
+        # Consecutive clean blocks with the same shift share their separator, so they form one run.
+        if previous_clean == j - 1 and unchanged[-1].shift == shift and old_index_of[j] == old_index_of[j - 1] + 1:
+            unchanged[-1] = UnchangedRun(unchanged[-1].old_start, old_end, shift)
+        else:
+            unchanged.append(UnchangedRun(old_start, old_end, shift))
+        previous_clean = j
+
+    return VersionDiff(regions, unchanged, len(new_text))
+
+
+class UnchangedRunMap:
+    """
+    Maps spans of the previous version into the new one through a diff's unchanged runs.
+    Built once per diff; lookups are O(log k) for k runs.
+    """
+
+    def __init__(self, diff: VersionDiff):
+        self.runs = diff.unchanged
+        self.old_starts = [run.old_start for run in diff.unchanged]
+
+    def shifted_span(self, start: int, end: int) -> Optional[Tuple[int, int]]:
+        """The span's position in the new version, or None if it touches changed text."""
+        index = bisect.bisect_right(self.old_starts, start) - 1
+        if index < 0:
+            return None
+        run = self.runs[index]
+        if end > run.old_end:
+            return None
+        return start + run.shift, end + run.shift
+
+
+def playbook_region_suggestions(db: Session, organization_id, text: str, offset: int) -> List[schemas.AnalysisSuggestionCreate]:
+    return playbook_scanner.suggestions(db, organization_id, text, offset=offset)
+
+
+def incremental_base(db: Session, version: models.ContractVersion) -> Tuple[Optional[models.ContractVersion], Optional[str]]:
+    """
+    The analyzed version `version` can be diffed against, or (None, why not). The reason
+    is None only for a first version, which always needs a full analysis.
+    """
+    base = crud.get_base_contract_version(db, version)
+    if base is None:
+        return None, None
+    if base.analysis_status != models.AnalysisStatus.completed:
+        return None, f"base version {base.id} is not analyzed yet ({base.analysis_status.value})"
+    if base.full_text is None or version.full_text is None:
+        return None, "a version has no extracted text"
+    return base, None
+
+
+def reanalyze_version(db: Session, version: models.ContractVersion, analyze_region: RegionAnalyzer = playbook_region_suggestions) -> Optional[dict]:
+    """
+    Analyzes `version` incrementally against its base version (its parent, or else the
+    previous version), which must already be analyzed. Suggestions in unchanged text are
+    carried over with shifted offsets, keeping their review status; `analyze_region` runs
+    only on the changed regions. Returns stats, or None if there is no analyzed base
+    version and a full analysis is needed.
+
+    Known limitation: the default region analyzer only runs the organization's playbook
+    rules. AI suggestions of the base version that fall in changed regions (including
+    the neighbouring blocks reprocessed with them) are dropped rather than regenerated,
+    as core/analyzer.py has no entry point for analyzing a span of text.
+    """
+    base, _ = incremental_base(db, version)
+    if base is None:
+        return None
+
+    started = time.perf_counter()
+    diff = diff_versions(base.full_text, version.full_text)
+
+    run_map = UnchangedRunMap(diff)
+    carried = []
+    for suggestion in base.suggestions:
+        span = run_map.shifted_span(suggestion.start_index, suggestion.end_index)
+        if span is not None:
+            carried.append((suggestion, span[0], span[1]))
+
+    organization_id = version.contract.organization_id
+    new_suggestions = []
+    for start, end in diff.regions:
+        new_suggestions.extend(analyze_region(db, organization_id, version.full_text[start:end], start))
+
+    crud.apply_incremental_analysis(db, version_id=version.id, carried=carried, suggestions=new_suggestions)
+
+    stats = {
+        "base_version_id": str(base.id),
+        "regions": len(diff.regions),
+        "reprocessed_chars": diff.reprocessed_chars,
+        "reprocessed_fraction": round(diff.reprocessed_fraction, 4),
+        "carried_suggestions": len(carried),
+        "new_suggestions": len(new_suggestions),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    print(
+        f"Incremental analysis of version {version.id}: re-processed {diff.reprocessed_fraction:.1%} of the text "
+        f"in {len(diff.regions)} regions, carried over {len(carried)} suggestions, found {len(new_suggestions)} new."
+    )
+    return stats
@@ -0,0 +1,20 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import models
+
+
+@event.listens_for(Session, "before_flush")
+def _queue_vector_deletes(session, flush_context, instances):
+    """
+    Queues the vectors of contracts and versions being deleted in this session. The queue
+    rows are written in the same transaction, so a rolled-back delete queues nothing, and
+    jobs/compact_vector_index.py removes the vectors outside the request.
+    """
+    for obj in session.deleted:
+        if isinstance(obj, models.Contract):
+            session.add(models.VectorDeletion(organization_id=obj.organization_id, contract_id=obj.id))
+        elif isinstance(obj, models.ContractVersion):
+            session.add(models.VectorDeletion(
+                organization_id=obj.contract.organization_id, contract_id=obj.contract_id, version_id=obj.id,
+            ))
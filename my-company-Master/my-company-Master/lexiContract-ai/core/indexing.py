@@ -0,0 +1,157 @@
+import hashlib
+import time
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+# Number of chunks sent to the embedding model in a single `encode` call.
+# Large, fixed-size batches amortize model overhead across many documents.
+DEFAULT_EMBEDDING_BATCH_SIZE = 256
+
+
+def content_hash(chunk: str) -> str:
+    """Returns a stable hash of a chunk's normalized text."""
+    normalized = " ".join(chunk.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def chunk_id(organization_id: str, contract_id: str, chunk: str) -> str:
+    """
+    Builds a deterministic vector ID for a chunk.
+    The same paragraph in two versions of one contract maps to the same ID,
+    so re-indexing a new version only embeds the paragraphs that changed.
+    """
+    key = f"{organization_id}:{contract_id}:{content_hash(chunk)}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class IndexingPipeline:
+    """
+    Batches (contract_id, version_id, organization_id, text) jobs and indexes them
+    into the vector store, embedding chunks across documents in fixed-size batches
+    and skipping chunks whose content-hash ID is already present in the store.
+
+    With `latest_only`, each contract keeps only the chunks of the most recently
+    queued version: chunks that no longer appear in it are deleted after indexing.
+    """
+
+    def __init__(self, search_service, batch_size: int = DEFAULT_EMBEDDING_BATCH_SIZE, latest_only: bool = False):
+        self.search_service = search_service
+        self.batch_size = batch_size
+        self.latest_only = latest_only
+        self.queue: Deque[Tuple[str, str, str, str]] = deque()
+
+    def enqueue(self, contract_id: str, version_id: str, organization_id: str, text: str):
+        self.queue.append((str(contract_id), str(version_id), str(organization_id), text))
+
+    def _drain_chunks(self) -> Tuple[List[str], List[str], List[dict]]:
+        """
+        Chunks every queued document. Identical chunks within the queue are embedded once;
+        the metadata of the most recently queued occurrence wins.
+        """
+        jobs = list(self.queue)
+        self.queue.clear()
+        if self.latest_only:
+            # Only the last queued version of each contract is indexed.
+            jobs = list({job[0]: job for job in jobs}.values())
+
+        positions: Dict[str, int] = {}
+        ids, documents, metadatas = [], [], []
+        for contract_id, version_id, organization_id, text in jobs:
+            for chunk in self.search_service._chunk_text(text):
+                cid = chunk_id(organization_id, contract_id, chunk.text)
+                metadata = {
+                    "contract_id": contract_id,
+                    "version_id": version_id,
+                    "organization_id": organization_id,
+                    "content_hash": content_hash(chunk.text),
+                    "start_index": chunk.start_index,
+                    "end_index": chunk.end_index,
+                }
+                if cid in positions:
+                    metadatas[positions[cid]] = metadata
+                    continue
+                positions[cid] = len(ids)
+                ids.append(cid)
+                documents.append(chunk.text)
+                metadatas.append(metadata)
+        return ids, documents, metadatas
+
+    def _existing_ids(self, ids: List[str], metadatas: List[dict]) -> set:
+        by_organization: Dict[str, List[str]] = {}
+        for cid, metadata in zip(ids, metadatas):
+            by_organization.setdefault(metadata["organization_id"], []).append(cid)
+        existing = set()
+        for organization_id, org_ids in by_organization.items():
+            for start in range(0, len(org_ids), self.batch_size):
+                batch = org_ids[start:start + self.batch_size]
+                existing.update(self.search_service.store.existing_ids(organization_id, batch))
+        return existing
+
+    def _prune_superseded(self, ids: List[str], metadatas: List[dict]) -> int:
+        """Deletes chunks of the indexed contracts that are not part of the version just indexed."""
+        current: Dict[Tuple[str, str], set] = {}
+        for cid, metadata in zip(ids, metadatas):
+            current.setdefault((metadata["organization_id"], metadata["contract_id"]), set()).add(cid)
+        pruned = 0
+        store = self.search_service.store
+        for (organization_id, contract_id), keep in current.items():
+            stale = [cid for cid in store.list_metadata(organization_id, where={"contract_id": contract_id}) if cid not in keep]
+            if stale:
+                pruned += store.delete(organization_id, ids=stale)
+        return pruned
+
+    def run(self) -> Dict[str, float]:
+        """
+        Processes every queued job and returns throughput and dedup statistics.
+        """
+        stats = {"documents": len(self.queue), "chunks": 0, "embedded": 0, "skipped": 0, "pruned": 0,
+                 "seconds": 0.0, "chunks_per_second": 0.0, "dedup_hit_rate": 0.0}
+
+        if not self.search_service.store.available or not self.search_service.model:
+            print("SearchService is not available. Skipping document indexing.")
+            self.queue.clear()
+            return stats
+
+        started = time.perf_counter()
+        ids, documents, metadatas = self._drain_chunks()
+        existing = self._existing_ids(ids, metadatas) if ids else set()
+
+        pending = [i for i, cid in enumerate(ids) if cid not in existing]
+        reused = [i for i, cid in enumerate(ids) if cid in existing]
+        # Unchanged chunks keep their vectors; only their version and offsets are refreshed.
+        for start in range(0, len(reused), self.batch_size):
+            batch = reused[start:start + self.batch_size]
+            self.search_service.store.update_metadata(
+                ids=[ids[i] for i in batch],
+                metadatas=[metadatas[i] for i in batch],
+            )
+
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            batch_documents = [documents[i] for i in batch]
+            embeddings = self.search_service.model.encode(batch_documents, batch_size=self.batch_size).tolist()
+            self.search_service.store.add(
+                ids=[ids[i] for i in batch],
+                embeddings=embeddings,
+                documents=batch_documents,
+                metadatas=[metadatas[i] for i in batch],
+            )
+
+        pruned = self._prune_superseded(ids, metadatas) if self.latest_only and ids else 0
+
+        elapsed = time.perf_counter() - started
+        stats.update({
+            "pruned": pruned,
+            "chunks": len(ids),
+            "embedded": len(pending),
+            "skipped": len(ids) - len(pending),
+            "seconds": round(elapsed, 3),
+            "chunks_per_second": round(len(ids) / elapsed, 1) if elapsed > 0 else 0.0,
+            "dedup_hit_rate": round((len(ids) - len(pending)) / len(ids), 3) if ids else 0.0,
+        })
+        print(
+            f"Indexed {stats['documents']} documents: {stats['embedded']} chunks embedded, "
+            f"{stats['skipped']} skipped ({stats['dedup_hit_rate']:.1%} dedup), {stats['pruned']} pruned, "
+            f"{stats['chunks_per_second']} chunks/sec."
+        )
+        return stats
@@ -0,0 +1,326 @@
+import bisect
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import signal
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from .config import settings
+
+# joblib is optional. With it, numpy arrays inside a model are memory-mapped read-only, so
+# every worker on a host shares one copy of the weights through the page cache.
+try:
+    import joblib
+    JOBLIB_ENABLED = True
+except ImportError:
+    joblib = None
+    JOBLIB_ENABLED = False
+
+ARTIFACT_NAME = "model.joblib"
+ROUTING_MODES = ("off", "shadow", "ab")
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is unbounded.
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket latency histogram."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+            self.count += 1
+            self.sum_ms += ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile (None if it is the unbounded bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else None
+        return None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            buckets = {f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)}
+            buckets["le_inf"] = self.counts[-1]
+            return {
+                "count": self.count,
+                "mean_ms": round(self.sum_ms / self.count, 3) if self.count else None,
+                "p50_ms": self.quantile(0.50),
+                "p95_ms": self.quantile(0.95),
+                "p99_ms": self.quantile(0.99),
+                "buckets": buckets,
+            }
+
+
+class LoadedModel:
+    """One loaded model version. `predict` records its latency in the version's histogram."""
+
+    def __init__(self, version: str, model, metadata: dict, latency: LatencyHistogram):
+        self.version = version
+        self.model = model
+        self.metadata = metadata
+        self.latency = latency
+
+    def predict(self, features) -> np.ndarray:
+        started = time.perf_counter()
+        predictions = np.atleast_1d(np.asarray(self.model.predict(features), dtype=float))
+        self.latency.observe((time.perf_counter() - started) * 1000)
+        return predictions
+
+
+def traffic_bucket(key) -> float:
+    """Stable position of `key` in [0, 1), identical in every process (unlike hash())."""
+    return int(hashlib.md5(str(key).encode()).hexdigest()[:8], 16) / 2**32
+
+
+class ModelRouting(NamedTuple):
+    """An immutable view of which versions serve traffic. Swapped as a whole on reload."""
+    active: Optional[LoadedModel]
+    candidate: Optional[LoadedModel]
+    mode: str
+    candidate_fraction: float
+
+    def assign(self, key) -> Optional[LoadedModel]:
+        """The version that serves `key`. In "ab" mode a stable fraction of keys goes to the candidate."""
+        if self.mode == "ab" and self.candidate is not None and traffic_bucket(key) < self.candidate_fraction:
+            return self.candidate
+        return self.active
+
+    @property
+    def shadow(self) -> Optional[LoadedModel]:
+        """The version scored alongside the active one without serving, in "shadow" mode."""
+        return self.candidate if self.mode == "shadow" else None
+
+
+EMPTY_ROUTING = ModelRouting(None, None, "off", 0.0)
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts on local disk, hot-swapped without restarting workers:
+      versions/<version>/model.joblib    the fitted model, written once and never modified
+      versions/<version>/metadata.json   training metadata (metrics, feature list, ...)
+      routing.json                       {"active", "candidate", "mode", "candidate_fraction"},
+                                         replaced atomically to deploy, shadow or roll back
+    Workers re-check routing.json at most every `poll_seconds`, or on the next call after
+    a reload signal. New versions are loaded outside the request path's critical section
+    and then swapped in with a single reference assignment, so in-flight requests finish
+    on the routing they started with. If a version fails to load, the previous one keeps serving.
+    """
+
+    def __init__(self, root: str, name: str, poll_seconds: float = 30):
+        self.name = name
+        self.path = os.path.join(root, name)
+        self.poll_seconds = poll_seconds
+        self._routing = EMPTY_ROUTING
+        self._routing_stat = None
+        self._checked_at = None
+        self._reload_requested = False
+        self._loaded: Dict[str, LoadedModel] = {}
+        self._latency: Dict[str, LatencyHistogram] = {}
+        self._shadow: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        _registries.append(self)
+
+    @property
+    def _routing_path(self) -> str:
+        return os.path.join(self.path, "routing.json")
+
+    def _version_path(self, version: str) -> str:
+        return os.path.join(self.path, "versions", version)
+
+    def current(self) -> ModelRouting:
+        """The current routing, reloading first if routing.json changed or a reload was requested."""
+        if self._reload_requested or self._checked_at is None or time.monotonic() - self._checked_at >= self.poll_seconds:
+            self.refresh()
+        return self._routing
+
+    def request_reload(self):
+        # Only sets a flag, so it is safe to call from a signal handler.
+        self._reload_requested = True
+
+    def refresh(self, force: bool = False):
+        with self._lock:
+            self._checked_at = time.monotonic()
+            force = force or self._reload_requested
+            self._reload_requested = False
+            try:
+                stat = os.stat(self._routing_path)
+            except FileNotFoundError:
+                self._routing, self._routing_stat = EMPTY_ROUTING, None
+                return
+            # routing.json is replaced, never edited, so a new inode means a new routing.
+            if not force and (stat.st_ino, stat.st_mtime_ns) == self._routing_stat:
+                return
+
+            try:
+                with open(self._routing_path) as f:
+                    config = json.load(f)
+                active = self._load(config.get("active"))
+                candidate = self._load(config.get("candidate"))
+            except Exception as e:
+                # The stat is left unrecorded, so the next poll retries this routing.
+                print(f"Model registry '{self.name}': keeping the current routing, reload failed: {e}")
+                return
+            self._routing_stat = (stat.st_ino, stat.st_mtime_ns)
+
+            mode = config.get("mode", "off") if candidate is not None else "off"
+            self._routing = ModelRouting(active, candidate, mode, float(config.get("candidate_fraction", 0.0)))
+            # Drop versions no longer routed; their latency histograms are kept for reporting.
+            self._loaded = {m.version: m for m in (active, candidate) if m is not None}
+            print(
+                f"Model registry '{self.name}': serving {active.version if active else 'no model'}"
+                + (f", candidate {candidate.version} ({mode})" if candidate else "")
+                + "."
+            )
+
+    def _load(self, version: Optional[str]) -> Optional[LoadedModel]:
+        if not version:
+            return None
+        if version in self._loaded:
+            return self._loaded[version]
+        path = self._version_path(version)
+        metadata_path = os.path.join(path, "metadata.json")
+        metadata = {}
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+        model = load_artifact(os.path.join(path, ARTIFACT_NAME))
+        latency = self._latency.setdefault(version, LatencyHistogram())
+        return LoadedModel(version, model, metadata, latency)
+
+    def record_shadow(self, version: str, served: np.ndarray, shadow: np.ndarray):
+        """Records how far a shadow version's predictions are from the ones actually served."""
+        diff = np.abs(np.asarray(shadow, dtype=float) - np.asarray(served, dtype=float))
+        with self._lock:
+            stats = self._shadow.setdefault(version, {"rows": 0, "abs_diff_sum": 0.0, "abs_diff_max": 0.0})
+            stats["rows"] += len(diff)
+            stats["abs_diff_sum"] += float(diff.sum())
+            stats["abs_diff_max"] = max(stats["abs_diff_max"], float(diff.max()) if len(diff) else 0.0)
+
+    def stats(self) -> dict:
+        """This process's routing, per-version latency histograms and shadow disagreement."""
+        routing = self._routing
+        shadow = {
+            version: {
+                "rows": stats["rows"],
+                "mean_abs_diff": round(stats["abs_diff_sum"] / stats["rows"], 4) if stats["rows"] else None,
+                "max_abs_diff": round(stats["abs_diff_max"], 4),
+            }
+            for version, stats in self._shadow.items()
+        }
+        return {
+            "model": self.name,
+            "active": routing.active.version if routing.active else None,
+            "candidate": routing.candidate.version if routing.candidate else None,
+            "mode": routing.mode,
+            "candidate_fraction": routing.candidate_fraction,
+            "latency": {version: histogram.snapshot() for version, histogram in self._latency.items()},
+            "shadow": shadow,
+        }
+
+    def versions(self) -> List[str]:
+        versions_path = os.path.join(self.path, "versions")
+        if not os.path.isdir(versions_path):
+            return []
+        return sorted(v for v in os.listdir(versions_path) if not v.startswith("."))
+
+    def read_routing(self) -> dict:
+        if not os.path.exists(self._routing_path):
+            return {"active": None, "candidate": None, "mode": "off", "candidate_fraction": 0.0}
+        with open(self._routing_path) as f:
+            return json.load(f)
+
+    def set_routing(self, **changes) -> dict:
+        """Updates routing.json atomically; every worker picks the change up on its next poll."""
+        routing = dict(self.read_routing(), **changes)
+        for key in ("active", "candidate"):
+            if routing.get(key) and routing[key] not in self.versions():
+                raise ValueError(f"Model '{self.name}' has no version '{routing[key]}'.")
+        if routing.get("mode", "off") not in ROUTING_MODES:
+            raise ValueError(f"Routing mode must be one of {', '.join(ROUTING_MODES)}.")
+        if not 0.0 <= float(routing.get("candidate_fraction", 0.0)) <= 1.0:
+            raise ValueError("candidate_fraction must be between 0 and 1.")
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = f"{self._routing_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(routing, f)
+        os.replace(tmp_path, self._routing_path)
+        return routing
+
+    def publish(self, artifact_path: Optional[str] = None, model=None, version: Optional[str] = None, metadata: Optional[dict] = None) -> str:
+        """
+        Stores a new immutable version from an existing artifact file or an in-memory model.
+        The version directory is assembled under a temporary name and renamed into place,
+        so workers never see a partially written artifact. Returns the version name.
+        """
+        version = version or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        final_path = self._version_path(version)
+        if os.path.exists(final_path):
+            raise ValueError(f"Model '{self.name}' already has a version '{version}'.")
+        tmp_path = os.path.join(self.path, "versions", f".{version}.{uuid.uuid4().hex}")
+        os.makedirs(tmp_path)
+        try:
+            if artifact_path is not None:
+                shutil.copyfile(artifact_path, os.path.join(tmp_path, ARTIFACT_NAME))
+            else:
+                save_artifact(model, os.path.join(tmp_path, ARTIFACT_NAME))
+            with open(os.path.join(tmp_path, "metadata.json"), "w") as f:
+                json.dump(dict(metadata or {}, version=version, published_at=datetime.now(timezone.utc).isoformat()), f)
+            os.rename(tmp_path, final_path)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        return version
+
+
+def save_artifact(model, path: str):
+    # Uncompressed, so that load_artifact can memory-map the model's arrays.
+    if JOBLIB_ENABLED:
+        joblib.dump(model, path)
+    else:
+        with open(path, "wb") as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_artifact(path: str):
+    if JOBLIB_ENABLED:
+        return joblib.load(path, mmap_mode="r")
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+_registries: List[ModelRegistry] = []
+
+
+def install_reload_signal(signum=getattr(signal, "SIGUSR1", None)):
+    """
+    Makes `signum` (SIGUSR1 by default) reload every registry on its next use. Must be
+    called from the main thread; a no-op on platforms without the signal.
+    """
+    if signum is None:
+        return
+    signal.signal(signum, lambda *_: [registry.request_reload() for registry in _registries])
+
+
+timeline_registry = ModelRegistry(settings.MODEL_REGISTRY_PATH, "timeline", poll_seconds=settings.MODEL_REGISTRY_POLL_SECONDS)
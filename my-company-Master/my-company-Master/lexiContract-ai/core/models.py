@@ -5,9 +5,9 @@ from typing import List, Optional
 
 from sqlalchemy import (
     Column, Integer, String, Text, DateTime, Boolean, Enum as SQLAlchemyEnum, ForeignKey, Table, Float,
-    func, LargeBinary, Column, Integer
+    func, LargeBinary, Column, Integer, Index, Date, BigInteger
 )
-from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY as PG_ARRAY
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY as PG_ARRAY, TSVECTOR
 from sqlalchemy.orm import declarative_base, Mapped, mapped_column, relationship
 
 # Association Table for Organization <-> CompliancePlaybook
@@ -183,6 +183,15 @@ class ContractVersion(Base):
     # New relationship for Autonomous Redlining
     parent_version = relationship("ContractVersion", remote_side=[id], backref="child_versions")
 
+    # Full-text search document, maintained from full_text by a database trigger
+    # (see migration 7c4e2f1a9b8d). Never written by the application.
+    search_vector = Column(TSVECTOR, nullable=True)
+
+    __table_args__ = (
+        Index("ix_contract_versions_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_contract_versions_contract_id_version_number", "contract_id", "version_number"),
+    )
+
 # --- Marketplace & Partner Ecosystem ---
 
 class DeveloperAppStatus(enum.Enum):
@@ -281,12 +290,41 @@ class CustomReport(Base):
     name = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=True)
     configuration = Column(JSONB, nullable=False)
+    # "daily", "weekly" or "monthly" to precompute snapshots off-peak (see core/report_snapshots.py).
+    snapshot_schedule = Column(String, nullable=True)
 
     organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=False)
     created_by_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
 
     organization = relationship("Organization")
     created_by = relationship("User", foreign_keys=[created_by_id])
+    snapshots = relationship("ReportSnapshot", back_populates="report", cascade="all, delete-orphan", order_by="ReportSnapshot.created_at.desc()")
+
+class ReportSnapshot(Base):
+    """
+    A scheduled run of a CustomReport, stored as a Parquet file under REPORT_SNAPSHOT_PATH.
+    `definition_hash` is the hash of the configuration it ran, so a snapshot taken before
+    the report was edited can be told apart.
+    """
+    __tablename__ = "report_snapshots"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    report_id = Column(UUID(as_uuid=True), ForeignKey("custom_reports.id", ondelete="CASCADE"), nullable=False)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=False)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    path = Column(String, nullable=False)
+    definition_hash = Column(String, nullable=False)
+    columns = Column(JSONB, nullable=False)
+    row_count = Column(Integer, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+    truncated = Column(String, nullable=True)  # "row_limit" or "time_limit" when the run was cut short.
+
+    report = relationship("CustomReport", back_populates="snapshots")
+
+    __table_args__ = (
+        Index("ix_report_snapshots_report_id_created_at", "report_id", "created_at"),
+    )
 
 
 class Team(Base):
@@ -463,4 +501,134 @@ class NegotiationOutcome(Base):
     negotiation_duration_days = Column(Integer, nullable=True)
     contract_value = Column(Integer, nullable=True)
     counterparty_industry = Column(String, nullable=True)
-    clause_category = Column(String, index=True, nullable=True)
\ No newline at end of file
+    clause_category = Column(String, index=True, nullable=True)
+
+class ClauseAcceptanceRate(Base):
+    """
+    Accepted/rejected totals from negotiation_outcomes per organization, clause category,
+    contract type and counterparty industry. Refreshed hourly by
+    jobs/refresh_clause_acceptance_rates.py so clause success-rate predictions are a
+    single indexed lookup. Unknown contract types and industries are stored as "".
+    """
+    __tablename__ = "clause_acceptance_rates"
+
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), primary_key=True)
+    clause_category = Column(String, primary_key=True)
+    contract_type = Column(String, primary_key=True, default="")
+    counterparty_industry = Column(String, primary_key=True, default="")
+    accepted_count = Column(Integer, nullable=False, default=0)
+    rejected_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+
+# --- Analytics dashboard rollups ---
+# Maintained on every write by the triggers in migration 5f2a9d7c3e18 and checked against
+# the source tables by jobs/check_analytics_rollups.py.
+
+class AnalyticsContractDaily(Base):
+    """Contracts per organization, UTC creation day and negotiation status."""
+    __tablename__ = "analytics_contract_daily"
+
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    negotiation_status = Column(String, primary_key=True)
+    contract_count = Column(Integer, nullable=False, default=0)
+
+class AnalyticsRiskCategoryCount(Base):
+    """Analysis suggestions per organization and risk category."""
+    __tablename__ = "analytics_risk_category_counts"
+
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), primary_key=True)
+    risk_category = Column(String, primary_key=True)
+    suggestion_count = Column(Integer, nullable=False, default=0)
+
+# --- Contract status history ---
+
+class ContractStatusEvent(Base):
+    """
+    Append-only log of negotiation_status and signature_status changes, written by
+    crud.record_contract_status_event. Cycle-time KPIs are aggregated from it by
+    jobs/cycle_time_aggregator.py, which stamps `aggregated_at` on each cycle-ending
+    event in the transaction that folds it in.
+    """
+    __tablename__ = "contract_status_events"
+    __table_args__ = (Index("ix_contract_status_events_contract_id_id", "contract_id", "id"),)
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    contract_id = Column(UUID(as_uuid=True), ForeignKey("contracts.id", ondelete="CASCADE"), nullable=False)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=False)
+    field = Column(String, nullable=False)  # "negotiation_status" or "signature_status"
+    from_status = Column(String, nullable=True)
+    to_status = Column(String, nullable=False)
+    changed_by_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    aggregated_at = Column(DateTime(timezone=True), nullable=True)
+
+class ContractCycleTimeStats(Base):
+    """
+    Per-organization cycle time (contract creation to signature) as a serialized
+    QuantileSketch, with its percentiles precomputed so the dashboard KPI is one row read.
+    `last_event_id` is the newest contract_status_events row folded into the sketch (informational).
+    """
+    __tablename__ = "contract_cycle_time_stats"
+
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), primary_key=True)
+    sketch = Column(JSONB, nullable=False)
+    last_event_id = Column(BigInteger, nullable=False, default=0)
+    contract_count = Column(Integer, nullable=False, default=0)
+    mean_days = Column(Float, nullable=True)
+    p50_days = Column(Float, nullable=True)
+    p90_days = Column(Float, nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
+
+# --- Model for the durable contract analysis queue ---
+
+class AnalysisJob(Base):
+    """
+    A queued contract analysis, claimed by jobs/analysis_worker.py with
+    SELECT ... FOR UPDATE SKIP LOCKED. `status` reuses AnalysisStatus: pending jobs wait
+    for `run_after`, in_progress jobs hold a lease until `locked_until`.
+    """
+    __tablename__ = "analysis_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=False, index=True)
+    contract_version_id = Column(UUID(as_uuid=True), ForeignKey("contract_versions.id", ondelete="CASCADE"), nullable=False, index=True)
+    filename = Column(String, nullable=False)
+    # The uploaded file, kept until the analysis succeeds or gives up: either inline, or
+    # for large uploads spooled by the API, as a path under ANALYSIS_UPLOAD_DIR.
+    file_contents = Column(LargeBinary, nullable=True)
+    file_path = Column(String, nullable=True)
+    status = Column(SQLAlchemyEnum(AnalysisStatus, name="analysisstatus", create_type=False), default=AnalysisStatus.pending, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    run_after = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    version = relationship("ContractVersion")
+
+    __table_args__ = (
+        Index("ix_analysis_jobs_status_run_after", "status", "run_after"),
+    )
+
+# --- Queue of vector index deletions ---
+
+class VectorDeletion(Base):
+    """
+    A contract or version whose vectors are still in the vector index. Written by
+    core/index_lifecycle.py in the transaction that deletes the row, and drained by
+    jobs/compact_vector_index.py. `version_id` is null when the whole contract was
+    deleted. No foreign keys: the referenced rows are gone by the time it is drained.
+    """
+    __tablename__ = "vector_deletions"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    organization_id = Column(UUID(as_uuid=True), nullable=False)
+    contract_id = Column(UUID(as_uuid=True), nullable=False)
+    version_id = Column(UUID(as_uuid=True), nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
@@ -0,0 +1,68 @@
+import threading
+import uuid
+from typing import Dict, List, NamedTuple, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import crud, schemas
+from .rule_engine import CompiledRuleSet, RuleMatch
+
+
+class RuleInfo(NamedTuple):
+    name: str
+    description: str
+    risk_category: str
+
+
+class PlaybookScanner:
+    """
+    Scans contract text against an organization's playbook rules. Compiled rule sets are
+    cached per organization and reused until `crud.get_playbook_set_version` changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rule_sets: Dict[uuid.UUID, Tuple[str, CompiledRuleSet, Dict[uuid.UUID, RuleInfo]]] = {}
+
+    def _load(self, db: Session, organization_id: uuid.UUID) -> Tuple[str, CompiledRuleSet, Dict[uuid.UUID, RuleInfo]]:
+        version = crud.get_playbook_set_version(db, organization_id=organization_id)
+        cached = self._rule_sets.get(organization_id)
+        if cached is not None and cached[0] == version:
+            return cached
+
+        playbooks = crud.get_playbooks_for_organization(db, organization_id=organization_id)
+        rules = sorted((rule for playbook in playbooks for rule in playbook.rules), key=lambda rule: rule.id)
+        entry = (
+            version,
+            CompiledRuleSet((rule.id, rule.pattern) for rule in rules),
+            {rule.id: RuleInfo(rule.name, rule.description or "", rule.risk_category) for rule in rules},
+        )
+        with self._lock:
+            self._rule_sets[organization_id] = entry
+        return entry
+
+    def get_rule_set(self, db: Session, organization_id: uuid.UUID) -> CompiledRuleSet:
+        return self._load(db, organization_id)[1]
+
+    def scan(self, db: Session, organization_id: uuid.UUID, text: str) -> List[RuleMatch]:
+        return self.get_rule_set(db, organization_id).scan(text)
+
+    def suggestions(self, db: Session, organization_id: uuid.UUID, text: str, offset: int = 0) -> List[schemas.AnalysisSuggestionCreate]:
+        """
+        Turns the rule matches in `text` into analysis suggestions. `offset` is the position
+        of `text` in the full document, so a region can be scanned on its own.
+        """
+        _, rule_set, rules = self._load(db, organization_id)
+        suggestions = []
+        for match in rule_set.scan(text):
+            rule = rules[match.rule_id]
+            suggestions.append(schemas.AnalysisSuggestionCreate(
+                start_index=offset + match.start,
+                end_index=offset + match.end,
+                original_text=text[match.start:match.end],
+                comment=f"{rule.name}: {rule.description}" if rule.description else rule.name,
+                risk_category=rule.risk_category,
+            ))
+        return suggestions
+
+playbook_scanner = PlaybookScanner()
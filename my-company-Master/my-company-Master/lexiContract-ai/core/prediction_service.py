@@ -1,11 +1,17 @@
 from sqlalchemy.orm import Session
 from typing import List, Dict
+import numpy as np
 import pandas as pd
 import os
+import uuid
 
 from . import models, crud
+from .config import settings
+from .search_cache import TTLCache
+from .model_registry import timeline_registry
 
-# Attempt to import the ML model. If it fails, we fall back to heuristics gracefully.
+# Models trained before the registry existed; used when the registry has no active version.
+# If the import fails, we fall back to heuristics gracefully.
 try:
     from ml.timeline_model import TimelineModel, MODEL_PATH
     ML_ENABLED = True
@@ -13,92 +19,138 @@ except ImportError:
     ML_ENABLED = False
     TimelineModel = None
 
+# Placeholder deal attributes until they are captured from a form or CRM integration.
+DEFAULT_CONTRACT_VALUE = 100000
+DEFAULT_COUNTERPARTY_INDUSTRY = "Technology"
+# Columns the timeline model was trained on.
+MODEL_FEATURES = ["contract_type", "contract_value", "counterparty_industry"]
+# Clause categories shown in contract predictions.
+KEY_CLAUSE_CATEGORIES = ["Liability", "Indemnification", "Governing Law", "Confidentiality"]
+
+
+def build_timeline_features(rows: list) -> pd.DataFrame:
+    """
+    Builds the feature matrix for many contracts at once from
+    crud.get_timeline_features rows. The contract type is approximated from the filename.
+    """
+    frame = pd.DataFrame(rows, columns=["contract_id", "filename", "latest_version_id", "suggestion_count"])
+    filenames = frame["filename"].fillna("").str.upper()
+    frame["is_nda"] = filenames.str.contains("NDA", regex=False)
+    frame["is_msa"] = ~frame["is_nda"] & filenames.str.contains("MSA", regex=False)
+    frame["is_sow"] = ~frame["is_nda"] & ~frame["is_msa"] & filenames.str.contains("SOW", regex=False)
+    # Contracts of unknown type keep the "MSA" the model was previously always given.
+    frame["contract_type"] = np.select([frame["is_nda"], frame["is_sow"]], ["NDA", "SOW"], default="MSA")
+    frame["contract_value"] = DEFAULT_CONTRACT_VALUE
+    frame["counterparty_industry"] = DEFAULT_COUNTERPARTY_INDUSTRY
+    frame["has_version"] = frame["latest_version_id"].notna()
+    return frame
+
+
 class PredictionService:
-    def _predict_timeline_heuristic(self, contract: models.Contract, db: Session) -> Dict:
+    def _predict_timeline_heuristic(self, features: pd.DataFrame) -> tuple:
         """
-        Predicts the negotiation timeline using a simple heuristic model.
+        Predicts negotiation timelines using a simple heuristic model, for every row of
+        `features` at once. Returns (predicted_days, confidence) arrays.
         """
-        # Baseline prediction
-        predicted_days = 15
-        confidence = 0.65
-
-        # Heuristic adjustments based on contract type (approximated from filename)
-        filename_upper = contract.filename.upper()
-        if "NDA" in filename_upper:
-            predicted_days = 7
-            confidence += 0.10
-        elif "MSA" in filename_upper:
-            predicted_days = 25
-        elif "SOW" in filename_upper:
-            predicted_days = 20
+        # Baseline prediction, adjusted by contract type (approximated from filename)
+        predicted_days = np.select([features["is_nda"], features["is_msa"], features["is_sow"]], [7, 25, 20], default=15)
+        confidence = 0.65 + np.where(features["is_nda"], 0.10, 0.0)
 
         # Adjust based on number of AI suggestions (proxy for complexity)
-        if contract.versions:
-            latest_version = contract.versions[-1]
-            num_suggestions = len(latest_version.suggestions)
-            if num_suggestions > 10:
-                predicted_days += 7  # More suggestions likely means more back-and-forth
-                confidence -= 0.05
-            elif num_suggestions < 3:
-                predicted_days -= 3
-                confidence += 0.05
-
-        return {
-            "predicted_timeline_days": max(predicted_days, 3),
-            "timeline_confidence_score": min(confidence, 0.95)
-        }
-
-    def _predict_timeline_ml(self, contract: models.Contract) -> Dict:
+        suggestions = features["suggestion_count"].to_numpy()
+        many = features["has_version"].to_numpy() & (suggestions > 10)
+        few = features["has_version"].to_numpy() & (suggestions < 3)
+        predicted_days = predicted_days + np.where(many, 7, 0) + np.where(few, -3, 0)  # More suggestions likely means more back-and-forth
+        confidence = confidence + np.where(many, -0.05, 0.0) + np.where(few, 0.05, 0.0)
+
+        return np.maximum(predicted_days, 3), np.minimum(confidence, 0.95)
+
+    def _predict_timeline_ml(self, model, features: pd.DataFrame) -> tuple:
         """
-        Predicts the negotiation timeline using the trained ML model.
+        Predicts negotiation timelines using a trained ML model, with a single
+        `predict` call for every row of `features`.
         """
-        # In a real system, this data would come from a form or CRM integration.
-        contract_value = 100000  # Mock value
-        counterparty_industry = "Technology"  # Mock value
-        
-        # The model expects a DataFrame with specific columns
-        input_data = pd.DataFrame([{
-            "contract_type": "MSA", # Mocking contract_type for prediction
-            "contract_value": contract_value,
-            "counterparty_industry": counterparty_industry
-        }])
-
-        predicted_days = self.timeline_model.predict(input_data) if self.timeline_model else 0
-
-        return {
-            "predicted_timeline_days": int(round(predicted_days)) if self.timeline_model else 20, # Fallback value
-            "timeline_confidence_score": 0.90 # Higher confidence for ML model
-        }
+        predicted_days = np.atleast_1d(np.asarray(model.predict(features[MODEL_FEATURES]), dtype=float))
+        return np.rint(predicted_days).astype(int), np.full(len(features), 0.90)  # Higher confidence for ML model
 
-    def predict_negotiation_timeline(self, contract: models.Contract, db: Session) -> Dict:
+    def _timeline_model_for(self, routing, contract_id: uuid.UUID) -> tuple:
+        """The (version, model) that serves a contract; (None, None) means the heuristic."""
+        model = routing.assign(contract_id)
+        if model is not None:
+            return model.version, model
         if self.timeline_model:
-            return self._predict_timeline_ml(contract)
-        return self._predict_timeline_heuristic(contract, db)
+            return "legacy", self.timeline_model
+        return None, None
+
+    def predict_negotiation_timelines(self, contract_ids: List[uuid.UUID], db: Session) -> Dict[uuid.UUID, Dict]:
+        """
+        Predicts negotiation timelines for many contracts with one feature query and one
+        model call per serving model version. Predictions are cached per
+        (contract_id, latest_version_id) and recomputed when that version's suggestion
+        count or the model version serving the contract changes.
+        """
+        routing = timeline_registry.current()
+        rows = crud.get_timeline_features(db, contract_ids=list(contract_ids))
+        predictions = {}
+        missing = []
+        for row in rows:
+            model_version, model = self._timeline_model_for(routing, row.contract_id)
+            cached = self.timeline_cache.get((row.contract_id, row.latest_version_id))
+            if cached is not None and cached[:2] == (row.suggestion_count, model_version):
+                predictions[row.contract_id] = cached[2]
+            else:
+                missing.append((row, model_version, model))
+        if not missing:
+            return predictions
+
+        features = build_timeline_features([row for row, _, _ in missing])
+        assigned = np.array([model_version for _, model_version, _ in missing], dtype=object)
+        models_by_version = {model_version: model for _, model_version, model in missing}
+        predicted_days = np.zeros(len(missing), dtype=int)
+        confidence = np.zeros(len(missing))
+        for model_version, model in models_by_version.items():
+            selected = assigned == model_version
+            group = features[selected]
+            if model is None:
+                predicted_days[selected], confidence[selected] = self._predict_timeline_heuristic(group)
+            else:
+                predicted_days[selected], confidence[selected] = self._predict_timeline_ml(model, group)
+                if routing.shadow is not None and model is routing.active:
+                    shadow_days, _ = self._predict_timeline_ml(routing.shadow, group)
+                    timeline_registry.record_shadow(routing.shadow.version, predicted_days[selected], shadow_days)
+
+        for (row, model_version, _), days, score in zip(missing, predicted_days.tolist(), confidence.tolist()):
+            prediction = {"predicted_timeline_days": int(days), "timeline_confidence_score": score}
+            self.timeline_cache.set((row.contract_id, row.latest_version_id), (row.suggestion_count, model_version, prediction))
+            predictions[row.contract_id] = prediction
+        return predictions
+
+    def predict_negotiation_timeline(self, contract: models.Contract, db: Session) -> Dict:
+        return self.predict_negotiation_timelines([contract.id], db)[contract.id]
 
     def predict_clause_success_rates(self, contract: models.Contract, db: Session) -> List[Dict]:
         """
-        Predicts the success rate for a predefined set of key clause categories.
+        Predicts the success rate for a predefined set of key clause categories, from one
+        lookup on the precomputed clause_acceptance_rates table.
         """
-        # For MVP, we'll check a hardcoded list of important categories.
-        key_categories = ["Liability", "Indemnification", "Governing Law", "Confidentiality"]
+        rates = crud.get_clause_acceptance_rates(db, organization_id=contract.organization_id, clause_categories=KEY_CLAUSE_CATEGORIES)
         predictions = []
-
-        for category in key_categories:
-            stats = crud.get_clause_acceptance_stats(db, clause_category=category, organization_id=contract.organization_id)
-            accepted_count = stats.get("ACCEPTED", 0)
-            rejected_count = stats.get("REJECTED", 0)
+        for category in KEY_CLAUSE_CATEGORIES:
+            accepted_count, rejected_count = rates.get(category, (0, 0))
             total = accepted_count + rejected_count
 
             # Require a minimum number of data points for a meaningful prediction
-            if total > 5:
+            if total >= settings.CLAUSE_PREDICTION_MIN_SAMPLES:
                 success_rate = accepted_count / total
                 predictions.append({"clause_category": category, "predicted_success_rate": round(success_rate, 2)})
-        
+
         return predictions
 
     def __init__(self):
+        self.timeline_cache = TTLCache(settings.PREDICTION_CACHE_SIZE, settings.PREDICTION_CACHE_TTL)
         self.timeline_model = None
-        if ML_ENABLED:
+        # The legacy model is only loaded when the registry has nothing to serve.
+        if ML_ENABLED and timeline_registry.current().active is None:
             model_wrapper = TimelineModel()
             if model_wrapper.load_model():
                 self.timeline_model = model_wrapper
@@ -0,0 +1,136 @@
+import bisect
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+
+class TextEdit(NamedTuple):
+    """Replace text[start:end] with `replacement`. start == end is a pure insertion."""
+    start: int
+    end: int
+    replacement: str
+
+
+class OverlappingEditsError(ValueError):
+    pass
+
+
+def sort_edits(edits: Iterable[TextEdit]) -> List[TextEdit]:
+    # Stable on ties, so insertions at the same offset are applied in the given order.
+    return sorted(edits, key=lambda edit: (edit.start, edit.end))
+
+
+def validate_edits(edits: List[TextEdit], text_length: int):
+    """Raises if `edits` (sorted) fall outside the text or overlap each other."""
+    previous = None
+    for edit in edits:
+        if not 0 <= edit.start <= edit.end <= text_length:
+            raise ValueError(f"Edit [{edit.start}, {edit.end}) is outside the text (length {text_length}).")
+        if previous is not None and edit.start < previous.end:
+            raise OverlappingEditsError(f"Edit [{edit.start}, {edit.end}) overlaps edit [{previous.start}, {previous.end}).")
+        previous = edit
+
+
+def non_overlapping(edits: Iterable[TextEdit]) -> Tuple[List[TextEdit], List[TextEdit]]:
+    """Splits edits into a non-overlapping set, keeping the earliest of any conflict, and the rest."""
+    kept, dropped = [], []
+    for edit in sort_edits(edits):
+        if kept and edit.start < kept[-1].end:
+            dropped.append(edit)
+        else:
+            kept.append(edit)
+    return kept, dropped
+
+
+class OffsetMap:
+    """
+    Maps character offsets in the original text to the patched text, so suggestions,
+    comments and search hits can be re-anchored. Lookups are O(log k) for k edits.
+    """
+
+    def __init__(self, old_starts: List[int], old_ends: List[int], new_starts: List[int], new_ends: List[int]):
+        self.old_starts = old_starts
+        self.old_ends = old_ends
+        self.new_starts = new_starts
+        self.new_ends = new_ends
+
+    def _shift_after(self, index: int) -> int:
+        return self.new_ends[index] - self.old_ends[index]
+
+    def map_start(self, offset: int) -> int:
+        """Where a span starting at `offset` starts now. Offsets inside a replaced span map to its replacement's start."""
+        index = bisect.bisect_right(self.old_starts, offset) - 1
+        if index < 0:
+            return offset
+        if offset >= self.old_ends[index]:
+            return offset + self._shift_after(index)
+        return self.new_starts[index]
+
+    def map_end(self, offset: int) -> int:
+        """Where a span ending at `offset` ends now. Offsets inside a replaced span map to its replacement's end."""
+        index = bisect.bisect_left(self.old_starts, offset) - 1
+        if index < 0:
+            return offset
+        if offset >= self.old_ends[index]:
+            return offset + self._shift_after(index)
+        return self.new_ends[index]
+
+    def map_edit(self, start: int, end: int, nth: int = 0) -> Tuple[int, int]:
+        """
+        The span of the replacement produced by the applied edit [start, end). `nth` picks
+        among several edits with the same span (insertions at one offset), in the order
+        they were applied. An insertion has no old text to map, so this is the only way
+        to place it: map_start and map_end would put its ends on opposite sides of it.
+        """
+        index = bisect.bisect_left(self.old_starts, start)
+        while index < len(self.old_starts) and self.old_starts[index] == start:
+            if self.old_ends[index] == end:
+                if nth == 0:
+                    return self.new_starts[index], self.new_ends[index]
+                nth -= 1
+            index += 1
+        raise KeyError(f"No applied edit spans [{start}, {end}).")
+
+    def touches_edit(self, start: int, end: int) -> bool:
+        """True if an edit replaced any text inside [start, end) or inserted text strictly within it."""
+        index = bisect.bisect_left(self.old_starts, end) - 1
+        if index < 0:
+            return False
+        edit_start, edit_end = self.old_starts[index], self.old_ends[index]
+        if edit_start > start:
+            return True
+        return edit_end > start and edit_end > edit_start
+
+    def map_span(self, start: int, end: int) -> Optional[Tuple[int, int]]:
+        """The span's position in the patched text, or None if its text was edited."""
+        if self.touches_edit(start, end):
+            return None
+        if start == end:
+            # A point: map_end would place it before an insertion at the same offset.
+            return self.map_start(start), self.map_start(start)
+        return self.map_start(start), self.map_end(end)
+
+
+def apply_edits(text: str, edits: Iterable[TextEdit]) -> Tuple[str, OffsetMap]:
+    """
+    Applies non-overlapping edits in one pass, joining slices of the original text and the
+    replacements. Returns the patched text and an OffsetMap from old to new offsets.
+    Raises OverlappingEditsError if edits overlap, instead of corrupting the text.
+    """
+    ordered = sort_edits(edits)
+    validate_edits(ordered, len(text))
+
+    pieces = []
+    old_starts, old_ends, new_starts, new_ends = [], [], [], []
+    cursor = 0
+    length = 0
+    for edit in ordered:
+        pieces.append(text[cursor:edit.start])
+        length += edit.start - cursor
+        old_starts.append(edit.start)
+        old_ends.append(edit.end)
+        new_starts.append(length)
+        pieces.append(edit.replacement)
+        length += len(edit.replacement)
+        new_ends.append(length)
+        cursor = edit.end
+    pieces.append(text[cursor:])
+    return "".join(pieces), OffsetMap(old_starts, old_ends, new_starts, new_ends)
@@ -1,29 +1,22 @@
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 
 from . import models, crud
+from .config import settings
+from .redline_patch import OffsetMap, TextEdit, apply_edits, non_overlapping
 
 class RedliningService:
     """
     A service to handle the logic for autonomous contract redlining.
     """
 
-    def _apply_suggestions_to_text(self, text: str, suggestions: List[models.AnalysisSuggestion]) -> str:
+    def _apply_suggestions_to_text(self, text: str, suggestions: List[models.AnalysisSuggestion]) -> Tuple[str, OffsetMap]:
         """
-        Applies a list of text replacement suggestions to a string.
-
-        It sorts suggestions by their start index in reverse order to apply them
-        from the end of the string to the beginning. This prevents index shifting
-        issues as the text length changes.
+        Applies a list of text replacement suggestions to a string in a single pass over
+        the text. Returns the new text and a map from old to new offsets.
+        Raises OverlappingEditsError if two suggestions overlap.
         """
-        suggestions.sort(key=lambda s: s.start_index, reverse=True)
-        
-        text_parts = list(text)
-        for suggestion in suggestions:
-            # Replace the original text slice with the suggested text
-            text_parts[suggestion.start_index:suggestion.end_index] = list(suggestion.suggested_text)
-        
-        return "".join(text_parts)
+        return apply_edits(text, [TextEdit(s.start_index, s.end_index, s.suggested_text) for s in suggestions])
 
     def _calculate_confidence_score(self, suggestion: models.AnalysisSuggestion) -> float:
         """
@@ -43,34 +36,59 @@ class RedliningService:
 
         return min(max(score, 0.5), 0.99) # Clamp score between 0.5 and 0.99
 
-    def create_autonomous_redline(self, db: Session, original_version: models.ContractVersion) -> models.ContractVersion | None:
+    def create_autonomous_redline(self, db: Session, original_version: models.ContractVersion, min_confidence: Optional[float] = None) -> models.ContractVersion | None:
         """
         Creates a new, autonomously redlined contract version from an existing one.
+        Only suggestions whose confidence score is at least `min_confidence` (default
+        REDLINE_MIN_CONFIDENCE) are applied. The new version and its suggestions are
+        committed in a single transaction.
         """
-        # For now, we apply all suggestions that have replacement text.
-        # In the future, this could be filtered by confidence score or playbook source.
-        suggestions_to_apply = [s for s in original_version.suggestions if s.suggested_text]
+        if min_confidence is None:
+            min_confidence = settings.REDLINE_MIN_CONFIDENCE
+        # Apply the suggestions that have replacement text and clear the confidence threshold.
+        scores = {s.id: self._calculate_confidence_score(s) for s in original_version.suggestions if s.suggested_text}
+        suggestions_to_apply = [s for s in original_version.suggestions if s.id in scores and scores[s.id] >= min_confidence]
 
         if not suggestions_to_apply:
             print(f"No applicable suggestions found for autonomous redlining on version {original_version.id}.")
             return None
 
-        # Calculate confidence scores for each suggestion we are about to apply.
-        suggestions_with_scores = [(s, self._calculate_confidence_score(s)) for s in suggestions_to_apply]
-
-        # Apply the suggestions to the original text to create the new redlined text.
-        new_text = self._apply_suggestions_to_text(original_version.full_text, suggestions_to_apply)
+        # Overlapping suggestions can't both be applied; keep the earliest of each conflict.
+        # Several suggestions can make the same edit: it is applied once and all of them are kept.
+        by_edit = {}
+        for s in suggestions_to_apply:
+            by_edit.setdefault(TextEdit(s.start_index, s.end_index, s.suggested_text), []).append(s)
+        kept, dropped = non_overlapping(by_edit)
+        if dropped:
+            print(f"Skipping {len(dropped)} overlapping suggestions for autonomous redlining on version {original_version.id}.")
 
-        # Create the new ContractVersion record, linking it to its parent.
-        new_version = crud.create_new_contract_version_with_parent(
-            db=db,
-            original_version=original_version,
-            new_text=new_text,
-        )
-
-        # Copy the applied suggestions to the new version, including their confidence scores.
-        crud.copy_suggestions_to_new_version(db=db, suggestions_with_scores=suggestions_with_scores, new_version_id=new_version.id)
+        # Keep the confidence score of each suggestion we are about to apply, in the order applied.
+        suggestions_with_scores = [(s, scores[s.id]) for edit in kept for s in by_edit[edit]]
 
+        # Apply the suggestions to the original text to create the new redlined text.
+        new_text, offset_map = self._apply_suggestions_to_text(original_version.full_text, [by_edit[edit][0] for edit in kept])
+
+        # Lock the contract so concurrent redlines can't claim the same version number.
+        db.query(models.Contract).filter(models.Contract.id == original_version.contract_id).with_for_update().one()
+
+        try:
+            # Create the new ContractVersion record, linking it to its parent.
+            new_version = crud.create_new_contract_version_with_parent(
+                db=db,
+                original_version=original_version,
+                new_text=new_text,
+                commit=False,
+            )
+
+            # Copy the applied suggestions to the new version, including their confidence scores.
+            # Their offsets are re-anchored to the replaced text in the new version.
+            crud.copy_suggestions_to_new_version(db=db, suggestions_with_scores=suggestions_with_scores, new_version_id=new_version.id, offset_map=offset_map, commit=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        db.refresh(new_version)
         return new_version
 
 redlining_service = RedliningService()
\ No newline at end of file
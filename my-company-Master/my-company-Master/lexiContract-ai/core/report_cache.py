@@ -0,0 +1,149 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import find_tables
+
+from .config import settings
+from .database import SessionLocal
+from .search_cache import TTLCache
+
+# Definition keys whose list order does not change the result (filters are ANDed).
+UNORDERED_DEFINITION_KEYS = ("filters",)
+
+
+def canonical_definition(definition: dict) -> str:
+    """The report definition as compact JSON with sorted keys and order-insensitive lists sorted."""
+    normalized = dict(definition)
+    for key in UNORDERED_DEFINITION_KEYS:
+        if isinstance(normalized.get(key), list):
+            normalized[key] = sorted(normalized[key], key=lambda item: json.dumps(item, sort_keys=True, default=str))
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def cache_key(organization_id: uuid.UUID, definition: dict, **params) -> Tuple:
+    """(organization, definition hash, sorted params) — reports with equivalent definitions share entries."""
+    digest = hashlib.sha256(canonical_definition(definition).encode()).hexdigest()
+    return (str(organization_id), digest, tuple(sorted((name, str(value)) for name, value in params.items())))
+
+
+def query_tables(query) -> List[str]:
+    """Names of every table a report query reads, including joins and subqueries."""
+    return sorted({table.name for table in find_tables(query)})
+
+
+def table_versions(db: Session, tables: List[str]) -> Tuple:
+    """
+    Per-table write counters (rows inserted + updated + deleted) from pg_stat_user_tables.
+    Postgres maintains them for every write path at no cost to writers, and only reports a
+    transaction's writes after it ends, so a counter never moves ahead of committed data.
+    """
+    rows = db.execute(
+        text(
+            "SELECT relname, n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables "
+            "WHERE schemaname = current_schema() AND relname = ANY(:tables)"
+        ),
+        {"tables": list(tables)},
+    ).all()
+    return tuple(sorted((name, int(count)) for name, count in rows))
+
+
+class CachedResult(NamedTuple):
+    value: Any
+    versions: Tuple
+    created_at: float
+    seconds: float
+
+
+class ReportCache:
+    """
+    Per-process cache of report results. An entry is fresh for `ttl` seconds while the write
+    counters of the tables its query reads are unchanged. After that, and for another
+    `stale_seconds`, it is still served (stale-while-revalidate) while one background
+    refresh per key re-executes the report. Counters are reported by Postgres with a delay
+    of up to a few seconds after a commit, so a write can take that long to invalidate.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, stale_seconds: float, refresh_workers: int):
+        self.ttl = ttl
+        self._entries = TTLCache(maxsize, ttl + stale_seconds)
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="report-cache")
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+        self.saved_seconds = 0.0
+
+    def _count(self, name: str, saved: float = 0.0):
+        with self._lock:
+            self.counts[name] += 1
+            self.saved_seconds += saved
+
+    def _execute(self, db: Session, key: Hashable, tables: List[str], execute: Callable[[Session], Any]):
+        # Counters are read first, so writes that land during execution invalidate the entry.
+        versions = table_versions(db, tables)
+        started = time.perf_counter()
+        value = execute(db)
+        self._entries.set(key, CachedResult(value, versions, time.monotonic(), time.perf_counter() - started))
+        return value
+
+    def _refresh(self, key: Hashable, tables: List[str], execute: Callable[[Session], Any]):
+        db = SessionLocal()
+        try:
+            self._execute(db, key, tables, execute)
+            self._count("refreshes")
+        except Exception as e:
+            print(f"Background report refresh failed: {e}")
+            self._count("refresh_errors")
+        finally:
+            db.close()
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh_in_background(self, key: Hashable, tables: List[str], execute: Callable[[Session], Any]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._refresh, key, tables, execute)
+
+    def get_or_execute(self, db: Session, key: Hashable, tables: List[str], execute: Callable[[Session], Any]):
+        """
+        Returns the cached result for `key`, or runs `execute(session)` and caches it.
+        `execute` may run later on another session and thread, so it must not capture `db`.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self._count("misses")
+            return self._execute(db, key, tables, execute)
+        if entry.versions == table_versions(db, tables) and time.monotonic() - entry.created_at < self.ttl:
+            self._count("hits", entry.seconds)
+            return entry.value
+        self._count("stale_hits", entry.seconds)
+        self._refresh_in_background(key, tables, execute)
+        return entry.value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+            saved = self.saved_seconds
+        lookups = counts["hits"] + counts["stale_hits"] + counts["misses"]
+        return {
+            **counts,
+            "size": self._entries.stats()["size"],
+            "hit_rate": round((counts["hits"] + counts["stale_hits"]) / lookups, 3) if lookups else 0.0,
+            "saved_query_seconds": round(saved, 3),
+        }
+
+
+report_cache = ReportCache(
+    maxsize=settings.REPORT_CACHE_SIZE,
+    ttl=settings.REPORT_CACHE_TTL,
+    stale_seconds=settings.REPORT_CACHE_STALE_SECONDS,
+    refresh_workers=settings.REPORT_CACHE_REFRESH_WORKERS,
+)
@@ -0,0 +1,179 @@
+import base64
+import csv
+import decimal
+import enum
+import io
+import json
+import time
+import uuid
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from .config import settings
+
+REPORT_FORMATS = ("json", "ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Label of the keyset column added to paginated queries; stripped from the returned rows.
+KEYSET_LABEL = "_report_key"
+
+
+def _json_default(value):
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def set_statement_timeout(db: Session, seconds: float):
+    """Caps every statement of the current transaction (each cursor fetch, when streaming)."""
+    db.execute(select(func.set_config("statement_timeout", str(int(seconds * 1000)), True)))
+
+
+class ReportStream:
+    """
+    Rows of a report query, fetched through a server-side cursor in batches of
+    `batch_size`, so memory stays flat however many rows the report has. Iteration stops
+    after `max_rows` rows or `max_seconds`; `truncated` then says which limit was hit.
+    """
+
+    def __init__(self, db: Session, query: Select, max_rows: int, max_seconds: float, batch_size: int):
+        self.db = db
+        self.query = query
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.batch_size = batch_size
+        self.truncated: Optional[str] = None
+        self.row_count = 0
+        self.columns: List[str] = []
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        started = time.monotonic()
+        set_statement_timeout(self.db, self.max_seconds)
+        # One row past the limit tells a report that is exactly max_rows long from a truncated one.
+        result = self.db.execute(
+            self.query.limit(self.max_rows + 1),
+            execution_options={"stream_results": True, "yield_per": self.batch_size},
+        )
+        self.columns = list(result.keys())
+        try:
+            for partition in result.mappings().partitions():
+                for row in partition:
+                    if self.row_count == self.max_rows:
+                        self.truncated = "row_limit"
+                        return
+                    self.row_count += 1
+                    yield dict(row)
+                if time.monotonic() - started > self.max_seconds:
+                    self.truncated = "time_limit"
+                    return
+        finally:
+            result.close()
+
+
+def stream_report(
+    session_factory: Callable[[], Session],
+    build_query: Callable[[], Select],
+    *,
+    max_rows: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+) -> ReportStream:
+    """A ReportStream on its own session, which is closed once the stream is consumed."""
+    db = session_factory()
+    return ReportStream(
+        db,
+        build_query(),
+        max_rows=max_rows or settings.REPORT_MAX_ROWS,
+        max_seconds=max_seconds or settings.REPORT_MAX_SECONDS,
+        batch_size=settings.REPORT_STREAM_BATCH_SIZE,
+    )
+
+
+def _consume(stream: ReportStream) -> Iterator[Dict[str, Any]]:
+    try:
+        yield from stream
+    finally:
+        stream.db.rollback()
+        stream.db.close()
+
+
+def ndjson_lines(stream: ReportStream) -> Iterator[str]:
+    """One JSON object per row. A truncated report ends with a {"_truncated": "<limit>"} line."""
+    for row in _consume(stream):
+        yield json.dumps(row, default=_json_default) + "\n"
+    if stream.truncated:
+        yield json.dumps({"_truncated": stream.truncated}) + "\n"
+
+
+def csv_lines(stream: ReportStream) -> Iterator[str]:
+    """A header row, then one line per row. A truncated report ends with a "#truncated:<limit>" row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    header_written = False
+    for row in _consume(stream):
+        if not header_written:
+            writer.writerow(row.keys())
+            header_written = True
+        writer.writerow([_csv_value(value) for value in row.values()])
+        if buffer.tell() >= 64 * 1024:
+            yield flush()
+    if not header_written and stream.columns:
+        writer.writerow(stream.columns)
+    if stream.truncated:
+        writer.writerow([f"#truncated:{stream.truncated}"])
+    yield flush()
+
+
+def encode_report_cursor(key) -> str:
+    return base64.urlsafe_b64encode(str(key).encode()).decode()
+
+
+def decode_report_cursor(cursor: str, key_column) -> Any:
+    """Raises ValueError for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        return key_column.type.python_type(raw)
+    except Exception:
+        raise ValueError("Invalid report cursor.")
+
+
+def keyset_page(db: Session, query: Select, key_column, after=None, page_size: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+    """
+    One page of a report ordered by the unique `key_column`, starting after the key
+    `after`. Each page is an index range scan on the key, so late pages cost the same as
+    the first. Returns (rows, key to pass as `after` for the next page, or None).
+    """
+    page_size = min(page_size or settings.REPORT_PAGE_SIZE, settings.REPORT_MAX_PAGE_SIZE)
+    query = query.add_columns(key_column.label(KEYSET_LABEL)).order_by(key_column)
+    if after is not None:
+        query = query.where(key_column > after)
+    set_statement_timeout(db, settings.REPORT_MAX_SECONDS)
+    rows = [dict(row) for row in db.execute(query.limit(page_size + 1)).mappings()]
+    next_key = rows[page_size - 1][KEYSET_LABEL] if len(rows) > page_size else None
+    rows = rows[:page_size]
+    for row in rows:
+        del row[KEYSET_LABEL]
+    return rows, next_key
@@ -0,0 +1,223 @@
+import decimal
+import enum
+import hashlib
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric
+from sqlalchemy.orm import Session
+
+from . import models, report_executor, reporting
+from .config import settings
+from .report_cache import canonical_definition
+
+# pyarrow is optional. Without it, reports cannot be scheduled or snapshotted.
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_ENABLED = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_ENABLED = False
+
+SNAPSHOT_SCHEDULES = ("daily", "weekly", "monthly")
+# Rows per Parquet row group. A snapshot read decodes only the row groups its range overlaps.
+ROW_GROUP_ROWS = 50000
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def definition_hash(definition: Dict[str, Any]) -> str:
+    return hashlib.sha256(canonical_definition(definition).encode()).hexdigest()
+
+
+def snapshot_run_time(report_id: uuid.UUID) -> Dict[str, int]:
+    """
+    The UTC hour and minute a report's snapshots run at: a fixed point in the off-peak
+    window derived from the report id, so scheduled reports don't all start at once.
+    """
+    window_minutes = max(settings.REPORT_SNAPSHOT_WINDOW_HOURS, 1) * 60
+    offset = int(hashlib.md5(str(report_id).encode()).hexdigest(), 16) % window_minutes
+    return {"hour": (settings.REPORT_SNAPSHOT_WINDOW_START_HOUR + offset // 60) % 24, "minute": offset % 60}
+
+
+def snapshot_cron_fields(report_id: uuid.UUID, schedule: str) -> Dict[str, Any]:
+    """APScheduler cron trigger fields for a report's schedule."""
+    fields: Dict[str, Any] = snapshot_run_time(report_id)
+    if schedule == "weekly":
+        fields["day_of_week"] = "sun"
+    elif schedule == "monthly":
+        fields["day"] = 1
+    return fields
+
+
+def next_snapshot_run(report_id: uuid.UUID, schedule: str, now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.now(timezone.utc)
+    run_time = snapshot_run_time(report_id)
+    candidate = now.replace(hour=run_time["hour"], minute=run_time["minute"], second=0, microsecond=0)
+    while (
+        candidate <= now
+        or (schedule == "weekly" and candidate.weekday() != 6)
+        or (schedule == "monthly" and candidate.day != 1)
+    ):
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def _arrow_type(sql_type):
+    if isinstance(sql_type, Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, Integer):
+        return pa.int64()
+    if isinstance(sql_type, (Float, Numeric)):
+        return pa.float64()
+    if isinstance(sql_type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(sql_type, Date):
+        return pa.date32()
+    # Text, enums and UUIDs.
+    return pa.string()
+
+
+def arrow_schema(query) -> "pa.Schema":
+    """The Arrow schema of a report query's rows, from the SQL types of its columns."""
+    return pa.schema([(column.name, _arrow_type(column.type)) for column in query.selected_columns])
+
+
+def _arrow_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return value
+
+
+def _row_groups(stream: report_executor.ReportStream, schema: "pa.Schema") -> Iterator["pa.Table"]:
+    columns: Dict[str, list] = {name: [] for name in schema.names}
+    count = 0
+    for row in stream:
+        for name in schema.names:
+            columns[name].append(_arrow_value(row[name]))
+        count += 1
+        if count == ROW_GROUP_ROWS:
+            yield pa.table(columns, schema=schema)
+            columns = {name: [] for name in schema.names}
+            count = 0
+    if count:
+        yield pa.table(columns, schema=schema)
+
+
+def write_snapshot(db: Session, report: models.CustomReport) -> models.ReportSnapshot:
+    """
+    Runs a report in full and stores its rows as a zstd-compressed Parquet file, streaming
+    them from a server-side cursor one row group at a time. The run is capped by
+    REPORT_MAX_ROWS and REPORT_SNAPSHOT_MAX_SECONDS rather than the interactive cost
+    budget: scheduled runs are what that budget sends heavy reports to.
+    """
+    if not PYARROW_ENABLED:
+        raise RuntimeError("Report snapshots need pyarrow; install it to schedule reports.")
+    plan = reporting.compile_report(report.configuration, report.organization_id)
+    schema = arrow_schema(plan.query)
+
+    snapshot_id = uuid.uuid4()
+    directory = os.path.join(settings.REPORT_SNAPSHOT_PATH, str(report.organization_id), str(report.id))
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{snapshot_id}.parquet")
+    partial_path = path + ".partial"
+
+    started = time.perf_counter()
+    stream = report_executor.ReportStream(
+        db, plan.query, max_rows=settings.REPORT_MAX_ROWS,
+        max_seconds=settings.REPORT_SNAPSHOT_MAX_SECONDS, batch_size=settings.REPORT_STREAM_BATCH_SIZE,
+    )
+    try:
+        with pq.ParquetWriter(partial_path, schema, compression="zstd") as writer:
+            for table in _row_groups(stream, schema):
+                writer.write_table(table, row_group_size=ROW_GROUP_ROWS)
+        # Readers only ever see complete files.
+        os.replace(partial_path, path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    snapshot = models.ReportSnapshot(
+        id=snapshot_id,
+        report_id=report.id,
+        organization_id=report.organization_id,
+        path=path,
+        definition_hash=definition_hash(report.configuration),
+        columns=[{"name": field.name, "type": str(field.type)} for field in schema],
+        row_count=stream.row_count,
+        size_bytes=os.path.getsize(path),
+        duration_seconds=time.perf_counter() - started,
+        truncated=stream.truncated,
+    )
+    db.add(snapshot)
+    db.commit()
+    prune_snapshots(db, report.id)
+    return snapshot
+
+
+def prune_snapshots(db: Session, report_id: uuid.UUID, keep: Optional[int] = None) -> int:
+    """Deletes all but the newest `keep` snapshots of a report, files first. Returns how many."""
+    keep = settings.REPORT_SNAPSHOT_RETENTION if keep is None else keep
+    expired = (
+        db.query(models.ReportSnapshot)
+        .filter(models.ReportSnapshot.report_id == report_id)
+        .order_by(models.ReportSnapshot.created_at.desc())
+        .offset(keep)
+        .all()
+    )
+    for snapshot in expired:
+        try:
+            os.remove(snapshot.path)
+        except FileNotFoundError:
+            pass
+        db.delete(snapshot)
+    db.commit()
+    return len(expired)
+
+
+def read_snapshot(snapshot: models.ReportSnapshot, columns: Optional[List[str]] = None, offset: int = 0, limit: Optional[int] = None) -> "pa.Table":
+    """
+    Rows [offset, offset + limit) of a snapshot, with only the requested columns. Only the
+    row groups overlapping the range are read and decoded, and only for those columns.
+    Raises ValueError for an unknown column.
+    """
+    if not PYARROW_ENABLED:
+        raise RuntimeError("Report snapshots need pyarrow.")
+    parquet = pq.ParquetFile(snapshot.path, memory_map=True)
+    unknown = [name for name in columns or [] if name not in parquet.schema_arrow.names]
+    if unknown:
+        raise ValueError(f"Unknown snapshot column(s): {', '.join(unknown)}.")
+
+    metadata = parquet.metadata
+    end = metadata.num_rows if limit is None else min(offset + limit, metadata.num_rows)
+    groups, first_row, group_start = [], None, 0
+    for index in range(metadata.num_row_groups):
+        group_rows = metadata.row_group(index).num_rows
+        if group_start + group_rows > offset and group_start < end:
+            if first_row is None:
+                first_row = group_start
+            groups.append(index)
+        group_start += group_rows
+
+    if not groups:
+        empty = parquet.schema_arrow.empty_table()
+        return empty.select(columns) if columns else empty
+    table = parquet.read_row_groups(groups, columns=columns)
+    return table.slice(offset - first_row, end - offset)
+
+
+def arrow_ipc_bytes(table: "pa.Table") -> bytes:
+    """A table in the Arrow IPC stream format, which dashboards can load without parsing."""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
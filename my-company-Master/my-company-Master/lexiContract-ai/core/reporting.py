@@ -1,73 +1,383 @@
+import json
 import uuid
-from typing import List, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
 from fastapi import HTTPException, status
+from sqlalchemy import DateTime, Float, Integer, Numeric, String, func, literal_column, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from . import models, report_executor
+from .config import settings
+from .report_cache import cache_key
+from .search_cache import TTLCache
+
+# Report definitions (CustomReport.configuration) have the shape
+#   {"dataSource": "contracts",
+#    "columns": ["id", "filename"],                          # a row report, or
+#    "metrics": [{"field": "id", "aggregation": "count"}],   # an aggregated report
+#    "groupBy": {"field": "created_at", "timeBucket": "month"},
+#    "filters": [{"field": "negotiation_status", "operator": "eq", "value": "SIGNED"}],
+#    "dateRange": {"from": "2024-01-01", "to": "2024-07-01"} or {"lastDays": 30}}
+# Definitions in the older {"model", "columns", "filters": [{"column", ...}]} form are
+# normalized to this one before compiling.
+
+
+def _scope_contracts(query: Select, organization_id: uuid.UUID) -> Select:
+    return query.select_from(models.Contract).where(models.Contract.organization_id == organization_id)
+
 
-from . import models
+def _scope_analysis_suggestions(query: Select, organization_id: uuid.UUID) -> Select:
+    # Suggestions belong to a version; the organization is on its contract.
+    return (
+        query.select_from(models.AnalysisSuggestion)
+        .join(models.ContractVersion, models.ContractVersion.id == models.AnalysisSuggestion.contract_version_id)
+        .join(models.Contract, models.Contract.id == models.ContractVersion.contract_id)
+        .where(models.Contract.organization_id == organization_id)
+    )
 
-# A mapping from report model names to SQLAlchemy models
-# This acts as a safelist for what data can be reported on.
-MODEL_MAP = {
-    "Contract": models.Contract,
-    "User": models.User,
-    "TrackedObligation": models.TrackedObligation,
-    "ContractMilestone": models.ContractMilestone,
+
+def _scope_users(query: Select, organization_id: uuid.UUID) -> Select:
+    return query.select_from(models.User).where(models.User.organization_id == organization_id)
+
+
+class ReportSource(NamedTuple):
+    key: Any  # Unique column row reports are keyset-paginated by.
+    fields: Dict[str, Any]
+    scope: Callable[[Select, uuid.UUID], Select]  # Joins and the mandatory organization filter.
+    date_field: str  # What dateRange, and a range forced by the cost budget, filter on.
+    groupable: Tuple[str, ...]
+
+
+# The safelist of what can be reported on. Nothing outside it reaches a query.
+REPORT_SOURCES = {
+    "contracts": ReportSource(
+        key=models.Contract.id,
+        fields={
+            "id": models.Contract.id,
+            "filename": models.Contract.filename,
+            "negotiation_status": models.Contract.negotiation_status,
+            "analysis_status": models.Contract.analysis_status,
+            "team_id": models.Contract.team_id,
+            "uploader_id": models.Contract.uploader_id,
+            "created_at": models.Contract.created_at,
+            "updated_at": models.Contract.updated_at,
+        },
+        scope=_scope_contracts,
+        date_field="created_at",
+        groupable=("negotiation_status", "analysis_status", "team_id", "uploader_id", "created_at", "updated_at"),
+    ),
+    "analysis_suggestions": ReportSource(
+        key=models.AnalysisSuggestion.id,
+        fields={
+            "id": models.AnalysisSuggestion.id,
+            "risk_category": models.AnalysisSuggestion.risk_category,
+            "status": models.AnalysisSuggestion.status,
+            "confidence_score": models.AnalysisSuggestion.confidence_score,
+            "is_autonomous": models.AnalysisSuggestion.is_autonomous,
+            "contract_id": models.ContractVersion.contract_id,
+            # Suggestions are created with the version they analyse.
+            "created_at": models.ContractVersion.created_at,
+        },
+        scope=_scope_analysis_suggestions,
+        date_field="created_at",
+        groupable=("risk_category", "status", "is_autonomous", "contract_id", "created_at"),
+    ),
+    "users": ReportSource(
+        key=models.User.id,
+        fields={
+            "id": models.User.id,
+            "email": models.User.email,
+            "role": models.User.role,
+            "is_active": models.User.is_active,
+            "created_at": models.User.created_at,
+        },
+        scope=_scope_users,
+        date_field="created_at",
+        groupable=("role", "is_active", "created_at"),
+    ),
+}
+
+AGGREGATIONS = {
+    "count": func.count,
+    "avg": func.avg,
+    "sum": func.sum,
+    "min": func.min,
+    "max": func.max,
 }
+NUMERIC_AGGREGATIONS = ("avg", "sum")
+TIME_BUCKETS = ("day", "week", "month", "quarter", "year")
 
-# A mapping from string operators in the report definition to SQLAlchemy functions
-# This prevents arbitrary function execution.
-OPERATOR_MAP = {
-    "equals": lambda col, val: col == val,
-    "not_equals": lambda col, val: col != val,
+OPERATORS = {
+    "eq": lambda col, val: col == val,
+    "neq": lambda col, val: col != val,
+    "gt": lambda col, val: col > val,
+    "gte": lambda col, val: col >= val,
+    "lt": lambda col, val: col < val,
+    "lte": lambda col, val: col <= val,
+    "in": lambda col, val: col.in_(val),
+    "not_in": lambda col, val: ~col.in_(val),
     "contains": lambda col, val: col.contains(val, autoescape=True),
-    "greater_than": lambda col, val: col > val,
-    "less_than": lambda col, val: col < val,
-    "is_in": lambda col, val: col.in_(val),
-    "is_not_in": lambda col, val: ~col.in_(val),
+    "is_null": lambda col, val: col.is_(None) if val else col.isnot(None),
 }
 
-def execute_report_query(db: Session, report: models.CustomReport, organization_id: uuid.UUID) -> List[Dict[str, Any]]:
+# The older definition format's names for the same things.
+LEGACY_SOURCES = {"Contract": "contracts", "User": "users"}
+LEGACY_OPERATORS = {
+    "equals": "eq",
+    "not_equals": "neq",
+    "greater_than": "gt",
+    "less_than": "lt",
+    "is_in": "in",
+    "is_not_in": "not_in",
+    "contains": "contains",
+}
+
+
+def _invalid(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def normalize_definition(definition: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the definition in the current format, converting the older model/columns one."""
+    if "model" not in definition:
+        return definition
+    model_name = definition.get("model")
+    if model_name not in LEGACY_SOURCES:
+        raise _invalid(f"Invalid model '{model_name}' in report definition.")
+    return {
+        "dataSource": LEGACY_SOURCES[model_name],
+        "columns": definition.get("columns", []),
+        "filters": [
+            {"field": f.get("column"), "operator": LEGACY_OPERATORS.get(f.get("operator"), f.get("operator")), "value": f.get("value")}
+            for f in definition.get("filters", [])
+        ],
+    }
+
+
+def _is_numeric(column) -> bool:
+    return isinstance(column.type, (Integer, Float, Numeric))
+
+
+def _parse_datetime(value, name: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise _invalid(f"Invalid dateRange '{name}': expected an ISO 8601 date.")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def forced_range_start(now: Optional[datetime] = None) -> datetime:
     """
-    Dynamically builds and executes a SQLAlchemy query based on a CustomReport definition.
-    Ensures that all queries are scoped to the user's organization for security.
+    Start of the date range the cost budget forces on a report. It is midnight UTC, so it
+    only moves once a day and cursors and cached pages stay valid until then.
     """
-    definition = report.definition
-    model_name = definition.get("model")
-    columns = definition.get("columns", [])
-    filters = definition.get("filters", [])
+    now = now or datetime.now(timezone.utc)
+    start = now - timedelta(days=settings.REPORT_DEFAULT_DATE_RANGE_DAYS)
+    return start.replace(hour=0, minute=0, second=0, microsecond=0)
+
 
-    if not model_name or model_name not in MODEL_MAP:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid model '{model_name}' in report definition.")
+class ReportPlan(NamedTuple):
+    query: Select
+    key_column: Any  # None for aggregated reports, which are returned in one page.
+    data_source: str
+    date_field: str
+    # Set when the report was over the cost budget and limited to rows since this time.
+    forced_since: Optional[datetime] = None
+    cost: Optional[float] = None
+    estimated_rows: Optional[int] = None
+    explain: Optional[Dict[str, Any]] = None
 
-    model = MODEL_MAP[model_name]
+    @property
+    def aggregated(self) -> bool:
+        return self.key_column is None
 
-    if not hasattr(model, "organization_id"):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Model '{model_name}' cannot be used in reports as it is not organization-scoped.")
 
-    if not columns:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Report definition must include at least one column.")
+def compile_report(definition: Dict[str, Any], organization_id: uuid.UUID, forced_since: Optional[datetime] = None) -> ReportPlan:
+    """
+    Validates a report definition against the safelist and compiles it into a query scoped
+    to the organization. Raises a 400 HTTPException for anything invalid. `forced_since`
+    limits the report to rows whose date field is at or after it.
+    """
+    definition = normalize_definition(definition or {})
+    data_source = definition.get("dataSource")
+    if data_source not in REPORT_SOURCES:
+        raise _invalid(f"Invalid data source '{data_source}' in report definition.")
+    source = REPORT_SOURCES[data_source]
 
-    # Start building the query by selecting the safe-listed columns
-    query = select(*[getattr(model, col) for col in columns if hasattr(model, col)])
+    def field(name: Optional[str], purpose: str):
+        if name not in source.fields:
+            raise _invalid(f"Invalid {purpose} field '{name}' for data source '{data_source}'.")
+        return source.fields[name]
 
-    # CRITICAL: Always filter by the user's organization for data isolation.
-    query = query.where(model.organization_id == organization_id)
+    selected = []
+    group_column = None
+    group_by = definition.get("groupBy")
+    metrics = definition.get("metrics") or []
+    if group_by:
+        name = group_by.get("field")
+        group_column = field(name, "groupBy")
+        if name not in source.groupable:
+            raise _invalid(f"Reports cannot be grouped by '{name}'.")
+        bucket = group_by.get("timeBucket")
+        if isinstance(group_column.type, DateTime):
+            if bucket not in TIME_BUCKETS:
+                raise _invalid(f"Grouping by '{name}' needs a timeBucket, one of: {', '.join(TIME_BUCKETS)}.")
+            # A literal, not a bound parameter, so the selected and grouped expressions are identical.
+            group_column = func.date_trunc(literal_column(f"'{bucket}'"), group_column, type_=DateTime(timezone=True))
+            name = f"{name}_{bucket}"
+        elif bucket:
+            raise _invalid(f"timeBucket only applies to date fields, not '{name}'.")
+        selected.append(group_column.label(name))
 
-    # Apply filters from the report definition
-    for f in filters:
-        col_name = f.get("column")
-        op_name = f.get("operator")
-        value = f.get("value")
+    for metric in metrics:
+        name, aggregation = metric.get("field"), metric.get("aggregation")
+        column = field(name, "metric")
+        if aggregation not in AGGREGATIONS:
+            raise _invalid(f"Invalid aggregation '{aggregation}'.")
+        if aggregation in NUMERIC_AGGREGATIONS and not _is_numeric(column):
+            raise _invalid(f"'{aggregation}' needs a numeric field, not '{name}'.")
+        selected.append(AGGREGATIONS[aggregation](column).label(f"{name}_{aggregation}"))
 
-        if not all([col_name, op_name, value is not None]) or not hasattr(model, col_name) or op_name not in OPERATOR_MAP:
-            continue # Skip malformed or unsafe filters
+    aggregated = bool(group_by or metrics)
+    if aggregated and not metrics:
+        raise _invalid("An aggregated report needs at least one metric.")
+    if not aggregated:
+        columns = definition.get("columns") or []
+        if not columns:
+            raise _invalid("Report definition must include at least one column or metric.")
+        selected = [field(name, "column").label(name) for name in columns]
 
-        column_attr = getattr(model, col_name)
-        operator_func = OPERATOR_MAP[op_name]
-        
-        query = query.where(operator_func(column_attr, value))
+    query = source.scope(select(*selected), organization_id)
 
-    # Execute the query and return the results as a list of dictionaries
-    results = db.execute(query).mappings().all()
-    return [dict(row) for row in results]
\ No newline at end of file
+    for f in definition.get("filters") or []:
+        name, operator, value = f.get("field"), f.get("operator"), f.get("value")
+        column = field(name, "filter")
+        if operator not in OPERATORS:
+            raise _invalid(f"Invalid filter operator '{operator}'.")
+        if operator in ("in", "not_in") and not isinstance(value, list):
+            raise _invalid(f"The '{operator}' operator needs a list value.")
+        if operator == "contains" and not isinstance(column.type, String):
+            raise _invalid(f"The 'contains' operator only applies to text fields, not '{name}'.")
+        query = query.where(OPERATORS[operator](column, value))
+
+    date_column = source.fields[source.date_field]
+    date_range = definition.get("dateRange")
+    if date_range:
+        if "lastDays" in date_range:
+            try:
+                days = int(date_range["lastDays"])
+            except (TypeError, ValueError):
+                raise _invalid("dateRange 'lastDays' must be a whole number of days.")
+            query = query.where(date_column >= datetime.now(timezone.utc) - timedelta(days=days))
+        if date_range.get("from"):
+            query = query.where(date_column >= _parse_datetime(date_range["from"], "from"))
+        if date_range.get("to"):
+            query = query.where(date_column < _parse_datetime(date_range["to"], "to"))
+    if forced_since is not None:
+        query = query.where(date_column >= forced_since)
+
+    if group_column is not None:
+        query = query.group_by(group_column).order_by(group_column)
+
+    return ReportPlan(
+        query=query,
+        key_column=None if aggregated else source.key,
+        data_source=data_source,
+        date_field=source.date_field,
+        forced_since=forced_since,
+    )
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a query. The planner's estimate only: the query is not run."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def explain_query(db: Session, query: Select) -> Dict[str, Any]:
+    """The root node of the query's plan, with its "Total Cost" and "Plan Rows" estimates."""
+    document = db.execute(Explain(query)).scalar()
+    if isinstance(document, str):
+        document = json.loads(document)
+    return document[0]["Plan"]
+
+
+def _with_estimate(plan: ReportPlan, node: Dict[str, Any]) -> ReportPlan:
+    return plan._replace(cost=float(node["Total Cost"]), estimated_rows=int(node["Plan Rows"]), explain=node)
+
+
+def _over_budget(plan: ReportPlan) -> bool:
+    return plan.cost > settings.REPORT_MAX_PLAN_COST
+
+
+# Whether a definition needed a forced date range, so only a cold definition pays for EXPLAIN.
+_budget_decisions = TTLCache(maxsize=settings.REPORT_CACHE_SIZE, ttl=settings.REPORT_CACHE_TTL)
+
+
+def plan_report(db: Session, definition: Dict[str, Any], organization_id: uuid.UUID, enforce_budget: bool = True) -> ReportPlan:
+    """
+    Compiles a definition and checks the planner's cost estimate against
+    REPORT_MAX_PLAN_COST. A report over budget that does not set its own dateRange is
+    limited to the last REPORT_DEFAULT_DATE_RANGE_DAYS days and estimated again; one that
+    is still over is rejected with a 400, unless `enforce_budget` is False (for explaining
+    it). Plans from the budget cache carry no estimate.
+    """
+    key = cache_key(organization_id, definition)
+    if enforce_budget:
+        decision = _budget_decisions.get(key)
+        if decision is not None:
+            return compile_report(definition, organization_id, forced_range_start() if decision else None)
+
+    plan = compile_report(definition, organization_id)
+    plan = _with_estimate(plan, explain_query(db, plan.query))
+    if _over_budget(plan) and not normalize_definition(definition).get("dateRange"):
+        limited = compile_report(definition, organization_id, forced_range_start())
+        plan = _with_estimate(limited, explain_query(db, limited.query))
+    if _over_budget(plan):
+        if enforce_budget:
+            raise _invalid(
+                f"Report is too expensive to run (estimated cost {plan.cost:.0f}, budget "
+                f"{settings.REPORT_MAX_PLAN_COST:.0f}). Add filters or a narrower dateRange."
+            )
+        return plan
+    _budget_decisions.set(key, plan.forced_since is not None)
+    return plan
+
+
+def execute_plan(db: Session, plan: ReportPlan, after=None, page_size: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+    """
+    One page of a report: (rows, key of the last row when there are more pages, or None).
+    Aggregated reports are one page of up to REPORT_MAX_PAGE_SIZE groups.
+    """
+    if not plan.aggregated:
+        return report_executor.keyset_page(db, plan.query, plan.key_column, after=after, page_size=page_size)
+    stream = report_executor.ReportStream(
+        db, plan.query, max_rows=settings.REPORT_MAX_PAGE_SIZE,
+        max_seconds=settings.REPORT_MAX_SECONDS, batch_size=settings.REPORT_STREAM_BATCH_SIZE,
+    )
+    rows = list(stream)
+    if stream.truncated:
+        raise _invalid(f"Report exceeded its {stream.truncated.replace('_', ' ')}; group by a coarser field or add filters.")
+    return rows, None
+
+
+def execute_report_query(db: Session, report: models.CustomReport, organization_id: uuid.UUID) -> List[Dict[str, Any]]:
+    """
+    Executes a CustomReport and returns the first page of its rows. Use execute_plan or
+    report_executor to page or stream through larger reports.
+    """
+    plan = plan_report(db, report.configuration, organization_id)
+    rows, _ = execute_plan(db, plan)
+    return rows
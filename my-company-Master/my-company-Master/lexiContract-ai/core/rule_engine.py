@@ -0,0 +1,146 @@
+import re
+import uuid
+from re import _constants as sre_constants, _parser as sre_parse
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Playbook patterns are written in lower case (see jobs/seed_playbooks.py) and matched case-insensitively.
+RULE_FLAGS = re.IGNORECASE
+# A rule whose matches can start with more distinct literals than this is scanned on its own.
+MAX_ANCHORS_PER_RULE = 64
+
+
+class RuleMatch(NamedTuple):
+    rule_id: uuid.UUID
+    start: int
+    end: int
+
+
+def _prefix_literals(items) -> Optional[Set[str]]:
+    """
+    Returns a set of literals one of which every match of the parsed pattern `items`
+    must start with, or None when no such set exists (e.g. the pattern starts with a
+    character class).
+    """
+    prefixes = {""}
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            prefixes = {prefix + chr(av).lower() for prefix in prefixes}
+            continue
+        if op is sre_constants.SUBPATTERN:
+            tails = _prefix_literals(av[3])
+        elif op is sre_constants.BRANCH:
+            tails = set()
+            for alternative in av[1]:
+                alternative_tails = _prefix_literals(alternative)
+                if alternative_tails is None:
+                    tails = None
+                    break
+                tails |= alternative_tails
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            tails = _prefix_literals(av[2])
+        else:
+            tails = None
+        # Whatever follows a group, branch or repeat is not needed for a valid prefix.
+        if tails is not None:
+            prefixes = {prefix + tail for prefix in prefixes for tail in tails}
+        break
+    if "" in prefixes or len(prefixes) > MAX_ANCHORS_PER_RULE:
+        return None
+    return prefixes
+
+
+def rule_anchors(pattern: str) -> Optional[Set[str]]:
+    """Lower-cased literal prefixes of a rule pattern, or None if it has none."""
+    try:
+        return _prefix_literals(sre_parse.parse(pattern, RULE_FLAGS))
+    except re.error:
+        return None
+
+
+def _trie_pattern(literals: Iterable[str]) -> str:
+    """Builds a regex matching any of `literals`, factored as a prefix trie so each branch point is tried once."""
+    trie: dict = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: dict) -> str:
+        optional = "" in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if optional:
+            return "(?:" + "|".join(branches) + ")?"
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return render(trie)
+
+
+class CompiledRuleSet:
+    """
+    An organization's playbook rules compiled for a single pass over the text.
+
+    Every rule whose matches must start with one of a few literals (almost all playbook
+    rules) contributes those literals to one prefix-trie regex. A single scan finds each
+    position where any anchor starts; only the rules owning those anchors are then tried
+    at that position. Rules without literal anchors are run on their own.
+
+    Matches are identical to running `re.finditer` for each rule separately: each rule
+    keeps only matches that don't overlap its previous one.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[uuid.UUID, str]]):
+        self.rule_ids: List[uuid.UUID] = []
+        self.patterns: List[re.Pattern] = []
+        self.unanchored: List[int] = []
+        self.anchor_rules: Dict[str, List[int]] = {}
+        for rule_id, pattern in rules:
+            try:
+                compiled = re.compile(pattern, RULE_FLAGS)
+            except re.error as e:
+                print(f"Skipping playbook rule {rule_id}: invalid pattern {pattern!r}: {e}")
+                continue
+            index = len(self.rule_ids)
+            self.rule_ids.append(rule_id)
+            self.patterns.append(compiled)
+            anchors = rule_anchors(pattern)
+            if anchors is None:
+                self.unanchored.append(index)
+                continue
+            for anchor in anchors:
+                self.anchor_rules.setdefault(anchor, []).append(index)
+
+        self.anchor_lengths = sorted({len(anchor) for anchor in self.anchor_rules})
+        # The lookahead makes the scan report every start position, including overlapping anchors.
+        self.prefilter = re.compile(f"(?=({_trie_pattern(self.anchor_rules)}))", RULE_FLAGS) if self.anchor_rules else None
+
+    def __len__(self):
+        return len(self.rule_ids)
+
+    def scan(self, text: str) -> List[RuleMatch]:
+        """Returns every rule match as (rule_id, start, end), ordered by start offset."""
+        matches: List[Tuple[int, int, int]] = []
+        if self.prefilter is not None:
+            last_end = [0] * len(self.rule_ids)
+            for anchor_match in self.prefilter.finditer(text):
+                start = anchor_match.start()
+                window = anchor_match.group(1).lower()
+                candidates = set()
+                for length in self.anchor_lengths:
+                    if length > len(window):
+                        break
+                    candidates.update(self.anchor_rules.get(window[:length], ()))
+                for index in sorted(candidates):
+                    if start < last_end[index]:
+                        continue
+                    rule_match = self.patterns[index].match(text, start)
+                    if rule_match is None or rule_match.end() == start:
+                        continue
+                    matches.append((start, rule_match.end(), index))
+                    last_end[index] = rule_match.end()
+        for index in self.unanchored:
+            matches.extend((m.start(), m.end(), index) for m in self.patterns[index].finditer(text) if m.end() > m.start())
+        matches.sort()
+        return [RuleMatch(self.rule_ids[index], start, end) for start, end, index in matches]
@@ -76,6 +76,35 @@ class Contract(BaseModel):
     class Config:
         from_attributes = True
 
+class ContractSearchResult(Contract):
+    version_id: UUID
+    rank: float
+    highlighted_snippet: Optional[str] = None
+    snippet_start: Optional[int] = None
+    snippet_end: Optional[int] = None
+
+class HybridSearchResult(BaseModel):
+    contract_id: UUID
+    version_id: UUID
+    filename: Optional[str] = None
+    score: float
+    lexical_rank: Optional[int] = None
+    vector_rank: Optional[int] = None
+    snippet: Optional[str] = None
+    start_index: Optional[int] = None
+    end_index: Optional[int] = None
+
+class HybridSearchTimings(BaseModel):
+    lexical_ms: float
+    vector_ms: float
+    fusion_ms: float
+    total_ms: float
+    degraded: List[str] = []
+
+class HybridSearchResponse(BaseModel):
+    results: List[HybridSearchResult]
+    timings: HybridSearchTimings
+
 class ContractDetail(Contract):
     versions: List["ContractVersion"] = []
 
@@ -175,6 +204,27 @@ class CustomReport(CustomReportBase):
 class ReportExecuteRequest(BaseModel):
     configuration: Dict[str, Any]
 
+class ReportScheduleUpdate(BaseModel):
+    # "daily", "weekly" or "monthly"; null stops scheduled snapshots.
+    schedule: Optional[str] = None
+
+class ReportSchedule(BaseModel):
+    report_id: uuid.UUID
+    schedule: Optional[str] = None
+    next_run_at: Optional[datetime] = None
+
+class ReportSnapshot(BaseModel):
+    id: uuid.UUID
+    report_id: uuid.UUID
+    created_at: datetime
+    columns: List[Dict[str, str]]
+    row_count: int
+    size_bytes: int
+    duration_seconds: float
+    truncated: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
 class ContractTeamAssignment(BaseModel):
     team_id: Optional[uuid.UUID] = None
 
@@ -540,7 +590,10 @@ class TopFlaggedContract(BaseModel):
 class AnalyticsKPIs(BaseModel):
     total_contracts: int
     contracts_in_progress: int
-    average_cycle_time_days: float
+    # Creation to signature, over signed contracts; None until the organization has one.
+    average_cycle_time_days: Optional[float] = None
+    cycle_time_p50_days: Optional[float] = None
+    cycle_time_p90_days: Optional[float] = None
 
 
 class RiskDistribution(BaseModel):
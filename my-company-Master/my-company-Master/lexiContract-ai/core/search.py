@@ -1,73 +1,129 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
-import uuid
+import asyncio
+
+from .chunking import Chunk, chunk_text, tokenizer_token_counter
+from .config import settings
+from .embeddings import get_embedder
+from .indexing import IndexingPipeline, DEFAULT_EMBEDDING_BATCH_SIZE, chunk_id
+from .search_cache import SearchCache, tokenizer_lowercases
+from .vector_store import create_vector_store
+
+# all-MiniLM-L6-v2 truncates input at 256 word pieces; keep chunks comfortably below that.
+CHUNK_SIZE_TOKENS = 200
+CHUNK_OVERLAP_TOKENS = 40
 
 class SearchService:
+    """
+    Semantic search over contract chunks. The vector store backend is chosen by
+    VECTOR_STORE_BACKEND; its connection and the embedding model are created on
+    first use, so importing this module (and `main.app`) stays cheap.
+    """
+
     def __init__(self):
-        try:
-            # Using a persistent client that connects to the ChromaDB server.
-            # The host name 'chroma' matches the service name in docker-compose.yml.
-            self.chroma_client = chromadb.HttpClient(host='chroma', port=8000)
-            
-            # Ensure the collection exists. This is idempotent.
-            self.collection = self.chroma_client.get_or_create_collection(name="contracts")
-            
-            # Load a pre-trained model optimized for semantic search.
-            # This model will be downloaded on first run.
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
-            print("SearchService initialized successfully.")
-        except Exception as e:
-            print(f"CRITICAL: Failed to initialize SearchService: {e}")
-            self.chroma_client = None
-            self.model = None
+        self.store = create_vector_store()
+        self.model = get_embedder()
+        self.cache = SearchCache(lowercase=lambda: tokenizer_lowercases(self.model.tokenizer))
 
-    def _chunk_text(self, text: str, chunk_size: int = 500, overlap: int = 50) -> list[str]:
-        """Splits text into paragraphs as a simple chunking strategy."""
-        paragraphs = text.split('\n\n')
-        return [p.strip() for p in paragraphs if p.strip()]
+    def _chunk_text(self, text: str, chunk_size: int = CHUNK_SIZE_TOKENS, overlap: int = CHUNK_OVERLAP_TOKENS) -> list[Chunk]:
+        """
+        Splits text into overlapping, sentence-aligned chunks sized in model tokens.
+        Each chunk keeps its character offsets into the source text.
+        """
+        count_tokens = tokenizer_token_counter(self.model.tokenizer)
+        return chunk_text(text, chunk_size=chunk_size, overlap=overlap, count_tokens=count_tokens)
 
-    def index_document(self, contract_id: str, version_id: str, organization_id: str, text: str):
-        if not self.chroma_client or not self.model:
-            print("SearchService is not available. Skipping document indexing.")
-            return
+    def index_document(self, contract_id: str, version_id: str, organization_id: str, text: str) -> dict:
+        return self.index_documents([(contract_id, version_id, organization_id, text)])
 
-        chunks = self._chunk_text(text)
-        if not chunks:
-            return
+    def index_documents(self, jobs: list[tuple[str, str, str, str]], batch_size: int = DEFAULT_EMBEDDING_BATCH_SIZE) -> dict:
+        """
+        Indexes a batch of (contract_id, version_id, organization_id, text) jobs.
+        Chunks are embedded across documents in fixed-size batches, and chunks that
+        are already in the vector store are skipped.
+        """
+        pipeline = IndexingPipeline(self, batch_size=batch_size, latest_only=settings.VECTOR_INDEX_MODE == "latest")
+        for contract_id, version_id, organization_id, text in jobs:
+            pipeline.enqueue(contract_id, version_id, organization_id, text)
+        stats = pipeline.run()
+        for organization_id in {str(job[2]) for job in jobs}:
+            self.cache.invalidate(organization_id)
+        return stats
 
-        embeddings = self.model.encode(chunks).tolist()
-        metadata = [{
-            "contract_id": contract_id,
-            "version_id": version_id,
-            "organization_id": organization_id
-        } for _ in chunks]
-        
-        # Generate unique IDs for each chunk
-        ids = [str(uuid.uuid4()) for _ in chunks]
+    def delete_contract(self, organization_id: str, contract_id: str) -> int:
+        """Removes every vector of a contract. Returns the number of vectors deleted."""
+        if not self.store.available:
+            return 0
+        self.cache.invalidate(str(organization_id))
+        return self.store.delete(str(organization_id), where={"contract_id": str(contract_id)})
 
-        self.collection.add(embeddings=embeddings, documents=chunks, metadatas=metadata, ids=ids)
-        print(f"Successfully indexed {len(chunks)} chunks for contract {contract_id}.")
+    def delete_version(self, organization_id: str, contract_id: str, version_id: str, remaining: list[tuple[str, str]] = ()) -> int:
+        """
+        Removes the vectors of a deleted version. Chunks are shared between versions of a
+        contract, so only chunks that none of the `remaining` (version_id, text) versions
+        contain are deleted; the remaining versions are then re-indexed so the kept chunks
+        point at a version that still exists. Returns the number of vectors deleted.
+        """
+        if not self.store.available:
+            return 0
+        organization_id, contract_id = str(organization_id), str(contract_id)
+        indexed = self.store.list_metadata(organization_id, where={"version_id": str(version_id)})
+        if not indexed:
+            return 0
+        referenced = {
+            chunk_id(organization_id, contract_id, chunk.text)
+            for _, text in remaining
+            for chunk in self._chunk_text(text)
+        }
+        stale = [cid for cid in indexed if cid not in referenced]
+        deleted = self.store.delete(organization_id, ids=stale) if stale else 0
+        if remaining:
+            self.index_documents([(contract_id, str(remaining_id), organization_id, text) for remaining_id, text in remaining])
+        self.cache.invalidate(organization_id)
+        return deleted
 
     def semantic_search(self, query_text: str, organization_id: str, limit: int = 10) -> list[dict]:
-        if not self.chroma_client or not self.model:
+        """
+        Returns the organization's chunks closest to the query. Repeated queries are
+        served from the result cache until the organization's index changes, and query
+        embeddings are cached by normalized text.
+        """
+        cached = self.cache.get_results(organization_id, query_text, limit)
+        if cached is not None:
+            return cached
+        return self._search_uncached(query_text, organization_id, limit)
+
+    def _search_uncached(self, query_text: str, organization_id: str, limit: int) -> list[dict]:
+        # Read the generation before querying, so results racing an index write are never
+        # stored under the post-write generation.
+        generation = self.cache.generation(organization_id)
+        if not self.store.available or not self.model:
             print("SearchService is not available. Cannot perform search.")
             return []
 
-        query_embedding = self.model.encode([query_text]).tolist()
-        
-        results = self.collection.query(
-            query_embeddings=query_embedding,
-            n_results=limit,
-            where={"organization_id": organization_id}
-        )
+        query_embedding = self.cache.embedding(query_text, lambda text: self.model.encode([text]).tolist()[0])
+        hits = self.store.query(query_embedding, organization_id=organization_id, limit=limit)
 
-        # The query returns lists of lists, one for each query embedding. We only have one.
-        ids = results['ids'][0]
-        documents = results['documents'][0]
-        metadatas = results['metadatas'][0]
-        distances = results['distances'][0] # Chroma's distance is a measure of similarity
+        results = [
+            {
+                "id": hit["id"],
+                "snippet": hit["document"],
+                "metadata": hit["metadata"],
+                "score": hit["score"],
+                "start_index": hit["metadata"].get("start_index"),
+                "end_index": hit["metadata"].get("end_index"),
+            }
+            for hit in hits
+        ]
+        self.cache.set_results(organization_id, query_text, limit, results, generation)
+        return results
 
-        return [{"id": id, "snippet": doc, "metadata": meta, "score": 1 - dist} for id, doc, meta, dist in zip(ids, documents, metadatas, distances)]
+    async def semantic_search_async(self, query_text: str, organization_id: str, limit: int = 10) -> list[dict]:
+        """
+        Async variant for use on the event loop. The whole search runs on a worker thread,
+        cache lookup included: with Redis configured the lookup is a network round trip,
+        and a slow Redis must not block the loop.
+        """
+        return await asyncio.to_thread(self.semantic_search, query_text, organization_id, limit)
 
-# Create a single, shared instance of the service
+# Create a single, shared instance of the service. Construction is cheap: no network
+# connection or model load happens until the first index or search call.
 search_service = SearchService()
\ No newline at end of file
@@ -0,0 +1,173 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from .config import settings
+
+# redis is optional. Without it, both caches are per-process only.
+try:
+    import redis
+    REDIS_ENABLED = True
+except ImportError:
+    redis = None
+    REDIS_ENABLED = False
+
+
+def normalize_query(text: str, lowercase: bool = False) -> str:
+    # Whitespace never changes the embedding; case only doesn't when the tokenizer lowercases.
+    return " ".join((text.lower() if lowercase else text).split())
+
+
+def tokenizer_lowercases(tokenizer) -> bool:
+    """True if the Hugging Face tokenizer lowercases its input (e.g. uncased BERT models)."""
+    if getattr(tokenizer, "do_lower_case", False):
+        return True
+    return bool(getattr(tokenizer, "init_kwargs", {}).get("do_lower_case", False))
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after insertion."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class SearchCache:
+    """
+    Query-embedding and result caches for semantic search.
+
+    Embeddings are keyed by normalized query text (lowercased only if the model's
+    tokenizer lowercases) and cached in-process. When REDIS_URL
+    points at Redis they are also shared across workers.
+
+    Results are cached per organization under that organization's index generation.
+    The generation is bumped whenever the organization's vectors change, which makes
+    older entries unreachable. Without Redis the generation is per-process, so other
+    workers can serve stale results for up to SEARCH_RESULT_CACHE_TTL seconds.
+    """
+
+    def __init__(self, redis_url: str = settings.REDIS_URL, model_name: str = settings.EMBEDDING_MODEL_NAME,
+                 lowercase: Optional[Callable[[], bool]] = None):
+        self.embeddings = TTLCache(settings.SEARCH_EMBEDDING_CACHE_SIZE, settings.SEARCH_EMBEDDING_CACHE_TTL)
+        self.results = TTLCache(settings.SEARCH_RESULT_CACHE_SIZE, settings.SEARCH_RESULT_CACHE_TTL)
+        self.model_name = model_name
+        # Whether queries differing only in case share entries. Resolved on first use,
+        # since it needs the embedding model's tokenizer.
+        self._lowercase_source = lowercase
+        self._lowercase: Optional[bool] = None
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+        self._redis = None
+        if REDIS_ENABLED and redis_url.startswith(("redis://", "rediss://", "unix://")):
+            # The client connects lazily on its first command.
+            self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.1)
+
+    def _redis_call(self, method: str, *args):
+        try:
+            return getattr(self._redis, method)(*args)
+        except Exception as e:
+            self.redis_errors += 1
+            print(f"SearchCache: Redis {method} failed: {e}")
+            return None
+
+    def normalize(self, query_text: str) -> str:
+        if self._lowercase is None:
+            try:
+                self._lowercase = bool(self._lowercase_source()) if self._lowercase_source else False
+            except Exception as e:
+                print(f"SearchCache: could not tell whether the tokenizer lowercases, keeping case: {e}")
+                self._lowercase = False
+        return normalize_query(query_text, self._lowercase)
+
+    def embedding(self, query_text: str, encode: Callable[[str], List[float]]) -> List[float]:
+        """Returns the query's embedding, calling `encode(normalized_text)` only on a miss."""
+        key = self.normalize(query_text)
+        vector = self.embeddings.get(key)
+        if vector is not None:
+            return vector
+
+        redis_key = None
+        if self._redis is not None:
+            digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+            redis_key = f"search:qemb:{self.model_name}:{digest}"
+            raw = self._redis_call("get", redis_key)
+            if raw:
+                self.redis_hits += 1
+                vector = np.frombuffer(raw, dtype=np.float32).tolist()
+                self.embeddings.set(key, vector)
+                return vector
+            self.redis_misses += 1
+
+        vector = encode(key)
+        self.embeddings.set(key, vector)
+        if redis_key is not None:
+            self._redis_call("setex", redis_key, int(self.embeddings.ttl), np.asarray(vector, dtype=np.float32).tobytes())
+        return vector
+
+    def generation(self, organization_id: str) -> int:
+        if self._redis is not None:
+            value = self._redis_call("get", f"search:gen:{organization_id}")
+            if value is not None:
+                return int(value)
+        return self._generations.get(organization_id, 0)
+
+    def invalidate(self, organization_id: str):
+        """Marks the organization's index as changed, retiring its cached results."""
+        with self._lock:
+            self._generations[organization_id] = self._generations.get(organization_id, 0) + 1
+        if self._redis is not None:
+            self._redis_call("incr", f"search:gen:{organization_id}")
+
+    def get_results(self, organization_id: str, query_text: str, limit: int) -> Optional[list]:
+        return self.results.get((organization_id, self.generation(organization_id), self.normalize(query_text), limit))
+
+    def set_results(self, organization_id: str, query_text: str, limit: int, results: list, generation: int):
+        self.results.set((organization_id, generation, self.normalize(query_text), limit), results)
+
+    def stats(self) -> dict:
+        return {
+            "query_embeddings": dict(self.embeddings.stats(), redis_hits=self.redis_hits, redis_misses=self.redis_misses),
+            "results": self.results.stats(),
+            "redis_enabled": self._redis is not None,
+            "redis_errors": self.redis_errors,
+        }
@@ -1,22 +1,175 @@
 import io
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, NamedTuple
+
 from pypdf import PdfReader
 
-def extract_text_from_file(file_contents: bytes, filename: str) -> str:
-    """Extracts text from a file's contents based on its extension."""
-    extracted_text = ""
+from .config import settings
+
+# Pages extracted per worker task.
+PDF_PAGES_PER_TASK = 8
+# PDFs with fewer pages are extracted inline; the process pool only pays off above this.
+PDF_PARALLEL_MIN_PAGES = 16
+# Tasks queued per worker. With PDF_PAGES_PER_TASK this caps how much page text is
+# buffered at once, independent of the document's size.
+PDF_TASKS_IN_FLIGHT_PER_WORKER = 2
+# Workers are replaced after this many tasks so pypdf's parsed-object cache cannot grow without bound.
+PDF_WORKER_MAX_TASKS = 64
+# Uploads are copied to disk in chunks of this size.
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+class PageText(NamedTuple):
+    page_number: int
+    # Offsets of `text` within the full extracted text, where pages are joined by "\n".
+    start_index: int
+    end_index: int
+    text: str
+
+
+_pdf_pool = None
+_pdf_pool_workers = 0
+_pdf_pool_lock = threading.Lock()
+
+# Each worker process keeps the reader for the last file it opened, so consecutive
+# page ranges of one document don't re-parse the cross-reference table.
+_worker_reader = (None, None)
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool, _pdf_pool_workers
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool_workers = settings.PDF_EXTRACTION_WORKERS or os.cpu_count() or 1
+            _pdf_pool = ProcessPoolExecutor(max_workers=_pdf_pool_workers, max_tasks_per_child=PDF_WORKER_MAX_TASKS)
+        return _pdf_pool
+
+
+def shutdown_pdf_pool():
+    """Stops the extraction workers, e.g. on application shutdown."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(cancel_futures=True)
+            _pdf_pool = None
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> list:
+    """Runs in a worker process: returns the text of pages [start, stop)."""
+    global _worker_reader
+    stat = os.stat(path)
+    key = (path, stat.st_ino, stat.st_mtime_ns)
+    if _worker_reader[0] != key:
+        _worker_reader = (key, PdfReader(path))
+    reader = _worker_reader[1]
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _iter_pages_parallel(path: str, page_count: int) -> Iterator[str]:
+    pool = _get_pdf_pool()
+    starts = iter(range(0, page_count, PDF_PAGES_PER_TASK))
+    pending = deque()
+
+    def submit_next():
+        start = next(starts, None)
+        if start is not None:
+            pending.append(pool.submit(_extract_page_range, path, start, min(start + PDF_PAGES_PER_TASK, page_count)))
+
+    for _ in range(_pdf_pool_workers * PDF_TASKS_IN_FLIGHT_PER_WORKER):
+        submit_next()
+    try:
+        while pending:
+            texts = pending.popleft().result()
+            submit_next()
+            yield from texts
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def iter_pdf_pages(path: str) -> Iterator[PageText]:
+    """
+    Yields the text of each page of the PDF at `path`, in order, with its offsets in the
+    full text. Large documents are extracted in a process pool with a bounded number of
+    pages in flight, so memory use doesn't grow with page count.
+    """
+    reader = PdfReader(path)
+    page_count = len(reader.pages)
+    if page_count < PDF_PARALLEL_MIN_PAGES:
+        texts = (page.extract_text() or "" for page in reader.pages)
+    else:
+        del reader
+        texts = _iter_pages_parallel(path, page_count)
+
+    offset = 0
+    for page_number, text in enumerate(texts):
+        yield PageText(page_number, offset, offset + len(text), text)
+        offset += len(text) + 1
+
+
+@contextmanager
+def spooled_upload(source: BinaryIO, suffix: str = "") -> Iterator[str]:
+    """Copies a file-like upload to a temporary file in fixed-size chunks and yields its path."""
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as spool:
+        shutil.copyfileobj(source, spool, SPOOL_CHUNK_BYTES)
+    try:
+        yield spool.name
+    finally:
+        os.unlink(spool.name)
+
+
+def save_upload(source: BinaryIO, filename: str, directory: str = settings.ANALYSIS_UPLOAD_DIR) -> str:
+    """
+    Copies a file-like upload into `directory` in fixed-size chunks and returns its path.
+    Unlike spooled_upload the file is kept, so a queued analysis job can read it later;
+    whoever finishes with it deletes it.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, uuid.uuid4().hex + os.path.splitext(filename)[1].lower())
+    with open(path, "wb") as f:
+        shutil.copyfileobj(source, f, SPOOL_CHUNK_BYTES)
+    return path
+
+
+def extract_text_from_path(path: str, filename: str, utf8_fallback: bool = False) -> str:
+    """
+    Extracts text from a file on disk based on the filename's extension. With
+    `utf8_fallback`, files that are neither .pdf nor .txt are read as UTF-8 text.
+    """
     if filename.lower().endswith('.pdf'):
         try:
-            reader = PdfReader(io.BytesIO(file_contents))
-            for page in reader.pages:
-                extracted_text += page.extract_text() or "" + "\n"
+            return "".join(page.text + "\n" for page in iter_pdf_pages(path))
         except Exception as e:
             print(f"Error reading PDF {filename}: {e}")
             raise ValueError("Could not process PDF file.")
-    elif filename.lower().endswith('.txt'):
+    elif filename.lower().endswith('.txt') or utf8_fallback:
         try:
-            extracted_text = file_contents.decode('utf-8')
+            with open(path, encoding='utf-8') as f:
+                return f.read()
         except UnicodeDecodeError:
-            raise ValueError("Could not decode .txt file as UTF-8.")
+            raise ValueError(f"Could not decode {filename} as UTF-8.")
     else:
         raise ValueError(f"Unsupported file type: {filename}. Only .pdf and .txt are supported.")
-    return extracted_text
\ No newline at end of file
+
+
+def extract_text_from_upload(source: BinaryIO, filename: str, utf8_fallback: bool = False) -> str:
+    """Spools a file-like upload (e.g. `UploadFile.file`) to disk and extracts its text."""
+    with spooled_upload(source, suffix=os.path.splitext(filename)[1]) as path:
+        return extract_text_from_path(path, filename, utf8_fallback=utf8_fallback)
+
+
+def extract_text_from_file(file_contents: bytes, filename: str) -> str:
+    """Extracts text from a file's contents based on its extension."""
+    if filename.lower().endswith('.txt'):
+        try:
+            return file_contents.decode('utf-8')
+        except UnicodeDecodeError:
+            raise ValueError("Could not decode .txt file as UTF-8.")
+    return extract_text_from_upload(io.BytesIO(file_contents), filename)
@@ -0,0 +1,741 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .config import settings
+
+# hnswlib is optional. Without it, every local partition uses brute-force search.
+try:
+    import hnswlib
+    HNSW_ENABLED = True
+except ImportError:
+    hnswlib = None
+    HNSW_ENABLED = False
+
+CHROMA_RETRY_SECONDS = 30
+# Page size for Chroma get/delete calls.
+CHROMA_PAGE_SIZE = 1000
+# Rows copied per write while compacting a local partition, bounding peak memory.
+COMPACTION_BATCH_ROWS = 10000
+
+
+SHARED_COLLECTION_NAME = "contracts"
+
+
+def group_by_organization(ids, *columns, metadatas) -> Dict[str, list]:
+    """Splits parallel id/column/metadata lists into per-organization lists, keyed by organization_id."""
+    groups: Dict[str, list] = {}
+    for values in zip(ids, *columns, metadatas):
+        groups.setdefault(values[-1]["organization_id"], []).append(values)
+    return {org: [list(column) for column in zip(*rows)] for org, rows in groups.items()}
+
+
+class VectorStore:
+    """
+    Interface for the vector index behind SearchService. Vectors are partitioned by
+    organization, and every query is routed to a single organization's partition.
+    """
+    name = "base"
+
+    @property
+    def available(self) -> bool:
+        raise NotImplementedError
+
+    def existing_ids(self, organization_id: str, ids: List[str]) -> set:
+        raise NotImplementedError
+
+    def add(self, ids: List[str], embeddings: List[List[float]], documents: List[str], metadatas: List[dict]):
+        raise NotImplementedError
+
+    def update_metadata(self, ids: List[str], metadatas: List[dict]):
+        raise NotImplementedError
+
+    def query(self, embedding: List[float], organization_id: str, limit: int) -> List[dict]:
+        """Returns up to `limit` hits as dicts with id, document, metadata and a similarity score."""
+        raise NotImplementedError
+
+    def list_metadata(self, organization_id: str, where: Optional[dict] = None) -> Dict[str, dict]:
+        """Returns {id: metadata} for the organization's vectors whose metadata matches `where`."""
+        raise NotImplementedError
+
+    def delete(self, organization_id: str, ids: Optional[List[str]] = None, where: Optional[dict] = None) -> int:
+        """Deletes the organization's vectors by ID and/or metadata match, returning how many were removed."""
+        raise NotImplementedError
+
+    def compact(self, organization_id: str) -> int:
+        """Reclaims storage held by deleted vectors, returning the number of rows reclaimed."""
+        return 0
+
+
+def organization_collection_name(organization_id: str) -> str:
+    return f"contracts_{organization_id}"
+
+
+def distance_to_similarity(distance: float, space: str) -> float:
+    """
+    Converts a Chroma distance to cosine similarity for the collection's `hnsw:space`,
+    so hits score on one scale whichever collection served them. Embeddings are
+    unit-normalized, so Chroma's squared L2 distance is 2 - 2cos.
+    """
+    if space == "l2":
+        return 1 - distance / 2
+    return 1 - distance
+
+
+class ChromaVectorStore(VectorStore):
+    """
+    The ChromaDB HTTP server. With partitioning="organization" every organization gets
+    its own `contracts_<organization_id>` collection, so a query only searches that
+    tenant's HNSW graph. Organizations that have not been migrated yet (see
+    jobs/migrate_vector_partitions.py) are still served from the legacy shared
+    `contracts` collection with an organization_id filter.
+    """
+    name = "chroma"
+
+    def __init__(self, host: str = settings.CHROMA_HOST, port: int = settings.CHROMA_PORT,
+                 partitioning: str = settings.CHROMA_PARTITIONING):
+        if partitioning not in ("organization", "shared"):
+            raise ValueError(f"Unknown CHROMA_PARTITIONING '{partitioning}'. Expected 'organization' or 'shared'.")
+        self.host = host
+        self.port = port
+        self.partitioning = partitioning
+        self._lock = threading.Lock()
+        self._client = None
+        self._collection = None
+        self._organization_collections: Dict[str, object] = {}
+        # Organizations known to have nothing in the shared collection. They never gain
+        # any: their writes go to their own collection.
+        self._without_shared_vectors: set = set()
+        self._last_connect_attempt = 0.0
+
+    def _connect(self):
+        """Connects to ChromaDB, retrying at most every CHROMA_RETRY_SECONDS after a failure."""
+        with self._lock:
+            if self._client is not None:
+                return
+            if time.monotonic() - self._last_connect_attempt < CHROMA_RETRY_SECONDS:
+                return
+            self._last_connect_attempt = time.monotonic()
+            try:
+                import chromadb
+                client = chromadb.HttpClient(host=self.host, port=self.port)
+                # Ensure the shared collection exists. This is idempotent.
+                self._collection = client.get_or_create_collection(name=SHARED_COLLECTION_NAME)
+                self._client = client
+                print("Vector store connected to ChromaDB.")
+            except Exception as e:
+                print(f"CRITICAL: Failed to connect to ChromaDB at {self.host}:{self.port}: {e}")
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._connect()
+        return self._client
+
+    @property
+    def collection(self):
+        """The legacy shared collection."""
+        if self._collection is None:
+            self._connect()
+        return self._collection
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+
+    def mark_unavailable(self):
+        """Drops the connection after a failed call; `available` reconnects after CHROMA_RETRY_SECONDS."""
+        with self._lock:
+            self._client = None
+            self._collection = None
+            self._organization_collections = {}
+            self._last_connect_attempt = time.monotonic()
+
+    def organization_collection(self, organization_id: str, create: bool = False):
+        """
+        Returns the organization's own collection, or None when partitioning is "shared"
+        or the collection does not exist and `create` is False.
+        """
+        if self.partitioning == "shared":
+            return None
+        collection = self._organization_collections.get(organization_id)
+        if collection is not None:
+            return collection
+        name = organization_collection_name(organization_id)
+        if create:
+            collection = self.client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+        else:
+            try:
+                collection = self.client.get_collection(name=name)
+            except Exception:
+                # Not migrated yet. Don't cache the miss: another process may create it.
+                return None
+        self._organization_collections[organization_id] = collection
+        return collection
+
+    def _has_shared_vectors(self, organization_id: str) -> bool:
+        if organization_id in self._without_shared_vectors:
+            return False
+        if self.collection.get(where={"organization_id": organization_id}, limit=1, include=[])["ids"]:
+            return True
+        self._without_shared_vectors.add(organization_id)
+        return False
+
+    def _write_collection(self, organization_id: str):
+        """
+        Where the organization's writes go: the collection existing_ids and query read.
+        An organization with vectors still in the shared collection keeps writing there
+        until jobs/migrate_vector_partitions.py has created its own collection; otherwise
+        its first write would hide all of its older vectors from search.
+        """
+        collection = self.organization_collection(organization_id)
+        if collection is not None or self.partitioning == "shared":
+            return collection or self.collection
+        if self._has_shared_vectors(organization_id):
+            return self.collection
+        # A new organization: partition it from its first vector.
+        return self.organization_collection(organization_id, create=True)
+
+    def existing_ids(self, organization_id, ids):
+        collection = self.organization_collection(organization_id) or self.collection
+        return set(collection.get(ids=ids, include=[])["ids"])
+
+    def add(self, ids, embeddings, documents, metadatas):
+        for organization_id, (org_ids, org_embeddings, org_documents, org_metadatas) in group_by_organization(ids, embeddings, documents, metadatas=metadatas).items():
+            # Upsert, so replaying writes journaled during a fallback is idempotent.
+            self._write_collection(organization_id).upsert(ids=org_ids, embeddings=org_embeddings, documents=org_documents, metadatas=org_metadatas)
+
+    def update_metadata(self, ids, metadatas):
+        for organization_id, (org_ids, org_metadatas) in group_by_organization(ids, metadatas=metadatas).items():
+            self._write_collection(organization_id).update(ids=org_ids, metadatas=org_metadatas)
+
+    def _collections(self, organization_id: str) -> list:
+        """The organization's collection (if any) plus the shared collection, each with its `where` scoping."""
+        collections = []
+        collection = self.organization_collection(organization_id)
+        if collection is not None:
+            collections.append((collection, {}))
+        collections.append((self.collection, {"organization_id": organization_id}))
+        return collections
+
+    @staticmethod
+    def _get_all(collection, where: Optional[dict]) -> Dict[str, dict]:
+        found, offset = {}, 0
+        while True:
+            page = collection.get(where=where, limit=CHROMA_PAGE_SIZE, offset=offset, include=["metadatas"])
+            found.update(zip(page["ids"], page["metadatas"]))
+            if len(page["ids"]) < CHROMA_PAGE_SIZE:
+                return found
+            offset += CHROMA_PAGE_SIZE
+
+    @staticmethod
+    def _where(*conditions: Optional[dict]) -> Optional[dict]:
+        clauses = [{key: value} for condition in conditions if condition for key, value in condition.items()]
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def list_metadata(self, organization_id, where=None):
+        found = {}
+        for collection, scope in self._collections(organization_id):
+            found.update(self._get_all(collection, self._where(scope, where)))
+        return found
+
+    def delete(self, organization_id, ids=None, where=None):
+        deleted = 0
+        for collection, scope in self._collections(organization_id):
+            if ids:
+                matched = collection.get(ids=list(ids), where=self._where(scope, where), include=[])["ids"]
+            else:
+                matched = list(self._get_all(collection, self._where(scope, where)))
+            for start in range(0, len(matched), CHROMA_PAGE_SIZE):
+                collection.delete(ids=matched[start:start + CHROMA_PAGE_SIZE])
+            deleted += len(matched)
+        return deleted
+
+    def query(self, embedding, organization_id, limit):
+        collection = self.organization_collection(organization_id)
+        if collection is not None:
+            results = collection.query(query_embeddings=[embedding], n_results=limit)
+        else:
+            collection = self.collection
+            results = collection.query(
+                query_embeddings=[embedding],
+                n_results=limit,
+                where={"organization_id": organization_id},
+            )
+        # The shared collection predates partitioning and uses Chroma's default L2 space.
+        space = (collection.metadata or {}).get("hnsw:space", "l2")
+        # The query returns lists of lists, one for each query embedding. We only have one.
+        return [
+            {"id": id, "document": doc, "metadata": meta, "score": distance_to_similarity(dist, space)}
+            for id, doc, meta, dist in zip(results["ids"][0], results["documents"][0], results["metadatas"][0], results["distances"][0])
+        ]
+
+
+class _LocalPartition:
+    """
+    One organization's vectors on local disk:
+      meta.json              {"dim", "generation"}, replaced atomically by compaction
+      vectors.<gen>.f32      raw float32 rows, appended in place and read through np.memmap
+      records.<gen>.jsonl    append-only log of {row, id, document, metadata} entries and
+                             {row, id, deleted} tombstones; the last entry per row wins
+      hnsw.<gen>.bin         optional hnswlib graph, built once the partition passes the HNSW threshold
+    Writers serialize on an flock of `.lock`. Readers take no lock: they pick up appended
+    rows by re-checking file sizes, and reload from scratch when compaction has started a
+    new generation. The previous generation's files are kept until the next compaction,
+    so a reader that raced a compaction can still finish loading them.
+    """
+
+    def __init__(self, path: str, hnsw_threshold: int):
+        self.path = path
+        self.hnsw_threshold = hnsw_threshold
+        self.lock = threading.Lock()
+        self._meta_mtime = None
+        os.makedirs(path, exist_ok=True)
+        self._reset(0)
+        self._refresh()
+
+    def _reset(self, generation: int):
+        self.generation = generation
+        self.dim: Optional[int] = None
+        self.vectors: Optional[np.ndarray] = None
+        self.rows: Dict[str, int] = {}
+        self.records: List[Optional[dict]] = []
+        self.deleted_rows: set = set()
+        self._records_offset = 0
+        self._vectors_size = 0
+        self.hnsw = None
+
+    def _file(self, name: str, generation: Optional[int] = None) -> str:
+        stem, ext = name.split(".")
+        return os.path.join(self.path, f"{stem}.{self.generation if generation is None else generation}.{ext}")
+
+    @property
+    def _meta_path(self):
+        return os.path.join(self.path, "meta.json")
+
+    def _write_meta(self, dim: int, generation: int):
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"dim": dim, "generation": generation}, f)
+        os.replace(tmp_path, self._meta_path)
+
+    @contextmanager
+    def _write_lock(self):
+        """Serializes writers across threads and processes, and brings the in-memory view up to date."""
+        with self.lock, open(os.path.join(self.path, ".lock"), "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Loads any records and vector rows written since the last refresh (possibly by another process)."""
+        try:
+            stat = os.stat(self._meta_path)
+        except FileNotFoundError:
+            return
+        # meta.json is replaced, never edited, so a new inode means a new generation.
+        if (stat.st_ino, stat.st_mtime_ns) != self._meta_mtime:
+            self._meta_mtime = (stat.st_ino, stat.st_mtime_ns)
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            if meta["generation"] != self.generation:
+                self._reset(meta["generation"])
+            self.dim = meta["dim"]
+
+        records_path = self._file("records.jsonl")
+        if os.path.exists(records_path) and os.path.getsize(records_path) > self._records_offset:
+            with open(records_path, "rb") as f:
+                f.seek(self._records_offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # A writer is mid-append; pick the rest up next time.
+                    self._records_offset += len(line)
+                    self._apply_record(json.loads(line))
+
+        vectors_path = self._file("vectors.f32")
+        if self.dim and os.path.exists(vectors_path):
+            size = os.path.getsize(vectors_path)
+            if size != self._vectors_size:
+                self._vectors_size = size
+                count = size // (4 * self.dim)
+                self.vectors = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim)) if count else None
+                self._sync_hnsw()
+
+    def _apply_record(self, record: dict):
+        row = record["row"]
+        while len(self.records) <= row:
+            self.records.append(None)
+        if record.get("deleted"):
+            self.records[row] = None
+            self.deleted_rows.add(row)
+            if self.rows.get(record["id"]) == row:
+                del self.rows[record["id"]]
+            if self.hnsw is not None and row < self.hnsw.get_current_count():
+                self._mark_hnsw_deleted(row)
+        else:
+            self.records[row] = record
+            self.rows[record["id"]] = row
+
+    def _mark_hnsw_deleted(self, row: int):
+        try:
+            self.hnsw.mark_deleted(row)
+        except RuntimeError:
+            pass  # Already marked by the index file this process loaded.
+
+    def _sync_hnsw(self):
+        count = 0 if self.vectors is None else len(self.vectors)
+        if not HNSW_ENABLED or count == 0 or count < self.hnsw_threshold:
+            return
+        if self.hnsw is None:
+            self.hnsw = hnswlib.Index(space="cosine", dim=self.dim)
+            if os.path.exists(self._file("hnsw.bin")):
+                self.hnsw.load_index(self._file("hnsw.bin"), max_elements=max(count, 1))
+            else:
+                self.hnsw.init_index(max_elements=count * 2, ef_construction=200, M=16)
+            self.hnsw.set_ef(64)
+        indexed = self.hnsw.get_current_count()
+        if indexed < count:
+            if self.hnsw.get_max_elements() < count:
+                self.hnsw.resize_index(count * 2)
+            self.hnsw.add_items(np.asarray(self.vectors[indexed:count]), np.arange(indexed, count))
+            for row in self.deleted_rows:
+                if row >= indexed:
+                    self._mark_hnsw_deleted(row)
+
+    def _append_records(self, records: List[dict]):
+        with open(self._file("records.jsonl"), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    def add(self, ids, embeddings, documents, metadatas):
+        """Appends vectors. An ID that is already present is replaced: its old row is tombstoned."""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        # Rows are stored unit-normalized so a dot product is cosine similarity.
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        with self._write_lock():
+            if self.dim is None:
+                self._write_meta(vectors.shape[1], self.generation)
+                self._refresh()
+            first_row = self._vectors_size // (4 * self.dim)
+            with open(self._file("vectors.f32"), "ab") as f:
+                f.write(vectors.tobytes())
+            records = [{"row": self.rows[id], "id": id, "deleted": True} for id in ids if id in self.rows]
+            records += [
+                {"row": first_row + offset, "id": id, "document": document, "metadata": metadata}
+                for offset, (id, document, metadata) in enumerate(zip(ids, documents, metadatas))
+            ]
+            self._append_records(records)
+            self._refresh()
+            if self.hnsw is not None:
+                self.hnsw.save_index(self._file("hnsw.bin"))
+
+    def update_metadata(self, ids, metadatas):
+        with self._write_lock():
+            self._append_records([
+                dict(self.records[self.rows[id]], metadata=metadata)
+                for id, metadata in zip(ids, metadatas) if id in self.rows
+            ])
+            self._refresh()
+
+    def list_metadata(self, where: Optional[dict] = None) -> Dict[str, dict]:
+        with self.lock:
+            self._refresh()
+            return {
+                id: self.records[row]["metadata"]
+                for id, row in self.rows.items()
+                if not where or all(self.records[row]["metadata"].get(k) == v for k, v in where.items())
+            }
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[dict] = None) -> int:
+        """Tombstones vectors by ID and/or metadata match. The space is reclaimed by `compact`."""
+        with self._write_lock():
+            targets = set(ids or [])
+            if where:
+                targets |= {
+                    id for id, row in self.rows.items()
+                    if all(self.records[row]["metadata"].get(k) == v for k, v in where.items())
+                }
+            records = [{"row": self.rows[id], "id": id, "deleted": True} for id in targets if id in self.rows]
+            if records:
+                self._append_records(records)
+                self._refresh()
+                if self.hnsw is not None:
+                    self.hnsw.save_index(self._file("hnsw.bin"))
+            return len(records)
+
+    def compact(self) -> int:
+        """
+        Rewrites the partition without tombstoned rows into a new generation and returns
+        the number of rows reclaimed.
+        """
+        with self._write_lock():
+            count = 0 if self.vectors is None else len(self.vectors)
+            live = [row for row in range(count) if row < len(self.records) and self.records[row] is not None]
+            reclaimed = count - len(live)
+            if reclaimed == 0:
+                return 0
+            generation = self.generation + 1
+            with open(self._file("vectors.f32", generation), "wb") as f:
+                for start in range(0, len(live), COMPACTION_BATCH_ROWS):
+                    f.write(np.asarray(self.vectors[live[start:start + COMPACTION_BATCH_ROWS]]).tobytes())
+            with open(self._file("records.jsonl", generation), "w", encoding="utf-8") as f:
+                for new_row, row in enumerate(live):
+                    f.write(json.dumps(dict(self.records[row], row=new_row)) + "\n")
+            self._write_meta(self.dim, generation)
+            for name in os.listdir(self.path):
+                if name.split(".")[1:2] == [str(self.generation - 1)]:
+                    os.remove(os.path.join(self.path, name))
+            self._refresh()
+            if self.hnsw is not None:
+                self.hnsw.save_index(self._file("hnsw.bin"))
+            return reclaimed
+
+    def query(self, embedding, limit):
+        with self.lock:
+            self._refresh()
+            if self.vectors is None:
+                return []
+            query = np.asarray(embedding, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1)
+            count = len(self.vectors)
+            k = min(limit, len(self.rows))
+            if k == 0:
+                return []
+            if self.hnsw is not None:
+                labels, distances = self.hnsw.knn_query(query, k=k)
+                hits = zip(labels[0].tolist(), (1 - distances[0]).tolist())
+            else:
+                scores = self.vectors @ query
+                if self.deleted_rows:
+                    scores[[row for row in self.deleted_rows if row < count]] = -np.inf
+                top = np.argpartition(-scores, k - 1)[:k] if k < count else np.arange(count)
+                top = top[np.argsort(-scores[top])][:k]
+                hits = zip(top.tolist(), scores[top].tolist())
+            results = []
+            for row, score in hits:
+                record = self.records[row] if row < len(self.records) else None
+                if record is not None:
+                    results.append({"id": record["id"], "document": record["document"], "metadata": record["metadata"], "score": float(score)})
+            return results
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector index partitioned by organization on local disk. Small partitions
+    are searched by brute force over a memory-mapped matrix; partitions with at least
+    `hnsw_threshold` vectors use an HNSW graph when hnswlib is installed.
+    """
+    name = "local"
+
+    def __init__(self, path: str = settings.VECTOR_STORE_PATH, hnsw_threshold: int = settings.VECTOR_STORE_HNSW_THRESHOLD):
+        self.path = path
+        self.hnsw_threshold = hnsw_threshold
+        self._partitions: Dict[str, _LocalPartition] = {}
+        self._lock = threading.Lock()
+
+    def partition(self, organization_id: str) -> _LocalPartition:
+        with self._lock:
+            if organization_id not in self._partitions:
+                self._partitions[organization_id] = _LocalPartition(os.path.join(self.path, organization_id), self.hnsw_threshold)
+            return self._partitions[organization_id]
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def existing_ids(self, organization_id, ids):
+        partition = self.partition(organization_id)
+        with partition.lock:
+            partition._refresh()
+            return {id for id in ids if id in partition.rows}
+
+    def add(self, ids, embeddings, documents, metadatas):
+        for organization_id, (org_ids, org_embeddings, org_documents, org_metadatas) in group_by_organization(ids, embeddings, documents, metadatas=metadatas).items():
+            self.partition(organization_id).add(org_ids, org_embeddings, org_documents, org_metadatas)
+
+    def update_metadata(self, ids, metadatas):
+        for organization_id, (org_ids, org_metadatas) in group_by_organization(ids, metadatas=metadatas).items():
+            self.partition(organization_id).update_metadata(org_ids, org_metadatas)
+
+    def query(self, embedding, organization_id, limit):
+        return self.partition(organization_id).query(embedding, limit)
+
+    def list_metadata(self, organization_id, where=None):
+        return self.partition(organization_id).list_metadata(where)
+
+    def delete(self, organization_id, ids=None, where=None):
+        return self.partition(organization_id).delete(ids, where)
+
+    def compact(self, organization_id):
+        return self.partition(organization_id).compact()
+
+
+class FallbackVectorStore(VectorStore):
+    """
+    Uses the primary store while it is reachable and the local store otherwise. Writes
+    made during a fallback are also appended to a journal next to the local store; once
+    the primary is reachable again, the journal is replayed into it in order and the
+    local copies are dropped, so nothing indexed during an outage goes missing from
+    search. A primary call that fails mid-run marks the primary down and is retried on
+    the fallback.
+    """
+
+    def __init__(self, primary: VectorStore, fallback: VectorStore, journal_path: Optional[str] = None):
+        self.primary = primary
+        self.fallback = fallback
+        self.journal_path = journal_path or os.path.join(settings.VECTOR_STORE_PATH, "fallback_journal.jsonl")
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _journal_lock(self):
+        """Serializes journal appends and replays across threads and processes."""
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        with self._lock, open(self.journal_path + ".lock", "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _has_journal(self) -> bool:
+        try:
+            return os.path.getsize(self.journal_path) > 0
+        except FileNotFoundError:
+            return False
+
+    def _replay_journal(self):
+        """Applies the journaled fallback writes to the primary, then drops their local copies."""
+        with self._journal_lock():
+            if not self._has_journal():
+                return
+            with open(self.journal_path, encoding="utf-8") as f:
+                entries = [json.loads(line) for line in f if line.endswith("\n")]
+            organizations = set()
+            for index, entry in enumerate(entries):
+                try:
+                    self._apply(self.primary, entry)
+                except Exception as e:
+                    # Keep what was not replayed; the next reconnect picks it up.
+                    self._write_journal(entries[index:])
+                    self._mark_primary_down(e)
+                    return
+                organizations.update(entry.get("organizations", []))
+            self._write_journal([])
+            for organization_id in organizations:
+                stale = list(self.fallback.list_metadata(organization_id))
+                if stale:
+                    self.fallback.delete(organization_id, ids=stale)
+                self.fallback.compact(organization_id)
+            print(f"Replayed {len(entries)} vector store writes made while the primary store was unreachable.")
+
+    def _write_journal(self, entries: List[dict]):
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.journal_path)
+
+    @staticmethod
+    def _apply(store: VectorStore, entry: dict):
+        if entry["op"] == "add":
+            store.add(entry["ids"], entry["embeddings"], entry["documents"], entry["metadatas"])
+        elif entry["op"] == "update_metadata":
+            store.update_metadata(entry["ids"], entry["metadatas"])
+        else:
+            store.delete(entry["organization_id"], entry.get("ids"), entry.get("where"))
+
+    def _mark_primary_down(self, error: Exception):
+        print(f"Vector store '{self.primary.name}' failed, falling back to '{self.fallback.name}': {error}")
+        if hasattr(self.primary, "mark_unavailable"):
+            self.primary.mark_unavailable()
+
+    def _read(self, method: str, *args):
+        if self.active is self.primary:
+            try:
+                return getattr(self.primary, method)(*args)
+            except Exception as e:
+                self._mark_primary_down(e)
+        return getattr(self.fallback, method)(*args)
+
+    def _write(self, entry: dict):
+        if self.active is self.primary:
+            try:
+                return self._apply(self.primary, entry)
+            except Exception as e:
+                self._mark_primary_down(e)
+        with self._journal_lock():
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            return self._apply(self.fallback, entry)
+
+    @property
+    def active(self) -> VectorStore:
+        if not self.primary.available:
+            return self.fallback
+        if self._has_journal():
+            self._replay_journal()
+            if not self.primary.available:
+                return self.fallback
+        return self.primary
+
+    @property
+    def name(self) -> str:
+        return self.active.name
+
+    @property
+    def available(self) -> bool:
+        return self.active.available
+
+    def existing_ids(self, organization_id, ids):
+        return self._read("existing_ids", organization_id, ids)
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self._write({
+            "op": "add", "ids": list(ids), "embeddings": [list(map(float, e)) for e in embeddings],
+            "documents": list(documents), "metadatas": list(metadatas),
+            "organizations": sorted({m["organization_id"] for m in metadatas}),
+        })
+
+    def update_metadata(self, ids, metadatas):
+        self._write({
+            "op": "update_metadata", "ids": list(ids), "metadatas": list(metadatas),
+            "organizations": sorted({m["organization_id"] for m in metadatas}),
+        })
+
+    def query(self, embedding, organization_id, limit):
+        return self._read("query", embedding, organization_id, limit)
+
+    def list_metadata(self, organization_id, where=None):
+        return self._read("list_metadata", organization_id, where)
+
+    def delete(self, organization_id, ids=None, where=None):
+        return self._write({
+            "op": "delete", "organization_id": organization_id, "ids": list(ids) if ids else None,
+            "where": where, "organizations": [organization_id],
+        })
+
+    def compact(self, organization_id):
+        return self.active.compact(organization_id)
+
+
+def create_vector_store(backend: str = settings.VECTOR_STORE_BACKEND) -> VectorStore:
+    """Builds the configured backend: "chroma", "local", or "auto" (Chroma, falling back to local)."""
+    if backend == "chroma":
+        return ChromaVectorStore()
+    if backend == "local":
+        return LocalVectorStore()
+    if backend == "auto":
+        return FallbackVectorStore(ChromaVectorStore(), LocalVectorStore())
+    raise ValueError(f"Unknown VECTOR_STORE_BACKEND '{backend}'. Expected 'chroma', 'local' or 'auto'.")
@@ -0,0 +1,159 @@
+import sys
+import os
+import argparse
+import asyncio
+import inspect
+import multiprocessing
+import signal
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.database import SessionLocal
+from core.config import settings
+from core import analysis_queue, analyzer, crud, incremental_analysis
+
+# How long an idle worker waits before polling the queue again.
+POLL_INTERVAL_SECONDS = 2.0
+# How often each worker returns jobs with expired leases to the queue.
+LEASE_SWEEP_SECONDS = 60.0
+# Running jobs renew their lease this many times per lease period, so a missed
+# heartbeat or two doesn't hand a live job to another worker.
+LEASE_RENEWALS_PER_PERIOD = 3
+
+
+@contextmanager
+def lease_heartbeat(job_id, worker_id: str):
+    """
+    Renews the job's lease from a background thread while the body runs, so an analysis
+    that outlives ANALYSIS_JOB_LEASE_SECONDS isn't released and run a second time.
+    A worker that dies stops renewing, and its job is recovered once the lease expires.
+    """
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(settings.ANALYSIS_JOB_LEASE_SECONDS / LEASE_RENEWALS_PER_PERIOD):
+            db = SessionLocal()
+            try:
+                if not analysis_queue.extend_lease(db, job_id, worker_id):
+                    print(f"[{worker_id}] Lost the lease on analysis job {job_id}; its result will be discarded.")
+                    return
+            except Exception as e:
+                # Try again on the next beat; the lease has slack for a few misses.
+                print(f"[{worker_id}] Failed to renew the lease on analysis job {job_id}: {e}")
+                db.rollback()
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=renew, name=f"lease-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(db, job):
+    # A new version of an analyzed contract only needs its changed regions analyzed.
+    version = crud.get_contract_version_by_id(db, version_id=job.contract_version_id)
+    if version is not None:
+        if incremental_analysis.reanalyze_version(db, version) is not None:
+            return
+        # Later versions should take the diff path; say why this one did not.
+        _, reason = incremental_analysis.incremental_base(db, version)
+        if reason:
+            print(f"Version {version.id} gets a full analysis instead of an incremental one: {reason}.")
+    result = analyzer.analyze_contract(version_id=job.contract_version_id, file_contents=analysis_queue.job_file_contents(job), filename=job.filename)
+    if inspect.iscoroutine(result):
+        asyncio.run(result)
+
+
+def worker_loop(stop_event, poll_interval: float):
+    """Claims and runs analysis jobs one at a time until `stop_event` is set."""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    # The supervisor handles SIGINT; a worker finishes its current job when asked to stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    print(f"Analysis worker {worker_id} started.")
+    next_sweep = 0.0
+    while not stop_event.is_set():
+        db = SessionLocal()
+        try:
+            if time.monotonic() >= next_sweep:
+                released = analysis_queue.release_expired_leases(db)
+                if released:
+                    print(f"[{worker_id}] Released {released} analysis jobs with expired leases.")
+                next_sweep = time.monotonic() + LEASE_SWEEP_SECONDS
+
+            job = analysis_queue.claim_next_job(db, worker_id)
+            if job is None:
+                stop_event.wait(poll_interval)
+                continue
+
+            started = time.perf_counter()
+            print(f"[{worker_id}] Analyzing version {job.contract_version_id} (job {job.id}, attempt {job.attempts}/{job.max_attempts}).")
+            try:
+                with lease_heartbeat(job.id, worker_id):
+                    run_job(db, job)
+            except Exception as e:
+                db.rollback()
+                print(f"[{worker_id}] Analysis job {job.id} failed: {e}")
+                analysis_queue.fail_job(db, job, worker_id, error=traceback.format_exc(limit=5))
+            else:
+                analysis_queue.complete_job(db, job, worker_id)
+                print(f"[{worker_id}] Analysis job {job.id} completed in {time.perf_counter() - started:.1f}s.")
+        except Exception as e:
+            # Database unavailable or similar; back off instead of spinning.
+            print(f"[{worker_id}] Analysis worker error: {e}")
+            db.rollback()
+            stop_event.wait(poll_interval)
+        finally:
+            db.close()
+    print(f"Analysis worker {worker_id} stopped.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Runs contract analysis workers. Start it on as many hosts as needed; workers coordinate through the analysis_jobs table."
+    )
+    parser.add_argument("--workers", type=int, default=settings.ANALYSIS_WORKERS, help="Worker processes. 0 means one per CPU.")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    count = args.workers or os.cpu_count() or 1
+    host = socket.gethostname()
+    stop_event = multiprocessing.Event()
+
+    def start_worker() -> multiprocessing.Process:
+        process = multiprocessing.Process(target=worker_loop, args=(stop_event, args.poll_interval), daemon=True)
+        process.start()
+        return process
+
+    def request_stop(signum, frame):
+        print("Stopping analysis workers after their current jobs...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    print(f"Starting {count} analysis workers on {host}.")
+    workers = [start_worker() for _ in range(count)]
+    # Replace workers that crash (e.g. killed for memory); their jobs are recovered when the lease expires.
+    while not stop_event.is_set():
+        for index, process in enumerate(workers):
+            if not process.is_alive() and not stop_event.is_set():
+                print(f"Analysis worker {index} exited with code {process.exitcode}; restarting.")
+                workers[index] = start_worker()
+        stop_event.wait(1.0)
+
+    for process in workers:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
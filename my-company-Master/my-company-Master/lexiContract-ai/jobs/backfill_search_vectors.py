@@ -0,0 +1,49 @@
+import sys
+import os
+import time
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from core.database import SessionLocal
+
+# Rows updated per transaction. Small batches keep row locks and WAL bursts short.
+BATCH_SIZE = 500
+
+def backfill_search_vectors():
+    """
+    Populates contract_versions.search_vector for rows created before the full-text
+    search migration. New and updated rows are maintained by a database trigger.
+    The script is idempotent and can be safely re-run or interrupted.
+    """
+    print("Starting search vector backfill...")
+    db = SessionLocal()
+    total = 0
+    started = time.perf_counter()
+    try:
+        while True:
+            result = db.execute(text("""
+                UPDATE contract_versions
+                SET search_vector = to_tsvector('english', coalesce(full_text, ''))
+                WHERE id IN (
+                    SELECT id FROM contract_versions
+                    WHERE search_vector IS NULL
+                    LIMIT :batch_size
+                    FOR UPDATE SKIP LOCKED
+                )
+            """), {"batch_size": BATCH_SIZE})
+            db.commit()
+            if result.rowcount == 0:
+                break
+            total += result.rowcount
+            print(f"  - Backfilled {total} versions so far...")
+    except Exception as e:
+        print(f"An error occurred during the search vector backfill: {e}")
+        db.rollback()
+    finally:
+        db.close()
+    print(f"Search vector backfill finished: {total} versions in {time.perf_counter() - started:.1f}s.")
+
+if __name__ == "__main__":
+    backfill_search_vectors()
@@ -0,0 +1,135 @@
+import sys
+import os
+import argparse
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session, aliased
+from core.database import SessionLocal
+from core import crud, models
+from core.config import settings
+from core.redlining_service import redlining_service
+
+# Contracts still being negotiated internally; these make up a team's redlining queue.
+QUEUE_NEGOTIATION_STATUSES = (models.NegotiationStatus.DRAFTING, models.NegotiationStatus.INTERNAL_REVIEW)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def select_versions(db: Session, organization_id: uuid.UUID, contract_ids: Optional[List[uuid.UUID]] = None, team_id: Optional[uuid.UUID] = None) -> List[uuid.UUID]:
+    """
+    Returns the latest version of each selected contract that is analyzed and not itself
+    an autonomous redline awaiting approval. Without `contract_ids`, a team's queue (or
+    the whole organization's) is every contract still in drafting or internal review.
+    """
+    newer_version = aliased(models.ContractVersion)
+    query = (
+        db.query(models.ContractVersion.id)
+        .join(models.Contract, models.Contract.id == models.ContractVersion.contract_id)
+        .filter(
+            models.Contract.organization_id == organization_id,
+            models.ContractVersion.analysis_status == models.AnalysisStatus.completed,
+            models.ContractVersion.version_status != models.VersionStatus.pending_approval,
+            ~exists().where(
+                newer_version.contract_id == models.ContractVersion.contract_id,
+                newer_version.version_number > models.ContractVersion.version_number,
+            ),
+        )
+    )
+    if contract_ids:
+        query = query.filter(models.Contract.id.in_(contract_ids))
+    else:
+        query = query.filter(models.Contract.negotiation_status.in_(QUEUE_NEGOTIATION_STATUSES))
+    if team_id:
+        query = query.filter(models.Contract.team_id == team_id)
+    return [version_id for (version_id,) in query.order_by(models.Contract.created_at).all()]
+
+
+def redline_version(version_id: uuid.UUID, min_confidence: float) -> dict:
+    """Redlines one version in its own session and transaction."""
+    started = time.perf_counter()
+    db: Session = SessionLocal()
+    try:
+        version = crud.get_contract_version_by_id(db, version_id=version_id)
+        new_version = redlining_service.create_autonomous_redline(db, version, min_confidence=min_confidence) if version else None
+        outcome = "redlined" if new_version else "skipped"
+        applied = len(new_version.suggestions) if new_version else 0
+    except Exception as e:
+        print(f"  - Failed to redline version {version_id}: {e}")
+        db.rollback()
+        outcome, applied = "failed", 0
+    finally:
+        db.close()
+    return {"version_id": version_id, "outcome": outcome, "applied": applied, "seconds": time.perf_counter() - started}
+
+
+def batch_redline(version_ids: List[uuid.UUID], min_confidence: Optional[float] = None, workers: Optional[int] = None) -> dict:
+    """
+    Redlines many contract versions in parallel. Each version and its suggestions are
+    committed in one transaction, so a failure never leaves a half-written version.
+    Returns throughput and per-contract latency stats.
+    """
+    min_confidence = settings.REDLINE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+    workers = workers or settings.REDLINE_BATCH_WORKERS
+    print(f"Redlining {len(version_ids)} contract versions with {workers} workers (min confidence {min_confidence:.2f})...")
+
+    started = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(redline_version, version_id, min_confidence) for version_id in version_ids]
+        for future in as_completed(futures):
+            results.append(future.result())
+    elapsed = time.perf_counter() - started
+
+    latencies = [r["seconds"] * 1000 for r in results]
+    stats = {
+        "versions": len(results),
+        "redlined": sum(r["outcome"] == "redlined" for r in results),
+        "skipped": sum(r["outcome"] == "skipped" for r in results),
+        "failed": sum(r["outcome"] == "failed" for r in results),
+        "suggestions_applied": sum(r["applied"] for r in results),
+        "seconds": round(elapsed, 3),
+        "contracts_per_second": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "max": round(max(latencies), 1),
+        } if latencies else {},
+    }
+    print(
+        f"Batch redlining finished: {stats['redlined']} redlined, {stats['skipped']} skipped, {stats['failed']} failed "
+        f"in {elapsed:.1f}s ({stats['contracts_per_second']} contracts/s)."
+    )
+    if latencies:
+        print(f"Per-contract latency: p50 {stats['latency_ms']['p50']} ms, p95 {stats['latency_ms']['p95']} ms, max {stats['latency_ms']['max']} ms.")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Creates autonomous redlines for a set of contracts or a team's queue.")
+    parser.add_argument("--organization-id", type=uuid.UUID, required=True)
+    parser.add_argument("--contract-id", type=uuid.UUID, action="append", dest="contract_ids", help="Repeat to redline several contracts.")
+    parser.add_argument("--team-id", type=uuid.UUID, help="Redline the team's queue of contracts in drafting or internal review.")
+    parser.add_argument("--min-confidence", type=float, default=settings.REDLINE_MIN_CONFIDENCE)
+    parser.add_argument("--workers", type=int, default=settings.REDLINE_BATCH_WORKERS)
+    args = parser.parse_args()
+
+    db: Session = SessionLocal()
+    try:
+        version_ids = select_versions(db, args.organization_id, contract_ids=args.contract_ids, team_id=args.team_id)
+    finally:
+        db.close()
+    batch_redline(version_ids, min_confidence=args.min_confidence, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import sys
+import os
+import argparse
+import time
+import uuid
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import Session
+from core.database import SessionLocal
+from core import crud
+
+# Mismatches printed per organization; the rest are only counted.
+MAX_REPORTED_MISMATCHES = 10
+
+def check_analytics_rollups(repair: bool = True, organization_ids=None) -> dict:
+    """
+    Compares the analytics dashboard rollups with counts recomputed from contracts and
+    analysis_suggestions, and (with `repair`) rebuilds the rollups of every organization
+    that drifted, e.g. after writes that bypassed the triggers.
+    """
+    print("Checking analytics rollups against the source tables...")
+    db: Session = SessionLocal()
+    started = time.perf_counter()
+    totals = {"drifted_organizations": 0, "mismatches": 0, "repaired": 0}
+    try:
+        drift = crud.get_analytics_rollup_drift(db, organization_ids=organization_ids)
+        for organization_id, mismatches in drift.items():
+            totals["drifted_organizations"] += 1
+            totals["mismatches"] += len(mismatches)
+            print(f"  - Organization {organization_id}: {len(mismatches)} mismatched rollup rows.")
+            for rollup, key, expected, actual in mismatches[:MAX_REPORTED_MISMATCHES]:
+                print(f"      {rollup} {key}: expected {expected}, found {actual}")
+        if repair and drift:
+            db.rollback()  # End the comparison's transaction before locking the rollups.
+            crud.refresh_analytics_rollups(db, organization_ids=list(drift))
+            totals["repaired"] = len(drift)
+    except Exception as e:
+        print(f"An error occurred while checking analytics rollups: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+    print(
+        f"Analytics rollup check finished: {totals['mismatches']} mismatches in {totals['drifted_organizations']} "
+        f"organizations, {totals['repaired']} repaired in {time.perf_counter() - started:.1f}s."
+    )
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks the analytics dashboard rollups against the source tables.")
+    parser.add_argument("--organization-id", type=uuid.UUID, action="append", dest="organization_ids", help="Repeat to check several organizations (default: all).")
+    parser.add_argument("--no-repair", action="store_true", help="Only report drift.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the rollups without comparing first.")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        db: Session = SessionLocal()
+        try:
+            crud.refresh_analytics_rollups(db, organization_ids=args.organization_ids)
+            print("Analytics rollups rebuilt.")
+        finally:
+            db.close()
+        return
+    totals = check_analytics_rollups(repair=not args.no_repair, organization_ids=args.organization_ids)
+    sys.exit(1 if totals["mismatches"] and args.no_repair else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import sys
+import os
+import time
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import Session
+from core.database import SessionLocal
+from core.config import settings
+from core import models
+from core.search import search_service
+
+# Queued vector deletions drained per transaction.
+DELETIONS_PER_BATCH = 100
+# A deletion that failed this many times is left in the queue for inspection.
+MAX_DELETION_ATTEMPTS = 5
+
+def _remaining_versions(db: Session, contract_id) -> list:
+    """(version_id, text) of the contract's versions that have text, oldest first."""
+    rows = (
+        db.query(models.ContractVersion.id, models.ContractVersion.full_text)
+        .filter(models.ContractVersion.contract_id == contract_id, models.ContractVersion.full_text.isnot(None))
+        .order_by(models.ContractVersion.version_number)
+        .all()
+    )
+    return [(str(version_id), text) for version_id, text in rows]
+
+def drain_vector_deletions() -> dict:
+    """
+    Removes the vectors of deleted contracts and versions queued by core/index_lifecycle.py.
+    A version delete keeps chunks that the contract's remaining versions still contain.
+    Rows are claimed with SKIP LOCKED, so concurrent runs split the queue; a failed row
+    stays queued with its error and is retried on the next run, up to MAX_DELETION_ATTEMPTS.
+    """
+    totals = {"deletions": 0, "vectors": 0, "failed": 0}
+    if not search_service.store.available:
+        return totals
+
+    db: Session = SessionLocal()
+    last_id = 0
+    try:
+        while True:
+            rows = (
+                db.query(models.VectorDeletion)
+                .filter(models.VectorDeletion.id > last_id, models.VectorDeletion.attempts < MAX_DELETION_ATTEMPTS)
+                .order_by(models.VectorDeletion.id)
+                .limit(DELETIONS_PER_BATCH)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+            deleted_contracts = {row.contract_id for row in rows if row.version_id is None}
+            for row in rows:
+                try:
+                    if row.version_id is None:
+                        removed = search_service.delete_contract(str(row.organization_id), str(row.contract_id))
+                    elif row.contract_id in deleted_contracts:
+                        # The contract delete in this batch covers its versions.
+                        removed = 0
+                    else:
+                        removed = search_service.delete_version(
+                            str(row.organization_id), str(row.contract_id), str(row.version_id),
+                            _remaining_versions(db, row.contract_id),
+                        )
+                    db.delete(row)
+                    totals["deletions"] += 1
+                    totals["vectors"] += removed
+                except Exception as e:
+                    row.attempts += 1
+                    row.last_error = str(e)
+                    totals["failed"] += 1
+                    print(f"Failed to remove vectors for contract {row.contract_id} (version {row.version_id}): {e}")
+            db.commit()
+    finally:
+        db.close()
+
+    if totals["deletions"] or totals["failed"]:
+        print(f"Drained {totals['deletions']} vector deletions ({totals['vectors']} vectors removed, {totals['failed']} failed).")
+    return totals
+
+def find_stale_vectors(db: Session, organization_id) -> tuple[int, list]:
+    """
+    Returns (vectors scanned, stale vector IDs) for one organization. A vector is stale
+    when its contract or version no longer exists. In "latest" index mode, vectors of
+    superseded versions are also stale, but only once the contract's latest version is
+    indexed, so a contract is never left without vectors while it awaits re-indexing.
+    Contracts with queued deletions are left to drain_vector_deletions, which keeps the
+    chunks their remaining versions share.
+    """
+    queued = {
+        str(contract_id)
+        for (contract_id,) in db.query(models.VectorDeletion.contract_id)
+        .filter(models.VectorDeletion.organization_id == organization_id, models.VectorDeletion.version_id.isnot(None))
+        .distinct()
+    }
+    versions = (
+        db.query(models.ContractVersion.id, models.ContractVersion.contract_id, models.ContractVersion.version_number)
+        .join(models.Contract, models.Contract.id == models.ContractVersion.contract_id)
+        .filter(models.Contract.organization_id == organization_id)
+        .all()
+    )
+    version_ids = {str(v.id) for v in versions}
+    latest = {}
+    for v in versions:
+        if str(v.contract_id) not in latest or v.version_number > latest[str(v.contract_id)][1]:
+            latest[str(v.contract_id)] = (str(v.id), v.version_number)
+    latest_version_ids = {version_id for version_id, _ in latest.values()}
+
+    vectors = search_service.store.list_metadata(str(organization_id))
+    latest_indexed = {meta.get("contract_id") for meta in vectors.values() if meta.get("version_id") in latest_version_ids}
+    stale = []
+    for vector_id, meta in vectors.items():
+        contract_id, version_id = meta.get("contract_id"), meta.get("version_id")
+        if contract_id in queued and contract_id in latest:
+            continue
+        if contract_id not in latest or version_id not in version_ids:
+            stale.append(vector_id)
+        elif settings.VECTOR_INDEX_MODE == "latest" and version_id not in latest_version_ids and contract_id in latest_indexed:
+            stale.append(vector_id)
+    return len(vectors), stale
+
+def compact_vector_index():
+    """
+    Garbage-collects the vector index: deletes vectors whose contract or version is gone
+    (or superseded, in "latest" mode), then compacts each organization's storage.
+    Reports how many vectors were reclaimed.
+    """
+    print("Starting vector index compaction...")
+    if not search_service.store.available:
+        print("Vector store is not available. Aborting compaction.")
+        return {}
+    drain_vector_deletions()
+
+    db: Session = SessionLocal()
+    totals = {"organizations": 0, "scanned": 0, "deleted": 0, "compacted_rows": 0}
+    started = time.perf_counter()
+    try:
+        for (organization_id,) in db.query(models.Organization.id).all():
+            scanned, stale = find_stale_vectors(db, organization_id)
+            deleted = search_service.store.delete(str(organization_id), ids=stale) if stale else 0
+            if deleted:
+                search_service.cache.invalidate(str(organization_id))
+            compacted = search_service.store.compact(str(organization_id))
+            totals["organizations"] += 1
+            totals["scanned"] += scanned
+            totals["deleted"] += deleted
+            totals["compacted_rows"] += compacted
+            if deleted or compacted:
+                print(f"  - Organization {organization_id}: {deleted} stale vectors deleted, {compacted} rows compacted.")
+    except Exception as e:
+        print(f"An error occurred during vector index compaction: {e}")
+    finally:
+        db.close()
+
+    print(
+        f"Vector index compaction finished: {totals['deleted']} of {totals['scanned']} vectors reclaimed "
+        f"across {totals['organizations']} organizations, {totals['compacted_rows']} storage rows compacted "
+        f"in {time.perf_counter() - started:.1f}s."
+    )
+    return totals
+
+if __name__ == "__main__":
+    compact_vector_index()
@@ -0,0 +1,52 @@
+import sys
+import os
+import argparse
+import time
+import uuid
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import Session
+from core.database import SessionLocal
+from core import cycle_time
+
+def aggregate_cycle_times():
+    """
+    Folds newly signed contracts from the contract_status_events log into each
+    organization's cycle-time sketch, which backs the dashboard's cycle-time KPIs.
+    """
+    db: Session = SessionLocal()
+    started = time.perf_counter()
+    try:
+        totals = cycle_time.aggregate_cycle_times(db)
+    except Exception as e:
+        print(f"An error occurred during cycle-time aggregation: {e}")
+        db.rollback()
+        return {}
+    finally:
+        db.close()
+    if totals["events"]:
+        print(
+            f"Cycle-time aggregation folded {totals['events']} signed contracts into "
+            f"{totals['organizations']} organizations in {time.perf_counter() - started:.1f}s."
+        )
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregates contract cycle times from the status event log.")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the sketches from the full event log.")
+    parser.add_argument("--organization-id", type=uuid.UUID, action="append", dest="organization_ids", help="With --rebuild, repeat to rebuild several organizations (default: all).")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        db: Session = SessionLocal()
+        try:
+            rebuilt = cycle_time.rebuild_cycle_times(db, organization_ids=args.organization_ids)
+            print(f"Rebuilt cycle-time stats for {rebuilt} organizations.")
+        finally:
+            db.close()
+    aggregate_cycle_times()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import sys
+import os
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import settings
+from core.embeddings import serve, DEFAULT_SERVER_ADDRESS
+
+if __name__ == "__main__":
+    # Shared embedding server: holds one copy of the model for every API worker and job
+    # process that sets EMBEDDING_SERVER_ADDRESS to the same address. Only local clients can
+    # reach the default address; binding another interface is an explicit choice.
+    address = settings.EMBEDDING_SERVER_ADDRESS or DEFAULT_SERVER_ADDRESS
+    try:
+        serve(address, settings.EMBEDDING_SERVER_AUTHKEY)
+    except ValueError as e:
+        sys.exit(str(e))
@@ -0,0 +1,74 @@
+import sys
+import os
+import argparse
+import json
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.model_registry import ModelRegistry
+from core.config import settings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Publishes model versions and changes which ones serve traffic. Running workers "
+                    "pick up routing changes within MODEL_REGISTRY_POLL_SECONDS, or at once after SIGUSR1."
+    )
+    parser.add_argument("--model", default="timeline", help="Registry model name.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="List versions and the current routing.")
+
+    publish = commands.add_parser("publish", help="Store a trained model artifact as a new version.")
+    publish.add_argument("artifact", help="Path to a joblib/pickle file holding a fitted model with a `predict` method.")
+    publish.add_argument("--version", help="Version name (default: UTC timestamp).")
+    publish.add_argument("--metadata", help="JSON file of training metadata to store with the version.")
+    publish.add_argument("--activate", action="store_true", help="Serve the new version immediately.")
+
+    activate = commands.add_parser("activate", help="Serve a version (deploy or roll back). Clears the candidate.")
+    activate.add_argument("version")
+
+    shadow = commands.add_parser("shadow", help="Score a candidate alongside the active version without serving it.")
+    shadow.add_argument("version")
+
+    ab = commands.add_parser("ab", help="Serve a candidate to a stable fraction of contracts.")
+    ab.add_argument("version")
+    ab.add_argument("--fraction", type=float, default=0.1)
+
+    commands.add_parser("promote", help="Make the candidate the active version.")
+    commands.add_parser("clear-candidate", help="Stop shadow or A/B scoring.")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(settings.MODEL_REGISTRY_PATH, args.model)
+    if args.command == "publish":
+        metadata = None
+        if args.metadata:
+            with open(args.metadata) as f:
+                metadata = json.load(f)
+        version = registry.publish(artifact_path=args.artifact, version=args.version, metadata=metadata)
+        print(f"Published {args.model} version {version}.")
+        if args.activate:
+            registry.set_routing(active=version)
+    elif args.command == "activate":
+        registry.set_routing(active=args.version, candidate=None, mode="off", candidate_fraction=0.0)
+    elif args.command == "shadow":
+        registry.set_routing(candidate=args.version, mode="shadow", candidate_fraction=0.0)
+    elif args.command == "ab":
+        registry.set_routing(candidate=args.version, mode="ab", candidate_fraction=args.fraction)
+    elif args.command == "promote":
+        routing = registry.read_routing()
+        if not routing.get("candidate"):
+            parser.error("There is no candidate version to promote.")
+        registry.set_routing(active=routing["candidate"], candidate=None, mode="off", candidate_fraction=0.0)
+    elif args.command == "clear-candidate":
+        registry.set_routing(candidate=None, mode="off", candidate_fraction=0.0)
+
+    if args.command == "list":
+        for version in registry.versions():
+            print(version)
+    print(f"Routing: {json.dumps(registry.read_routing())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import sys
+import os
+import argparse
+import time
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.vector_store import ChromaVectorStore, group_by_organization
+
+# Vectors read from the shared collection per request.
+PAGE_SIZE = 1000
+
+def migrate_vector_partitions(organization_id: str = None, delete_source: bool = False):
+    """
+    Re-homes vectors from the legacy shared `contracts` Chroma collection into
+    per-organization collections. Vectors are copied with their stored embeddings,
+    so nothing is re-encoded. The copy uses upsert and is safe to re-run.
+    With `delete_source`, an organization's vectors are removed from the shared
+    collection only after its partition holds at least as many vectors.
+    """
+    print("Starting vector partition migration...")
+    store = ChromaVectorStore(partitioning="organization")
+    if not store.available:
+        print("ChromaDB is not available. Aborting migration.")
+        return {}
+
+    where = {"organization_id": organization_id} if organization_id else None
+    copied = {}
+    started = time.perf_counter()
+    offset = 0
+    while True:
+        page = store.collection.get(
+            where=where, limit=PAGE_SIZE, offset=offset,
+            include=["embeddings", "documents", "metadatas"],
+        )
+        if not page["ids"]:
+            break
+        groups = group_by_organization(page["ids"], page["embeddings"], page["documents"], metadatas=page["metadatas"])
+        for org_id, (ids, embeddings, documents, metadatas) in groups.items():
+            store.organization_collection(org_id, create=True).upsert(
+                ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas
+            )
+            copied[org_id] = copied.get(org_id, 0) + len(ids)
+        offset += len(page["ids"])
+        print(f"  - Copied {offset} vectors across {len(copied)} organizations...")
+
+    if delete_source:
+        for org_id, count in copied.items():
+            partition_count = store.organization_collection(org_id).count()
+            if partition_count < count:
+                print(f"  - Skipping delete for organization {org_id}: partition has {partition_count} of {count} vectors.")
+                continue
+            store.collection.delete(where={"organization_id": org_id})
+            print(f"  - Removed {count} vectors for organization {org_id} from the shared collection.")
+
+    print(
+        f"Vector partition migration finished: {sum(copied.values())} vectors for "
+        f"{len(copied)} organizations in {time.perf_counter() - started:.1f}s."
+    )
+    return copied
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move vectors from the shared Chroma collection into per-organization collections.")
+    parser.add_argument("--organization-id", help="Only migrate this organization.")
+    parser.add_argument("--delete-source", action="store_true", help="Remove migrated vectors from the shared collection.")
+    args = parser.parse_args()
+    migrate_vector_partitions(organization_id=args.organization_id, delete_source=args.delete_source)
@@ -26,6 +26,11 @@ async def process_suggestion_outcomes():
         crud.mark_suggestion_outcomes_as_processed(db, event_ids=event_ids)
         print(f"Successfully processed {len(events)} outcomes.")
 
+        # Refresh the precomputed acceptance rates of the organizations that had new outcomes.
+        organization_ids = list({event.organization_id for event in events})
+        rows = crud.refresh_clause_acceptance_rates(db, organization_ids=organization_ids)
+        print(f"Refreshed {rows} clause acceptance rates for {len(organization_ids)} organizations.")
+
     finally:
         db.close()
 
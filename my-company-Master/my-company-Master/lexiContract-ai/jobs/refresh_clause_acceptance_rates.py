@@ -0,0 +1,40 @@
+import sys
+import os
+import argparse
+import time
+import uuid
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import Session
+from core.database import SessionLocal
+from core import crud
+
+def refresh_clause_acceptance_rates(organization_ids=None) -> int:
+    """
+    Recomputes the precomputed clause_acceptance_rates from negotiation_outcomes, so
+    clause success-rate predictions follow new outcomes however they were recorded.
+    Returns the number of rows written.
+    """
+    db: Session = SessionLocal()
+    started = time.perf_counter()
+    try:
+        rows = crud.refresh_clause_acceptance_rates(db, organization_ids=organization_ids)
+    except Exception as e:
+        print(f"An error occurred while refreshing clause acceptance rates: {e}")
+        db.rollback()
+        return 0
+    finally:
+        db.close()
+    print(f"Refreshed {rows} clause acceptance rates in {time.perf_counter() - started:.1f}s.")
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Recomputes clause acceptance rates from negotiation outcomes.")
+    parser.add_argument("--organization-id", type=uuid.UUID, action="append", dest="organization_ids", help="Repeat to refresh several organizations (default: all).")
+    args = parser.parse_args()
+    refresh_clause_acceptance_rates(organization_ids=args.organization_ids)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import sys
+import os
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session, aliased
+from core.database import SessionLocal
+from core import models
+from core.config import settings
+from core.search import search_service
+
+# Number of contract versions pulled from the database per indexing run.
+VERSIONS_PER_RUN = 200
+
+def reindex_contract_versions():
+    """
+    Re-indexes every contract version with text into the vector store.
+    Versions are fed to the indexing pipeline in pages, so chunks are embedded
+    across documents in large batches and unchanged chunks are skipped.
+    In "latest" index mode only each contract's newest version is indexed.
+    """
+    print("Starting contract re-indexing job...")
+    db: Session = SessionLocal()
+    totals = {"documents": 0, "chunks": 0, "embedded": 0, "skipped": 0, "pruned": 0, "seconds": 0.0}
+    try:
+        query = (
+            db.query(models.ContractVersion.id, models.ContractVersion.contract_id, models.ContractVersion.full_text, models.Contract.organization_id)
+            .join(models.Contract, models.Contract.id == models.ContractVersion.contract_id)
+            .filter(models.ContractVersion.full_text.isnot(None))
+            .order_by(models.ContractVersion.id)
+        )
+        if settings.VECTOR_INDEX_MODE == "latest":
+            newer = aliased(models.ContractVersion)
+            query = query.filter(~exists().where(
+                newer.contract_id == models.ContractVersion.contract_id,
+                newer.version_number > models.ContractVersion.version_number,
+            ))
+        last_id = None
+        while True:
+            page_query = query if last_id is None else query.filter(models.ContractVersion.id > last_id)
+            rows = page_query.limit(VERSIONS_PER_RUN).all()
+            if not rows:
+                break
+
+            stats = search_service.index_documents(
+                [(str(row.contract_id), str(row.id), str(row.organization_id), row.full_text) for row in rows]
+            )
+            for key in totals:
+                totals[key] += stats[key]
+            last_id = rows[-1].id
+    finally:
+        db.close()
+
+    hit_rate = totals["skipped"] / totals["chunks"] if totals["chunks"] else 0.0
+    rate = totals["chunks"] / totals["seconds"] if totals["seconds"] else 0.0
+    print(
+        f"Re-indexing finished: {totals['documents']} versions, {totals['chunks']} chunks, "
+        f"{rate:.1f} chunks/sec, {hit_rate:.1%} dedup hit rate, {totals['pruned']} superseded chunks pruned."
+    )
+    return totals
+
+if __name__ == "__main__":
+    reindex_contract_versions()
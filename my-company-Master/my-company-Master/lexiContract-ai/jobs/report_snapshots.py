@@ -0,0 +1,105 @@
+import sys
+import os
+import argparse
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from core.database import SessionLocal
+from core import crud, models, report_snapshots
+
+# Scheduler job ids of report snapshot jobs are this prefix plus the report id.
+JOB_PREFIX = "report_snapshot:"
+# Executor (thread pool) the snapshot jobs run in, registered by jobs/scheduler.py.
+SNAPSHOT_EXECUTOR = "report_snapshots"
+# A report snapshotted more recently than this is not run again, e.g. by a second scheduler process.
+MIN_SNAPSHOT_INTERVAL = timedelta(hours=1)
+
+def run_report_snapshot(report_id: str, force: bool = False):
+    """
+    Runs a scheduled report and stores the result as a snapshot. An advisory lock on the
+    report keeps two scheduler processes from running it at the same time.
+    """
+    db: Session = SessionLocal()
+    try:
+        report = db.query(models.CustomReport).filter(models.CustomReport.id == uuid.UUID(report_id)).first()
+        if report is None:
+            print(f"Scheduled report {report_id} no longer exists; skipping.")
+            return None
+        if not db.query(func.pg_try_advisory_xact_lock(func.hashtext(JOB_PREFIX + report_id))).scalar():
+            print(f"Report {report_id} is already being snapshotted; skipping.")
+            return None
+        latest = crud.get_report_snapshot(db, report.id)
+        if not force and latest and datetime.now(timezone.utc) - latest.created_at < MIN_SNAPSHOT_INTERVAL:
+            print(f"Report {report_id} was snapshotted at {latest.created_at.isoformat()}; skipping.")
+            return None
+        snapshot = report_snapshots.write_snapshot(db, report)
+        print(
+            f"Snapshotted report '{report.name}' ({report_id}): {snapshot.row_count} rows, "
+            f"{snapshot.size_bytes / 1024:.0f} KiB in {snapshot.duration_seconds:.1f}s"
+            + (f", truncated at the {snapshot.truncated.replace('_', ' ')}." if snapshot.truncated else ".")
+        )
+        return snapshot.id
+    except Exception as e:
+        print(f"An error occurred while snapshotting report {report_id}: {e}")
+        db.rollback()
+        return None
+    finally:
+        db.close()
+
+def sync_report_schedules(scheduler):
+    """
+    Makes the scheduler's snapshot jobs match the reports' schedules in the database:
+    adds or reschedules jobs for scheduled reports and removes those of unscheduled ones.
+    """
+    db: Session = SessionLocal()
+    try:
+        wanted = {
+            JOB_PREFIX + str(report.id): report.snapshot_schedule
+            for report in crud.get_scheduled_custom_reports(db)
+            if report.snapshot_schedule in report_snapshots.SNAPSHOT_SCHEDULES
+        }
+    finally:
+        db.close()
+
+    for job in scheduler.get_jobs():
+        if job.id.startswith(JOB_PREFIX) and job.id not in wanted:
+            job.remove()
+    for job_id, schedule in wanted.items():
+        job = scheduler.get_job(job_id)
+        # The job's name is its schedule, so unchanged jobs keep their next run time.
+        if job is not None and job.name == schedule:
+            continue
+        report_id = job_id[len(JOB_PREFIX):]
+        scheduler.add_job(
+            run_report_snapshot,
+            'cron',
+            args=[report_id],
+            id=job_id,
+            name=schedule,
+            executor=SNAPSHOT_EXECUTOR,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=3600,
+            timezone="UTC",
+            **report_snapshots.snapshot_cron_fields(report_id, schedule)
+        )
+    return len(wanted)
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshots a custom report now, outside its schedule.")
+    parser.add_argument("report_id", type=uuid.UUID, help="The custom report to snapshot.")
+    parser.add_argument("--force", action="store_true", help="Run even if the report was snapshotted within the last hour.")
+    args = parser.parse_args()
+
+    if not report_snapshots.PYARROW_ENABLED:
+        sys.exit("Report snapshots need pyarrow; install it first.")
+    run_report_snapshot(str(args.report_id), force=args.force)
+
+if __name__ == "__main__":
+    main()
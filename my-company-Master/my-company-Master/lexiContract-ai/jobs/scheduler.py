@@ -1,6 +1,15 @@
+from datetime import datetime, timezone
+
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from core.config import settings
 from jobs.milestone_scanner import scan_for_upcoming_milestones
 from jobs.dispatcher import dispatch_pending_notifications
+from jobs.compact_vector_index import compact_vector_index, drain_vector_deletions
+from jobs.check_analytics_rollups import check_analytics_rollups
+from jobs.cycle_time_aggregator import aggregate_cycle_times
+from jobs.refresh_clause_acceptance_rates import refresh_clause_acceptance_rates
+from jobs.report_snapshots import sync_report_schedules, SNAPSHOT_EXECUTOR
 
 scheduler = AsyncIOScheduler(timezone="UTC")
 
@@ -29,6 +38,68 @@ def setup_scheduler():
         id='dispatcher_job',
         replace_existing=True
     )
+
+    # Remove the vectors of deleted contracts and versions every 5 minutes.
+    scheduler.add_job(
+        drain_vector_deletions,
+        'interval',
+        minutes=5,
+        id='vector_deletion_job',
+        replace_existing=True
+    )
+
+    # Reclaim stale vectors and compact the vector index nightly at 03:00 UTC.
+    scheduler.add_job(
+        compact_vector_index,
+        'cron',
+        hour=3,
+        minute=0,
+        id='vector_index_compaction_job',
+        replace_existing=True
+    )
+
+    # Check the analytics dashboard rollups against the source tables nightly at 04:00 UTC,
+    # rebuilding any organization whose rollups drifted.
+    scheduler.add_job(
+        check_analytics_rollups,
+        'cron',
+        hour=4,
+        minute=0,
+        id='analytics_rollup_check_job',
+        replace_existing=True
+    )
+
+    # Recompute the clause acceptance rates behind clause success predictions every hour.
+    scheduler.add_job(
+        refresh_clause_acceptance_rates,
+        'cron',
+        minute=15,
+        id='clause_acceptance_rates_job',
+        replace_existing=True
+    )
+
+    # Fold newly signed contracts into the cycle-time KPIs every 5 minutes.
+    scheduler.add_job(
+        aggregate_cycle_times,
+        'interval',
+        minutes=5,
+        id='cycle_time_aggregation_job',
+        replace_existing=True
+    )
+
+    # Scheduled report snapshots run in their own worker pool, so a long report never
+    # delays the jobs above. Their jobs follow the reports' schedules in the database,
+    # re-read at startup and every 5 minutes.
+    scheduler.add_executor(ThreadPoolExecutor(settings.REPORT_SNAPSHOT_WORKERS), alias=SNAPSHOT_EXECUTOR)
+    scheduler.add_job(
+        sync_report_schedules,
+        'interval',
+        minutes=5,
+        args=[scheduler],
+        next_run_time=datetime.now(timezone.utc),
+        id='report_schedule_sync_job',
+        replace_existing=True
+    )
     
     print("Scheduler jobs have been configured.")
     return scheduler
\ No newline at end of file
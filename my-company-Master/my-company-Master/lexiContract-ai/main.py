@@ -3,6 +3,9 @@ from fastapi.middleware.cors import CORSMiddleware
 
 # Assuming your API router is defined in api.v1.api
 from api.v1.api import api_router
+# Registers the session hook that queues vector removal when contracts or versions are deleted.
+import core.index_lifecycle  # noqa: F401
+from core import model_registry
 
 app = FastAPI(
     title="LexiContract AI",
@@ -22,6 +25,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the browser read keyset pagination cursors (e.g. from /search) and report metadata.
+    expose_headers=["X-Next-Cursor", "X-Report-Date-Range-Start", "X-Snapshot-Id", "X-Snapshot-Created-At", "X-Total-Rows"],
 )
 
-app.include_router(api_router, prefix="/api/v1")
\ No newline at end of file
+app.include_router(api_router, prefix="/api/v1")
+
+# `kill -USR1 <worker pid>` makes a worker reload its models without waiting for the next poll.
+model_registry.install_reload_signal()
\ No newline at end of file
@@ -0,0 +1,109 @@
+import argparse
+import glob
+import os
+import re
+import sys
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.chunking import Chunk, chunk_text, tokenizer_token_counter
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+TOP_K = 10
+
+
+def paragraph_chunks(text: str) -> list[Chunk]:
+    """The previous SearchService strategy: one chunk per blank-line separated paragraph."""
+    chunks = []
+    position = 0
+    for paragraph in text.split("\n\n"):
+        stripped = paragraph.strip()
+        if stripped:
+            start = text.index(stripped, position)
+            chunks.append(Chunk(stripped, start, start + len(stripped), 0))
+        position += len(paragraph) + 2
+    return chunks
+
+
+def load_corpus(data_dir: str) -> list[str]:
+    """
+    Loads every .txt contract, plus a copy with blank lines removed to mimic the
+    output of PDF extraction, where paragraph breaks are usually lost.
+    """
+    documents = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        documents.append(text)
+        documents.append(re.sub(r"\n\s*\n", "\n", text))
+    return documents
+
+
+def build_queries(documents: list[str]) -> list[tuple[int, int, int, str]]:
+    """
+    Uses each sentence of six or more words as a query, with every third word dropped
+    so the query is not a verbatim substring. The sentence span is the ground truth.
+    """
+    queries = []
+    for doc_index, text in enumerate(documents):
+        for match in re.finditer(r"[^.!?\n]+[.!?]", text):
+            words = match.group().split()
+            if len(words) < 6:
+                continue
+            query = " ".join(w for i, w in enumerate(words) if i % 3 != 2)
+            queries.append((doc_index, match.start(), match.end(), query))
+    return queries
+
+
+def evaluate(model, documents, queries, chunker) -> dict:
+    index = []
+    for doc_index, text in enumerate(documents):
+        for chunk in chunker(text):
+            index.append((doc_index, chunk))
+
+    embeddings = model.encode([c.text for _, c in index], normalize_embeddings=True, batch_size=64)
+    query_embeddings = model.encode([q[3] for q in queries], normalize_embeddings=True, batch_size=64)
+    scores = query_embeddings @ embeddings.T
+
+    hits = 0
+    for query_index, (doc_index, start, end, _) in enumerate(queries):
+        top = np.argsort(-scores[query_index])[:TOP_K]
+        if any(index[i][0] == doc_index and index[i][1].start_index < end and index[i][1].end_index > start for i in top):
+            hits += 1
+
+    truncated = sum(1 for _, c in index if len(model.tokenizer.tokenize(c.text)) > model.max_seq_length)
+    return {
+        "vectors": len(index),
+        "index_bytes": int(embeddings.nbytes + sum(len(c.text.encode("utf-8")) for _, c in index)),
+        "truncated_chunks": truncated,
+        f"recall@{TOP_K}": round(hits / len(queries), 3) if queries else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the token-aware chunker with the paragraph splitter.")
+    parser.add_argument("--data-dir", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test_data"))
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--overlap", type=int, default=40)
+    args = parser.parse_args()
+
+    model = SentenceTransformer(MODEL_NAME)
+    count_tokens = tokenizer_token_counter(model.tokenizer)
+    documents = load_corpus(args.data_dir)
+    queries = build_queries(documents)
+    print(f"Corpus: {len(documents)} documents, {len(queries)} queries.")
+
+    strategies = {
+        "paragraph": paragraph_chunks,
+        "token_window": lambda text: chunk_text(text, args.chunk_size, args.overlap, count_tokens),
+    }
+    for name, chunker in strategies.items():
+        print(f"{name:>14}: {evaluate(model, documents, queries, chunker)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter so every sample is a true cold start.
+IMPORT_PROBE = """
+import resource, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+loaded = [m for m in ("torch", "sentence_transformers", "chromadb") if m in sys.modules]
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(f"{elapsed:.4f} {rss_kb} {','.join(loaded) or '-'}")
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time and memory of main.app.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    timings, rss = [], []
+    for run in range(args.runs):
+        result = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=PROJECT_ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(result.stderr)
+            sys.exit(result.returncode)
+        seconds, rss_kb, loaded = result.stdout.strip().splitlines()[-1].split()
+        timings.append(float(seconds))
+        rss.append(int(rss_kb) / 1024)
+        print(f"run {run + 1}: import main {float(seconds) * 1000:.0f} ms, max RSS {rss[-1]:.0f} MB, heavy modules loaded: {loaded}")
+
+    print(f"median import: {statistics.median(timings) * 1000:.0f} ms, median max RSS: {statistics.median(rss):.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
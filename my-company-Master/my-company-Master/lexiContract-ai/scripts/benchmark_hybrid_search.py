@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import uuid
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.database import SessionLocal
+from core.hybrid_search import hybrid_search
+
+DEFAULT_QUERIES = [
+    "limitation of liability cap",
+    "termination for convenience",
+    "governing law and jurisdiction",
+    "indemnification obligations",
+    "data breach notification",
+    "payment terms net 45 days",
+    "confidential information exclusions",
+    "assignment without consent",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run(organization_id: uuid.UUID, iterations: int, limit: int):
+    db = SessionLocal()
+    samples = {"lexical_ms": [], "vector_ms": [], "fusion_ms": [], "total_ms": []}
+    degraded = 0
+    try:
+        for i in range(iterations):
+            query = DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)]
+            outcome = await hybrid_search(db, organization_id=organization_id, query=query, limit=limit)
+            for key in samples:
+                samples[key].append(outcome["timings"][key])
+            degraded += bool(outcome["timings"]["degraded"])
+    finally:
+        db.close()
+
+    for key, values in samples.items():
+        print(f"{key:>11}: p50 {statistics.median(values):8.1f}  p95 {percentile(values, 95):8.1f}  max {max(values):8.1f}")
+    print(f"degraded responses: {degraded}/{iterations}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure hybrid search stage latencies against a seeded organization (e.g. one with ~100k indexed chunks)."
+    )
+    parser.add_argument("organization_id", type=uuid.UUID)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.organization_id, args.iterations, args.limit))
+
+
+if __name__ == "__main__":
+    main()
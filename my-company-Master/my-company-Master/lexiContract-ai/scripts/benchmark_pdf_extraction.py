@@ -0,0 +1,112 @@
+import argparse
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+WORDS = (
+    "agreement party parties shall term termination liability indemnify confidential information "
+    "payment invoice days notice breach remedy warranty governing law jurisdiction assignment "
+    "consent obligations services deliverables fees limitation damages insurance audit records"
+).split()
+
+
+def make_pdf(path: str, pages: int, lines_per_page: int = 50, seed: int = 0):
+    """Writes a synthetic text PDF of `pages` pages of contract-like words."""
+    rng = random.Random(seed)
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for page_number in range(pages):
+        page = writer.add_blank_page(612, 792)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+        })
+        lines = [f"{page_number + 1}.{i + 1} " + " ".join(rng.choices(WORDS, k=12)) for i in range(lines_per_page)]
+        content = "BT /F1 9 Tf 12 TL 40 760 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        stream = DecodedStreamObject()
+        stream.set_data(content.encode("latin-1"))
+        page[NameObject("/Contents")] = writer._add_object(stream)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def extract_baseline(path: str) -> str:
+    """The previous implementation: whole file in memory, serial pages, repeated concatenation."""
+    with open(path, "rb") as f:
+        reader = PdfReader(io.BytesIO(f.read()))
+    extracted_text = ""
+    for page in reader.pages:
+        extracted_text += (page.extract_text() or "") + "\n"
+    return extracted_text
+
+
+def run_one(method: str, path: str):
+    from core import utils
+    started = time.perf_counter()
+    if method == "baseline":
+        text = extract_baseline(path)
+    else:
+        text = utils.extract_text_from_path(path, os.path.basename(path))
+    elapsed = time.perf_counter() - started
+    utils.shutdown_pdf_pool()
+    # ru_maxrss is in KiB on Linux. RUSAGE_CHILDREN reports the largest reaped worker.
+    print(json.dumps({
+        "seconds": elapsed,
+        "chars": len(text),
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "worker_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks PDF text extraction on synthetic multi-hundred-page PDFs.")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--documents", type=int, default=3)
+    parser.add_argument("--run-one", nargs=2, metavar=("METHOD", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(*args.run_one)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(args.documents):
+            path = os.path.join(directory, f"synthetic_{i}.pdf")
+            make_pdf(path, args.pages, seed=i)
+            paths.append(path)
+        print(f"Generated {args.documents} PDFs of {args.pages} pages ({os.path.getsize(paths[0]) / 1e6:.1f} MB each).")
+
+        print(f"{'method':<10} {'document':<18} {'seconds':>8} {'pages/s':>8} {'rss MB':>8} {'worker MB':>10} {'chars':>10}")
+        for method in ("baseline", "streaming"):
+            for path in paths:
+                # Each run gets a fresh process so peak RSS is measured per run.
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--run-one", method, path],
+                    capture_output=True, text=True, check=True,
+                ).stdout.strip().splitlines()[-1]
+                result = json.loads(output)
+                print(
+                    f"{method:<10} {os.path.basename(path):<18} {result['seconds']:>8.2f} "
+                    f"{args.pages / result['seconds']:>8.1f} {result['rss_mb']:>8.1f} "
+                    f"{result['worker_rss_mb']:>10.1f} {result['chars']:>10}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.redline_patch import TextEdit, apply_edits
+
+WORDS = (
+    "agreement party parties shall term termination liability indemnify confidential information "
+    "payment invoice days notice breach remedy warranty governing law jurisdiction assignment"
+).split()
+
+
+def make_text(size: int, rng: random.Random) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def make_edits(text_length: int, count: int, rng: random.Random) -> list:
+    """Non-overlapping replacements of 5-60 characters, spread over the text."""
+    starts = sorted(rng.sample(range(0, text_length - 60, 100), count))
+    return [TextEdit(start, start + rng.randint(5, 60), "replacement clause text"[: rng.randint(0, 23)]) for start in starts]
+
+
+def apply_char_list(text: str, edits: list) -> str:
+    """The previous implementation: slice-assign each edit into a list of characters, last edit first."""
+    text_parts = list(text)
+    for edit in sorted(edits, key=lambda e: e.start, reverse=True):
+        text_parts[edit.start:edit.end] = list(edit.replacement)
+    return "".join(text_parts)
+
+
+def timed(func, iterations: int):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = func()
+    return (time.perf_counter() - started) / iterations, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the span-based redline patch engine with the character-list implementation.")
+    parser.add_argument("--size", type=int, default=1_000_000, help="Text size in characters.")
+    parser.add_argument("--edits", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    text = make_text(args.size, rng)
+    print(f"Text: {len(text) / 1e6:.2f} MB")
+    print(f"{'edits':>6} {'char list s':>12} {'span s':>8} {'speedup':>8} {'map 5k offsets ms':>18}")
+    for count in args.edits:
+        edits = make_edits(len(text), count, rng)
+        baseline_seconds, expected = timed(lambda: apply_char_list(text, edits), args.iterations)
+        span_seconds, (patched, offset_map) = timed(lambda: apply_edits(text, edits), args.iterations)
+        assert patched == expected, "Span-based engine disagrees with the character-list implementation."
+
+        offsets = [rng.randrange(len(text)) for _ in range(5000)]
+        map_seconds, _ = timed(lambda: [offset_map.map_start(offset) for offset in offsets], args.iterations)
+        print(
+            f"{count:>6} {baseline_seconds:>12.3f} {span_seconds:>8.4f} "
+            f"{baseline_seconds / span_seconds:>7.0f}x {map_seconds * 1000:>18.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import glob
+import os
+import random
+import re
+import sys
+import time
+import uuid
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.rule_engine import RULE_FLAGS, CompiledRuleSet
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TERMS = (
+    "indemnif limitation liability warranty termination convenience assignment consent audit "
+    "insurance subcontract escrow exclusivity non-compete non-solicit most favored nation "
+    "liquidated damages force majeure governing law arbitration venue export control sanctions "
+    "anti-bribery data residency encryption retention deletion breach notification source code"
+).split()
+
+
+def seed_patterns() -> list:
+    """The rule patterns shipped in jobs/seed_playbooks.py."""
+    with open(os.path.join(PROJECT_ROOT, "jobs", "seed_playbooks.py"), encoding="utf-8") as f:
+        return re.findall(r'pattern=r"([^"]+)"', f.read())
+
+
+def synthetic_patterns(count: int, rng: random.Random) -> list:
+    """Playbook-style patterns: short phrases with optional alternations."""
+    patterns = []
+    for _ in range(count):
+        a, b, c = rng.sample(TERMS, 3)
+        patterns.append(rng.choice([f"{a} {b}", f"{a} ({b}|{c})", f"{a}\\w* (of|for) {b}", f"{a}|{b} {c}"]))
+    return patterns
+
+
+def load_text(data_dir: str, repeat: int) -> str:
+    texts = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+    return "\n\n".join(texts) * repeat
+
+
+def naive_scan(patterns: list, text: str) -> list:
+    """The per-rule loop: compile and run every pattern over the full text."""
+    matches = []
+    for index, pattern in enumerate(patterns):
+        for m in re.finditer(pattern, text, RULE_FLAGS):
+            if m.end() > m.start():
+                matches.append((m.start(), m.end(), index))
+    return sorted(matches)
+
+
+def timed(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the compiled playbook rule engine with a naive per-rule regex loop.")
+    parser.add_argument("--data-dir", default=os.path.join(PROJECT_ROOT, "test_data"))
+    parser.add_argument("--repeat", type=int, default=50, help="Repeat the corpus to reach a realistic contract size.")
+    parser.add_argument("--rules", type=int, nargs="+", default=[50, 200, 1000], help="Synthetic rule counts, added to the seeded rules.")
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    text = load_text(args.data_dir, args.repeat)
+    print(f"Text: {len(text) / 1e6:.2f} MB")
+    print(f"{'rules':>6} {'naive s':>9} {'engine s':>9} {'naive rules/s':>14} {'engine rules/s':>15} {'speedup':>8} {'matches':>8}")
+    for count in [0] + args.rules:
+        patterns = seed_patterns() + synthetic_patterns(count, rng)
+        rule_set = CompiledRuleSet([(uuid.UUID(int=i), p) for i, p in enumerate(patterns)])
+
+        expected = naive_scan(patterns, text)
+        actual = [(m.start, m.end, m.rule_id.int) for m in rule_set.scan(text)]
+        assert actual == expected, "Compiled engine disagrees with the naive loop."
+
+        naive_seconds = timed(lambda: naive_scan(patterns, text), args.iterations)
+        engine_seconds = timed(lambda: rule_set.scan(text), args.iterations)
+        print(
+            f"{len(patterns):>6} {naive_seconds:>9.3f} {engine_seconds:>9.3f} "
+            f"{len(patterns) / naive_seconds:>14.0f} {len(patterns) / engine_seconds:>15.0f} "
+            f"{naive_seconds / engine_seconds:>7.1f}x {len(actual):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import crud, models
+from core.database import SessionLocal
+
+RISK_CATEGORIES = ["Data Privacy", "Liability", "Termination", "Payment", "Confidentiality"]
+
+
+def synthetic_rows(count: int, rng: random.Random) -> list:
+    rows = []
+    for i in range(count):
+        start = i * 120
+        rows.append({
+            "start_index": start,
+            "end_index": start + 80,
+            "original_text": "The Supplier shall indemnify the Customer against all losses. " * 2,
+            "suggested_text": "The Supplier shall indemnify the Customer against direct losses.",
+            "comment": "Unlimited indemnity; consider capping at fees paid.",
+            "risk_category": rng.choice(RISK_CATEGORIES),
+        })
+    return rows
+
+
+def orm_loop(db, version_id: uuid.UUID, rows: list):
+    """The previous path: one AnalysisSuggestion object per row through the unit of work."""
+    for row in rows:
+        db.add(models.AnalysisSuggestion(**row, contract_version_id=version_id))
+    db.flush()
+
+
+def bulk(db, version_id: uuid.UUID, rows: list):
+    crud.bulk_insert_suggestions(db, version_id=version_id, rows=rows)
+
+
+def timed(db, func, version_id: uuid.UUID, rows: list, iterations: int) -> float:
+    """Runs `func` in a transaction that is rolled back, so the database is left untouched."""
+    total = 0.0
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func(db, version_id, rows)
+        total += time.perf_counter() - started
+        db.rollback()
+        db.expunge_all()
+    return total / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares bulk suggestion inserts with the per-object ORM loop. All writes are rolled back.")
+    parser.add_argument("--version-id", type=uuid.UUID, help="Contract version to attach the suggestions to. Defaults to any existing version.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        version = (
+            crud.get_contract_version_by_id(db, version_id=args.version_id) if args.version_id
+            else db.query(models.ContractVersion).first()
+        )
+        if version is None:
+            print("No contract version found; upload a contract first or pass --version-id.")
+            return
+        version_id = version.id
+        db.rollback()
+
+        rng = random.Random(0)
+        print(f"{'rows':>6} {'orm s':>8} {'bulk s':>8} {'orm rows/s':>11} {'bulk rows/s':>12} {'speedup':>8}")
+        for size in args.sizes:
+            rows = synthetic_rows(size, rng)
+            orm_seconds = timed(db, orm_loop, version_id, rows, args.iterations)
+            bulk_seconds = timed(db, bulk, version_id, rows, args.iterations)
+            print(
+                f"{size:>6} {orm_seconds:>8.3f} {bulk_seconds:>8.3f} {size / orm_seconds:>11.0f} "
+                f"{size / bulk_seconds:>12.0f} {orm_seconds / bulk_seconds:>7.1f}x"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
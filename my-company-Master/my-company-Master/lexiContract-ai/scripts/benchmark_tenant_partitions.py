@@ -0,0 +1,102 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.vector_store import ChromaVectorStore, LocalVectorStore, organization_collection_name
+
+DIMENSIONS = 384  # all-MiniLM-L6-v2
+INSERT_BATCH = 1000
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def add_tenant(store, organization_id: str, vectors: np.ndarray):
+    for start in range(0, len(vectors), INSERT_BATCH):
+        batch = vectors[start:start + INSERT_BATCH]
+        store.add(
+            ids=[f"{organization_id}-{start + i}" for i in range(len(batch))],
+            embeddings=batch.tolist(),
+            documents=[f"chunk {start + i}" for i in range(len(batch))],
+            metadatas=[{"organization_id": organization_id, "contract_id": "bench", "version_id": "bench"} for _ in batch],
+        )
+
+
+def probe_p95(store, organization_id: str, queries: np.ndarray, limit: int) -> float:
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        store.query(query.tolist(), organization_id=organization_id, limit=limit)
+        samples.append((time.perf_counter() - started) * 1000)
+    return percentile(samples, 95)
+
+
+def cleanup_chroma(store: ChromaVectorStore, organization_ids: list):
+    if store.partitioning == "shared":
+        store.collection.delete(where={"organization_id": {"$in": organization_ids}})
+        return
+    for organization_id in organization_ids:
+        try:
+            store.client.delete_collection(name=organization_collection_name(organization_id))
+        except Exception:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures a small tenant's query p95 as the number of other tenants grows, "
+                    "comparing per-organization partitions with a single filtered collection."
+    )
+    parser.add_argument("--tenants", type=int, nargs="+", default=[10, 50, 200], help="Total tenant counts to step through.")
+    parser.add_argument("--vectors-per-tenant", type=int, default=2000)
+    parser.add_argument("--probe-vectors", type=int, default=200, help="Size of the small tenant being measured.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--chroma", action="store_true",
+                        help="Also benchmark the configured Chroma server, shared vs. per-organization. "
+                             "Benchmark vectors are removed afterwards.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    backends = [("local (per-org)", lambda path: LocalVectorStore(path=path))]
+    if args.chroma:
+        backends.append(("chroma (shared)", lambda path: ChromaVectorStore(partitioning="shared")))
+        backends.append(("chroma (per-org)", lambda path: ChromaVectorStore(partitioning="organization")))
+
+    queries = rng.standard_normal((args.queries, DIMENSIONS), dtype=np.float32)
+    print(f"{'backend':<18} {'tenants':>8} {'total vectors':>14} {'probe p95 ms':>13}")
+    for name, factory in backends:
+        with tempfile.TemporaryDirectory() as path:
+            store = factory(path)
+            if not store.available:
+                print(f"{name:<18} unavailable")
+                continue
+            probe = str(uuid.uuid4())
+            organization_ids = [probe]
+            add_tenant(store, probe, rng.standard_normal((args.probe_vectors, DIMENSIONS), dtype=np.float32))
+            total = args.probe_vectors
+            try:
+                for tenants in args.tenants:
+                    while len(organization_ids) < tenants:
+                        organization_id = str(uuid.uuid4())
+                        add_tenant(store, organization_id, rng.standard_normal((args.vectors_per_tenant, DIMENSIONS), dtype=np.float32))
+                        organization_ids.append(organization_id)
+                        total += args.vectors_per_tenant
+                    print(f"{name:<18} {len(organization_ids):>8} {total:>14} {probe_p95(store, probe, queries, args.limit):>13.2f}")
+            finally:
+                if isinstance(store, ChromaVectorStore):
+                    cleanup_chroma(store, organization_ids)
+
+
+if __name__ == "__main__":
+    main()
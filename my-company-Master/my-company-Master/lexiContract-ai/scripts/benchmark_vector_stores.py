@@ -0,0 +1,81 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.vector_store import HNSW_ENABLED, ChromaVectorStore, LocalVectorStore
+
+DIMENSIONS = 384  # all-MiniLM-L6-v2
+INSERT_BATCH = 1000
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def load(store, organization_id: str, vectors: np.ndarray) -> float:
+    started = time.perf_counter()
+    for start in range(0, len(vectors), INSERT_BATCH):
+        batch = vectors[start:start + INSERT_BATCH]
+        ids = [f"{organization_id}-{start + i}" for i in range(len(batch))]
+        store.add(
+            ids=ids,
+            embeddings=batch.tolist(),
+            documents=[f"chunk {start + i}" for i in range(len(batch))],
+            metadatas=[{"organization_id": organization_id, "contract_id": "bench", "version_id": "bench"} for _ in batch],
+        )
+    return time.perf_counter() - started
+
+
+def measure(store, organization_id: str, queries: np.ndarray, limit: int) -> list:
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        store.query(query.tolist(), organization_id=organization_id, limit=limit)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares query latency across vector store backends on synthetic embeddings.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Vectors per organization.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--chroma", action="store_true", help="Also benchmark the configured Chroma server.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    backends = [("local (brute force)", lambda path: LocalVectorStore(path=path, hnsw_threshold=sys.maxsize))]
+    if HNSW_ENABLED:
+        backends.append(("local (hnsw)", lambda path: LocalVectorStore(path=path, hnsw_threshold=0)))
+    else:
+        print("hnswlib is not installed; skipping the HNSW backend.")
+    if args.chroma:
+        backends.append(("chroma", lambda path: ChromaVectorStore()))
+
+    print(f"{'backend':<22} {'vectors':>8} {'load s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, DIMENSIONS), dtype=np.float32)
+        queries = rng.standard_normal((args.queries, DIMENSIONS), dtype=np.float32)
+        for name, factory in backends:
+            with tempfile.TemporaryDirectory() as path:
+                store = factory(path)
+                if not store.available:
+                    print(f"{name:<22} unavailable")
+                    continue
+                organization_id = str(uuid.uuid4())
+                load_seconds = load(store, organization_id, vectors)
+                samples = measure(store, organization_id, queries, args.limit)
+                print(f"{name:<22} {size:>8} {load_seconds:>8.2f} {percentile(samples, 50):>8.2f} {percentile(samples, 95):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
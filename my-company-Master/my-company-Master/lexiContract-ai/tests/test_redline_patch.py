@@ -0,0 +1,30 @@
+from core.redline_patch import TextEdit, apply_edits
+
+
+def test_insertion_maps_to_its_inserted_text():
+    text, offset_map = apply_edits("0123456789", [TextEdit(5, 5, "XYZ")])
+    assert text == "01234XYZ56789"
+    start, end = offset_map.map_edit(5, 5)
+    assert (start, end) == (5, 8)
+    assert text[start:end] == "XYZ"
+
+
+def test_insertions_at_one_offset_keep_their_order():
+    text, offset_map = apply_edits("0123456789", [TextEdit(5, 5, "A"), TextEdit(5, 5, "BC")])
+    assert text == "01234ABC56789"
+    assert offset_map.map_edit(5, 5, nth=0) == (5, 6)
+    assert offset_map.map_edit(5, 5, nth=1) == (6, 8)
+
+
+def test_replacement_maps_to_its_new_text():
+    text, offset_map = apply_edits("0123456789", [TextEdit(2, 4, "ab"), TextEdit(6, 9, "")])
+    assert text == "01ab459"
+    assert offset_map.map_edit(2, 4) == (2, 4)
+    assert offset_map.map_edit(6, 9) == (6, 6)
+    assert offset_map.map_span(4, 6) == (4, 6)
+
+
+def test_point_span_is_not_inverted():
+    _, offset_map = apply_edits("0123456789", [TextEdit(5, 5, "XYZ")])
+    start, end = offset_map.map_span(5, 5)
+    assert start <= end